@@ -0,0 +1,32 @@
+import argparse
+import sys
+
+import config
+from core.batch import BatchRunner
+from main import assistant
+
+# Run a JSONL file of conversations through the assistant, e.g.:
+#   python batch.py prompts.jsonl --concurrency 16 --output results.jsonl
+# Each input line is {"id": ..., "conversation": [{"role": "user", "content": ...}]} or {"id": ..., "prompt": ...}.
+# Results are written as JSONL in completion order.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a batch of conversations through the assistant.")
+    parser.add_argument("input", help="JSONL file of conversations, or '-' for stdin")
+    parser.add_argument("--concurrency", type=int, default=config.batch_concurrency,
+                        help="Maximum number of conversations in flight")
+    parser.add_argument("--output", help="File to write JSONL results to (defaults to stdout)")
+    args = parser.parse_args()
+
+    runner = BatchRunner(assistant, concurrency=args.concurrency)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for line in runner.run_jsonl(source):
+            sink.write(line)
+            sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
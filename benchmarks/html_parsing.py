@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from functions.parse_pool import ParsePool
+from functions.web_scraper import extract_text
+
+# Compares parsing scraped pages in the request threads with parsing them in a parse pool: pages per second, and
+# how late a thread that should wake up every 10 ms (standing in for the event loop) gets while pages are parsed.
+# The throughput gain grows with the number of CPUs. Run with: python -m benchmarks.html_parsing
+
+PAGES = 64
+THREADS = 8
+
+
+def make_page(index: int) -> bytes:
+    """A news-article-like page of about 100 KB: navigation, scripts, and many paragraphs."""
+    navigation = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(200))
+    paragraphs = "".join(
+        f"<p>Paragraph {i} of article {index}: <b>officials</b> said on Tuesday that the "
+        f"<a href='/topic/{i}'>negotiations</a> would continue next week, according to people familiar.</p>"
+        for i in range(600)
+    )
+    return (f"<html><head><title>Article {index}</title><script>var x = {index};</script></head><body>"
+            f"<nav><ul>{navigation}</ul></nav><article>{paragraphs}</article>"
+            f"<footer><p>All rights reserved.</p></footer></body></html>").encode("utf-8")
+
+
+def heartbeat(stop: threading.Event, lags: list, interval: float = 0.01):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        time.sleep(interval)
+        lags.append(time.perf_counter() - expected)
+
+
+def measure(pages, parse):
+    stop, lags = threading.Event(), []
+    ticker = threading.Thread(target=heartbeat, args=(stop, lags))
+    ticker.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(parse, pages))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    ticker.join()
+    return len(pages) / elapsed, max(lags) * 1000
+
+
+if __name__ == "__main__":
+    pages = [make_page(i) for i in range(PAGES)]
+    pool = ParsePool()
+    try:
+        print(f"{PAGES} pages of {len(pages[0]) // 1024} KB, {THREADS} request threads, {os.cpu_count()} CPUs")
+        print(f"{'mode':<24} {'pages/s':>8} {'max lag ms':>11}")
+        for mode, parse in [("in-thread", extract_text),
+                            (f"parse pool ({pool.workers} workers)", lambda page: pool.run(extract_text, page))]:
+            throughput, lag = measure(pages, parse)
+            print(f"{mode:<24} {throughput:>8.1f} {lag:>11.1f}")
+    finally:
+        pool.shutdown()
@@ -0,0 +1,110 @@
+import argparse
+import gc
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+from core.azure_functions import AzureOpenAIFunctions
+from core.deployment_pool import AzureDeployment, DeploymentPool
+from core.history import HistoryCompactor
+from core.memory import profiler
+from core.speculation import Speculator, extract_urls
+from core.tool_cache import ToolCache
+from fakes.azure_openai import FakeAzureOpenAIServer
+from fakes.web import FakeWebServer
+from functions.page_cache import PageCache
+from functions.web_scraper import WebContentScraper
+
+# Sends N questions through the assistant against the local fakes (each one scraping a large page) and flags traced
+# memory that keeps growing once the caches are warm. Exits with status 1 when growth exceeds the threshold.
+# Run with: python -m benchmarks.memory_soak --requests 200
+
+
+def make_page(index: int) -> str:
+    return "".join(f"<p>Page {index}, paragraph {i}: " + "lorem ipsum dolor sit amet " * 20 + "</p>"
+                   for i in range(200))
+
+
+def scrape_call(body: dict):
+    """Makes the fake model call the scraper for the URL in the question."""
+    question = body["messages"][-1]["content"]
+    urls = extract_urls(question)
+    return ("webpage_scraper", urls[0]) if urls else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test the assistant against local fakes for memory growth.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of measured requests")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests made before the baseline is taken")
+    parser.add_argument("--pages", type=int, default=20, help="Number of distinct pages asked about")
+    parser.add_argument("--threshold", type=int, default=2048, help="Allowed growth per request, in bytes")
+    parser.add_argument("--top", type=int, default=10, help="Number of growing call sites to list")
+    args = parser.parse_args()
+
+    web = FakeWebServer({f"/article/{i}": make_page(i) for i in range(args.pages)}).start()
+    llm = FakeAzureOpenAIServer(function_call=scrape_call).start()
+    cache_dir = tempfile.TemporaryDirectory()
+    scraper = WebContentScraper(page_cache=PageCache(os.path.join(cache_dir.name, "pages.sqlite3"), fresh_for=0))
+
+    def webpage_scraper(url: str) -> dict:
+        """Scrapes a web page.
+
+        :param url: The URL of the page.
+        """
+        return scraper.scrape_website(url)
+
+    assistant = AzureOpenAIFunctions(
+        azure_openai_endpoint=llm.endpoint,
+        azure_openai_key_key="fake",
+        azure_api_version="2023-07-01-preview",
+        model="fake",
+        functions=[webpage_scraper],
+        deployment_pool=DeploymentPool([AzureDeployment(llm.endpoint, "fake", "2023-07-01-preview", "fake")]),
+        tool_cache=ToolCache(ttl=0),
+        system_prompt="You are a soak test.",
+        speculator=Speculator({"webpage_scraper": extract_urls}),
+        history_compactor=HistoryCompactor(),
+    )
+
+    def ask(index: int):
+        url = web.url(f"/article/{index % args.pages}")
+        assistant.ask([{"role": "user", "content": f"Summarize {url} in {index % 5 + 1} sentences."}],
+                      conversation_id=f"soak-{index}")
+
+    profiler.start()
+    try:
+        for i in range(args.warmup):
+            ask(i)
+        gc.collect()
+        profiler.reset()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for i in range(args.warmup, args.warmup + args.requests):
+            ask(i)
+        gc.collect()
+        stats = profiler.stats(limit=args.top, group_by="lineno")
+    finally:
+        profiler.stop()
+        llm.stop()
+        web.stop()
+        cache_dir.cleanup()
+
+    growth = stats["traced_bytes"] - baseline
+    per_request = growth / args.requests
+    print(f"{args.requests} requests after {args.warmup} warm-up requests")
+    print(f"traced memory growth: {growth / 1024:.1f} KB ({per_request:.0f} bytes per request), "
+          f"peak {stats['peak_bytes'] / 1024 / 1024:.1f} MB, "
+          f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    print(f"\n{'span':<26} {'calls':>6} {'avg retained':>13} {'high water':>11}")
+    for span in stats["spans"]:
+        print(f"{span['label']:<26} {span['calls']:>6} {span['avg_retained_bytes']:>13} "
+              f"{span['high_water_bytes']:>11}")
+    print("\nTop growing call sites:")
+    for site in stats["top"]:
+        print(f"{site['size_diff_bytes']:>+10} B {site['count_diff']:>+6} blocks  {site['traceback'][0]}")
+
+    if per_request > args.threshold:
+        print(f"\nFAIL: memory grows by {per_request:.0f} bytes per request (threshold {args.threshold})")
+        sys.exit(1)
+    print("\nOK: no growth above the threshold")
@@ -0,0 +1,77 @@
+import json
+
+from core.result_encoding import encode_result
+from core.tokens import estimate_tokens
+from functions import argocd, weather, web_browsing
+
+# Compares the tokens a tool result takes as str(result) with its compact encoding, per tool.
+# Run with: python -m benchmarks.result_encoding
+
+WEATHER = {
+    "coord": {"lon": 13.4105, "lat": 52.5244},
+    "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}],
+    "base": "stations",
+    "main": {"temp": 7.31, "feels_like": 4.28, "temp_min": 6.09, "temp_max": 8.35, "pressure": 1009,
+             "humidity": 87},
+    "visibility": 10000,
+    "wind": {"speed": 5.14, "deg": 240, "gust": 9.26},
+    "rain": {"1h": 0.21},
+    "clouds": {"all": 75},
+    "dt": 1700564400,
+    "sys": {"type": 2, "id": 2011538, "country": "DE", "sunrise": 1700548363, "sunset": 1700578868},
+    "timezone": 3600,
+    "id": 2950159,
+    "name": "Berlin",
+    "cod": 200,
+}
+
+APPLICATIONS = {"applications": ["guestbook", "payments-api", "payments-worker", "frontend", "redis", "monitoring"]}
+
+APPLICATION_STATUS = {"health_status": "Degraded", "sync_status": "OutOfSync", "error": None}
+
+IMAGES = [
+    {"image": f"https://images.example.com/puppies/{i}.jpg", "thumbnail": f"https://tse.example.com/th?id={i}"}
+    for i in range(5)
+]
+
+VIDEOS = [
+    {"title": f"Excel Pivot Tables Tutorial part {i}", "content": f"https://www.youtube.com/watch?v=abc{i}"}
+    for i in range(5)
+]
+
+MAPS = [
+    {"title": f"Trattoria {name}", "address": f"{name}straße {i}, 80331 München", "phone": "+49 89 123456",
+     "url": f"https://trattoria-{name.lower()}.de", "operating_hours": {"monday": "11:00–22:00", "tuesday": "11:00–22:00"}}
+    for i, name in enumerate(["Roma", "Napoli", "Milano"])
+]
+
+SCRAPED = json.dumps([
+    {"url": "https://www.bbc.com/news/technology-67514068",
+     "content": "Sam Altman has returned as chief executive of OpenAI.\nThe board that fired him was replaced."},
+    {"url": "https://www.theverge.com/openai", "error": "Failed to fetch page content"},
+], indent=2)
+
+PAGE = {"url": "https://www.bbc.com/news/world-us-canada-67482231",
+        "content": "A paragraph of the article.\nAnother paragraph of the article."}
+
+CASES = [
+    (weather.get_weather, WEATHER),
+    (argocd.get_available_applications, APPLICATIONS),
+    (argocd.get_application_status, APPLICATION_STATUS),
+    (web_browsing.images_search, IMAGES),
+    (web_browsing.videos_search, VIDEOS),
+    (web_browsing.maps_search, MAPS),
+    (web_browsing.news_search, SCRAPED),
+    (web_browsing.webpage_scraper, PAGE),
+]
+
+if __name__ == "__main__":
+    total_before = total_after = 0
+    print(f"{'tool':<28} {'str()':>7} {'encoded':>8} {'saved':>7}")
+    for func, result in CASES:
+        before = estimate_tokens(str(result))
+        after = estimate_tokens(encode_result(func, result))
+        total_before += before
+        total_after += after
+        print(f"{func.__name__:<28} {before:>7} {after:>8} {1 - after / before:>7.0%}")
+    print(f"{'total':<28} {total_before:>7} {total_after:>8} {1 - total_after / total_before:>7.0%}")
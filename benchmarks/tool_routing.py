@@ -0,0 +1,40 @@
+from core.tool_router import ToolRouter
+from main import functions, tool_keywords
+
+# Measures how many prompt tokens the tool router saves per round on the sample questions from main.py.
+# Run with: python -m benchmarks.tool_routing
+
+QUESTIONS = [
+    "Is Sam Altman fired from OpenAI?",
+    "What happened to HSBC bank in UK?",
+    "Who is Frank Gotthard?",
+    "Provide video tutorial for Excel pivot table.",
+    "Suggestions for the top 3 Italian restaurant in Munich.",
+    "Provide 10 images of cats.",
+    "Show me pictures of the Eiffel Tower at night.",
+    "What is the weather in Berlin today?",
+    "Is there any possibility of rain in Berlin today?",
+    "Summarize the article in 3 sentences https://www.bbc.com/news/world-us-canada-67482231",
+    "How many argocd applications are available? And what are their status?",
+]
+
+if __name__ == "__main__":
+    # The registry's proxies carry the manifest schemas the assistant sends; parsing the proxies would not work
+    schemas = [func.schema for func in functions]
+    router = ToolRouter(keywords=tool_keywords).build(schemas)
+    full_tokens = router.payload_tokens(schemas)
+
+    total_routed = 0
+    print(f"{'question':<60} {'tokens':>7} {'saved':>7}  selected")
+    for question in QUESTIONS:
+        selected = router.select([{"role": "user", "content": question}])
+        routed_tokens = router.payload_tokens(selected)
+        total_routed += routed_tokens
+        saved = 1 - routed_tokens / full_tokens
+        names = ", ".join(schema["name"] for schema in selected) if len(selected) < len(schemas) else "(all)"
+        print(f"{question[:60]:<60} {routed_tokens:>7} {saved:>7.0%}  {names}")
+
+    total_full = full_tokens * len(QUESTIONS)
+    print(f"\nFull schema set: {full_tokens} tokens per round")
+    print(f"Routed: {total_routed} vs {total_full} tokens over {len(QUESTIONS)} rounds "
+          f"({1 - total_routed / total_full:.0%} saved)")
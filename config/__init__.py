@@ -11,3 +11,37 @@ argocd_url = os.getenv('ARGOCD_URL')
 argocd_api_key = os.getenv("ARGOCD_API_KEY")
 serpapi_key = os.getenv("SERPAPI_KEY")
 openweathermap_key = os.getenv("OPENWEATHERMAP_KEY")
+# JSON list of {"endpoint", "key", "deployment", "region", "api_version"} objects for multi-deployment routing
+azure_openai_deployments = os.getenv('AZURE_OPENAI_DEPLOYMENTS')
+azure_openai_hedge_final_answer = os.getenv('AZURE_OPENAI_HEDGE_FINAL_ANSWER', 'false').lower() == 'true'
+tool_cache_ttl = float(os.getenv('TOOL_CACHE_TTL', '300'))
+batch_concurrency = int(os.getenv('BATCH_CONCURRENCY', '8'))
+tool_routing_enabled = os.getenv('TOOL_ROUTING', 'true').lower() == 'true'
+# Web search across providers: "hedge" (default), "race" or "merge"
+search_mode = os.getenv('SEARCH_MODE', 'hedge')
+search_hedge_delay = float(os.getenv('SEARCH_HEDGE_DELAY', '1.5'))
+# Persistent page cache for scraped pages; set PAGE_CACHE_PATH to an empty value to disable it
+page_cache_path = os.getenv('PAGE_CACHE_PATH', '.page_cache/pages.sqlite3')
+page_cache_max_mb = int(os.getenv('PAGE_CACHE_MAX_MB', '256'))
+page_cache_fresh_for = float(os.getenv('PAGE_CACHE_FRESH_FOR', '300'))
+speculative_tools_enabled = os.getenv('SPECULATIVE_TOOLS', 'true').lower() == 'true'
+# Conversations above this many (estimated) tokens are compacted into a rolling summary; 0 disables compaction
+history_max_tokens = int(os.getenv('HISTORY_MAX_TOKENS', '6000'))
+history_keep_recent = int(os.getenv('HISTORY_KEEP_RECENT', '6'))
+# Worker processes for HTML parsing and deduplication of scraped pages; 0 parses in the request thread
+parse_workers = int(os.getenv('PARSE_WORKERS', '0'))
+parse_max_pending = int(os.getenv('PARSE_MAX_PENDING', '0'))
+# Deadline in seconds for each tool call; TOOL_TIMEOUTS is a JSON object overriding it per tool
+tool_timeout = float(os.getenv('TOOL_TIMEOUT', '30'))
+tool_timeouts = os.getenv('TOOL_TIMEOUTS')
+# Traces allocations per request for the /debug/memory endpoint; slows the service down, enable only to debug
+memory_profiling = os.getenv('MEMORY_PROFILING', 'false').lower() == 'true'
+memory_profiling_frames = int(os.getenv('MEMORY_PROFILING_FRAMES', '10'))
+# Stream completions that may call a function and start the tool as soon as its arguments are complete
+stream_function_calls = os.getenv('STREAM_FUNCTION_CALLS', 'false').lower() == 'true'
+# JSON object overriding provider quotas, e.g. {"serpapi": {"per_minute": 10, "per_month": 100}}; null removes a limit
+provider_quotas = os.getenv('PROVIDER_QUOTAS')
+# Comma-separated integrations whose tools are offered (argocd, weather, web and installed plugins); empty offers all
+tool_integrations = os.getenv('TOOL_INTEGRATIONS', '')
+# Cached tool schemas, so tool modules are only imported when first called; set it to an empty value to disable it
+tool_manifest_path = os.getenv('TOOL_MANIFEST_PATH', '.tool_manifest.json')
@@ -1,10 +1,20 @@
+import contextvars
 import json
 import logging
-from typing import Optional, Callable, List, Dict
-
-from openai import AzureOpenAI
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Callable, List, Dict, Tuple
 
+from core.deployment_pool import AzureDeployment, DeploymentPool
+from core.history import HistoryCompactor
+from core.memory import track
 from core.parser import FunctionDefinitionParser
+from core.prompt_layout import PromptLayout, PromptCacheStats
+from core.result_encoding import encode_result
+from core.speculation import Speculator, SpeculativeCalls
+from core.streaming import OnFunctionCall, collect_stream
+from core.tool_cache import ToolCache, is_error_result
+from core.tool_executor import ToolError, ToolExecutor
+from core.tool_router import ToolRouter
 
 # Configure logger for better debugging and monitoring
 logger = logging.getLogger(__name__)
@@ -17,27 +27,55 @@ class AzureOpenAIFunctions:
             azure_openai_key_key: str,
             azure_api_version: str,
             model: str,
-            functions: Optional[List[Callable]] = None
+            functions: Optional[List[Callable]] = None,
+            deployment_pool: Optional[DeploymentPool] = None,
+            hedge_final_answer: bool = False,
+            tool_cache: Optional[ToolCache] = None,
+            tool_router: Optional[ToolRouter] = None,
+            system_prompt: Optional[str] = None,
+            speculator: Optional[Speculator] = None,
+            history_compactor: Optional[HistoryCompactor] = None,
+            tool_executor: Optional[ToolExecutor] = None,
+            stream_function_calls: bool = False
     ):
         self.azure_openai_endpoint = azure_openai_endpoint
         self.azure_openai_key_key = azure_openai_key_key
         self.azure_api_version = azure_api_version
         self.model = model
-        self.client = AzureOpenAI(
-            azure_endpoint=self.azure_openai_endpoint,
-            api_key=self.azure_openai_key_key,
-            api_version=self.azure_api_version,
-        )
+        self.deployment_pool = deployment_pool or DeploymentPool([
+            AzureDeployment(
+                azure_openai_endpoint=self.azure_openai_endpoint,
+                azure_openai_key_key=self.azure_openai_key_key,
+                azure_api_version=self.azure_api_version,
+                model=self.model,
+            )
+        ])
+        self.hedge_final_answer = hedge_final_answer
+        self.tool_cache = tool_cache
         self.function_parser = FunctionDefinitionParser()  # Initialize the parser first
         self.functions = self._parse_functions(functions)  # Then use it in _parse_functions
         self.func_mapping = self._create_func_mapping(functions)
-        self.internal_thoughts = []
+        self.tool_router = tool_router.build(self.functions) if tool_router and self.functions else None
+        self.prompt_layout = PromptLayout(system_prompt)
+        self.prompt_cache_stats = PromptCacheStats()
+        self.speculator = speculator
+        self.history_compactor = history_compactor
+        self.tool_executor = tool_executor or ToolExecutor()
+        self.stream_function_calls = stream_function_calls
+        # Runs tools whose arguments completed while the rest of the completion is still streaming
+        self._dispatch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dispatch") \
+            if stream_function_calls else None
 
     def _parse_functions(self, functions: Optional[List[Callable]]) -> Optional[List[Dict]]:
-        """Converts the 'python functions' list into a JSON-serializable list."""
+        """Converts the 'python functions' list into a JSON-serializable list.
+
+        Functions that carry their schema (e.g. the ``LazyTool`` proxies of the tool registry) are not parsed, so
+        they are not imported before they are called.
+        """
         if functions is None:
             return None
-        return [self.function_parser.convert_function_to_json_schema(func) for func in functions]
+        return [getattr(func, "schema", None) or self.function_parser.convert_function_to_json_schema(func)
+                for func in functions]
 
     def _create_func_mapping(self, functions: Optional[List[Callable]]) -> Dict[str, Callable]:
         """Creates a mapping between the function names and function definitions."""
@@ -45,89 +83,206 @@ class AzureOpenAIFunctions:
             return {}
         return {func.__name__: func for func in functions}
 
-    def _create_chat_completion(self, messages: List[Dict], use_functions: bool = True):
-        """Calls the OpenAI API to create a chat completion, using the functions if specified."""
+    def _select_functions(self, chat_history: List[Dict]) -> Optional[List[Dict]]:
+        """Selects the function schemas sent with each round, using the tool router if one is configured."""
+        if self.tool_router is None:
+            return self.functions
+        return self.tool_router.select(chat_history)
+
+    def _create_chat_completion(
+            self,
+            messages: List[Dict],
+            use_functions: bool = True,
+            hedge: bool = False,
+            functions: Optional[List[Dict]] = None,
+            on_function_call: Optional[OnFunctionCall] = None
+    ):
+        """Calls the OpenAI API to create a chat completion, using the functions if specified.
+
+        With stream_function_calls, completions offering functions are streamed, and on_function_call is called as
+        soon as the function call's arguments are complete.
+        """
         try:
-            logger.debug(f"Creating chat completion with messages: {messages} and use_functions: {use_functions}")
-            if use_functions and self.functions:
-                return self.client.chat.completions.create(
-                    model=self.model,
+            # Lazy formatting: these messages and responses can be large, and most of the time debug is off
+            logger.debug("Creating chat completion with messages: %s and use_functions: %s", messages, use_functions)
+            functions = self.prompt_layout.functions_payload(functions or self.functions) if use_functions else None
+            if functions and self.stream_function_calls:
+                stream = self.deployment_pool.create_chat_completion(
                     messages=messages,
                     temperature=0,
-                    functions=self.functions
+                    functions=functions,
+                    stream=True
+                )
+                response = collect_stream(stream, on_function_call)
+            elif functions:
+                response = self.deployment_pool.create_chat_completion(
+                    messages=messages,
+                    temperature=0,
+                    functions=functions
                 )
             else:
-                return self.client.chat.completions.create(
-                    model=self.model,
+                response = self.deployment_pool.create_chat_completion(
+                    hedge=hedge,
                     temperature=0,
                     messages=messages
                 )
+            self.prompt_cache_stats.record(self.prompt_layout.fingerprint(functions), getattr(response, "usage", None))
+            return response
         except Exception as e:
-            logger.error(f"Error in creating chat completion with messages: {messages}, error: {e}", exc_info=True)
+            logger.error("Error in creating chat completion with %d messages: %s", len(messages), e, exc_info=True)
             raise
 
-    def _generate_response(self, chat_history: List[Dict]):
+    def _generate_response(self, chat_history: List[Dict], internal_thoughts: List[Dict]):
         """Generates a response from the OpenAI API."""
+        speculation = None
         try:
-            logger.debug(f"Generating response with chat_history: {chat_history}")
+            logger.debug("Generating response with chat_history: %s", chat_history)
+            # The subset is chosen once per question so every round sends the same schemas
+            functions = self._select_functions(chat_history)
+            speculation = self._start_speculation(chat_history, functions)
             while True:
-                response = self._create_chat_completion(chat_history + self.internal_thoughts)
+                thoughts = self._trim_thoughts(chat_history, internal_thoughts)
+                started = {}
+                response = self._create_chat_completion(
+                    chat_history + thoughts,
+                    functions=functions,
+                    on_function_call=self._dispatcher(speculation, started) if self.stream_function_calls else None
+                )
                 finish_reason = response.choices[0].finish_reason
 
-                if finish_reason == 'stop' or len(self.internal_thoughts) > 3:
-                    final_thought = self._final_thought_answer()
+                if finish_reason == 'stop' or len(internal_thoughts) > 3:
+                    final_thought = self._final_thought_answer(self._trim_thoughts(chat_history, internal_thoughts))
                     final_res = self._create_chat_completion(
                         chat_history + [final_thought],
-                        use_functions=False
+                        use_functions=False,
+                        hedge=self.hedge_final_answer
                     )
                     return final_res
                 elif finish_reason == 'function_call':
-                    self._handle_function_call(response)
+                    self._handle_function_call(response, internal_thoughts, speculation, started)
                 else:
                     raise ValueError(f"Unexpected finish reason: {finish_reason}")
         except Exception as e:
-            logger.error(f"Error in generating response with chat_history: {chat_history}, error: {e}", exc_info=True)
+            logger.error("Error in generating response with %d messages in the history: %s", len(chat_history), e,
+                         exc_info=True)
             raise
+        finally:
+            if speculation is not None:
+                speculation.finish()
+
+    def _trim_thoughts(self, chat_history: List[Dict], internal_thoughts: List[Dict]) -> List[Dict]:
+        """Cuts older function results if they would push the prompt over the history budget."""
+        if self.history_compactor is None:
+            return internal_thoughts
+        return self.history_compactor.trim_tool_outputs(chat_history, internal_thoughts)
+
+    def _summarize_history(self, summary: Optional[str], messages: List[Dict]) -> str:
+        """Folds older conversation messages into the rolling summary of the conversation."""
+        transcript = "\n".join(f"{message['role']}: {message.get('content') or ''}" for message in messages)
+        response = self._create_chat_completion([
+            {'role': 'system',
+             'content': "You maintain a running summary of a conversation between a user and an AI assistant. "
+                        "Update the summary with the new messages. Keep facts, names, numbers, URLs, decisions "
+                        "and open questions; drop pleasantries. Answer with the updated summary only."},
+            {'role': 'user',
+             'content': f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"}
+        ], use_functions=False)
+        return response.choices[0].message.content
+
+    def _start_speculation(self, chat_history: List[Dict], functions: Optional[List[Dict]]) \
+            -> Optional[SpeculativeCalls]:
+        """Starts the tool calls the model is very likely to make, in parallel with the first completion."""
+        if self.speculator is None or not functions:
+            return None
+        available = [schema["name"] for schema in functions if schema.get("name") in self.func_mapping]
+        return self.speculator.start(chat_history, self._call_function, available)
+
+    def _dispatcher(self, speculation: Optional[SpeculativeCalls],
+                    started: Dict[Tuple[str, str], Future]) -> OnFunctionCall:
+        """Returns a callback that starts a streamed function call as soon as its arguments are complete."""
+        def dispatch(func_name: str, arguments: str):
+            try:
+                args = json.loads(arguments)
+            except ValueError:
+                return  # Reported to the model once the completion has been received
+            logger.debug("Starting '%s' while the completion is still streaming", func_name)
+            started[(func_name, arguments)] = self._dispatch_executor.submit(
+                contextvars.copy_context().run, self._prefetched_or_call, func_name, args, speculation
+            )
+        return dispatch
 
-    def _handle_function_call(self, response):
-        """Handles when a function is called within the chat."""
+    def _handle_function_call(self, response, internal_thoughts: List[Dict],
+                              speculation: Optional[SpeculativeCalls] = None,
+                              started: Optional[Dict[Tuple[str, str], Future]] = None):
+        """Handles when a function is called within the chat.
+
+        Tool failures and timeouts do not abort the conversation: they are sent to the model as an error result.
+        A call already started while the completion was streaming is awaited instead of being made again.
+        """
         try:
-            logger.debug(f"Handling function call with response: {response}")
+            logger.debug("Handling function call with response: %s", response)
             choice = response.choices[0]
             function_call = choice.message.function_call
             func_name = function_call.name
             args = function_call.arguments  # This should be already in dictionary format or JSON string
+            early = (started or {}).get((func_name, args)) if isinstance(args, str) else None
 
-            # Ensure args is a dictionary
-            if isinstance(args, str):
-                args = json.loads(args)
-
-            result = self._call_function(func_name, args)
-            res_msg = {'role': 'function', 'name': func_name, 'content': str(result)}
-            self.internal_thoughts.append(res_msg)
+            if early is not None:
+                result = early.result()
+            else:
+                # Ensure args is a dictionary
+                try:
+                    if isinstance(args, str):
+                        args = json.loads(args)
+                except ValueError as e:
+                    result = ToolError(func_name, f"The arguments are not valid JSON: {e}")
+                else:
+                    result = self._prefetched_or_call(func_name, args, speculation)
+            if isinstance(result, ToolError):
+                content = json.dumps(result.to_dict())
+            else:
+                content = encode_result(self.func_mapping.get(func_name), result)
+            internal_thoughts.append({'role': 'function', 'name': func_name, 'content': content})
         except Exception as e:
-            logger.error(f"Error in handling function call with response: {response}, error: {e}", exc_info=True)
+            logger.error("Error in handling function call of response %s: %s", getattr(response, "id", None), e,
+                         exc_info=True)
             raise
 
+    def _prefetched_or_call(self, func_name: str, args: Dict, speculation: Optional[SpeculativeCalls]):
+        """
+        Returns the result of a matching speculative call, or makes the call. A prefetch that failed, including one
+        that returned an error result (e.g. because quota was denied to it), is retried as a regular call.
+        """
+        prefetched = speculation.take(func_name, args) if speculation is not None else None
+        if prefetched is not None:
+            if prefetched.exception() is None and not isinstance(prefetched.result(), ToolError) \
+                    and not is_error_result(prefetched.result()):
+                self.speculator.record("used")
+                logger.debug("Using prefetched result for '%s'", func_name)
+                return prefetched.result()
+            self.speculator.record("failed")
+        return self._call_function(func_name, args)
+
     def _call_function(self, func_name: str, args: Dict):
-        """Calls the actual function when invoked in _handle_function_call."""
-        try:
-            logger.debug(f"Calling function '{func_name}' with arguments: {args}")
-            func = self.func_mapping.get(func_name)
-            if func:
-                result = func(**args)
-                logger.debug(f"Function '{func_name}' returned: {result}")
-                return result
-            else:
-                raise ValueError(f"Function {func_name} not implemented")
-        except Exception as e:
-            logger.error(f"Error in calling function {func_name} with arguments: {args}, error: {e}", exc_info=True)
-            raise
+        """Calls the actual function within its deadline; returns a ToolError if it is unknown, fails or times out."""
+        logger.debug("Calling function '%s' with arguments: %s", func_name, args)
+        func = self.func_mapping.get(func_name)
+        if func is None:
+            logger.error(f"Function {func_name} not implemented")
+            return ToolError(func_name, f"Function {func_name} not implemented")
+        if self.tool_cache is not None:
+            result = self.tool_executor.run(
+                func_name, lambda **kwargs: self.tool_cache.get_or_call(func_name, kwargs, func), args
+            )
+        else:
+            result = self.tool_executor.run(func_name, func, args)
+        logger.debug("Function '%s' returned: %s", func_name, result)
+        return result
 
-    def _final_thought_answer(self) -> Dict[str, str]:
+    def _final_thought_answer(self, internal_thoughts: List[Dict]) -> Dict[str, str]:
         """Creates the final thought answer."""
         thoughts = "To answer user queries I will use following information as context. ---CONTEXT START---\n\n"
-        for thought in self.internal_thoughts:
+        for thought in internal_thoughts:
             if 'function_call' in thought.keys():
                 thoughts += (f"I will use the {thought['function_call']['name']} "
                              "function to calculate the answer with arguments "
@@ -143,9 +298,17 @@ class AzureOpenAIFunctions:
         }
         return final_thought
 
-    def ask(self, messages: List[Dict]):
-        """Asks a question to the OpenAI API. The main method to interact with the OpenAI GPT-4 model."""
-        self.internal_thoughts = []
-        chat_history = messages
-        response = self._generate_response(chat_history)
+    @track("assistant.ask")
+    def ask(self, messages: List[Dict], conversation_id: Optional[str] = None):
+        """Asks a question to the OpenAI API. The main method to interact with the OpenAI GPT-4 model.
+
+        The function results gathered while answering are kept per call, so a single instance can serve several
+        conversations concurrently. With a history compactor, long conversations are compacted first; passing a
+        conversation_id lets its rolling summary be reused across turns.
+        """
+        internal_thoughts = []
+        chat_history = self.prompt_layout.build_messages(messages)
+        if self.history_compactor is not None:
+            chat_history = self.history_compactor.compact(conversation_id, chat_history, self._summarize_history)
+        response = self._generate_response(chat_history, internal_thoughts)
         return response
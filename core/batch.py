@@ -0,0 +1,106 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, Iterator
+
+from core.azure_functions import AzureOpenAIFunctions
+from core.quota import BATCH, priority
+
+logger = logging.getLogger(__name__)
+
+
+def parse_batch_line(line: str, index: int) -> Dict:
+    """
+    Parses one JSONL line into a batch item with an ``id`` and a ``conversation``.
+
+    A line is either ``{"id": ..., "conversation": [{"role": ..., "content": ...}, ...]}`` or a single prompt given
+    as ``prompt``, ``content`` or ``body``. Lines without an ``id`` use ``request_id`` or their line number.
+
+    :param line: The raw JSONL line.
+    :param index: The zero-based line number, used as a fallback id.
+    :return: A dictionary with the item id and its conversation.
+    """
+    data = json.loads(line)
+    item_id = data.get("id", data.get("request_id", index))
+    conversation = data.get("conversation")
+    if conversation is None:
+        prompt = data.get("prompt") or data.get("content") or data.get("body")
+        if not prompt:
+            raise ValueError(f"Batch item {item_id} has neither a conversation nor a prompt")
+        conversation = [{"role": "user", "content": prompt}]
+    return {"id": item_id, "conversation": conversation}
+
+
+def read_batch_lines(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yields batch items from JSONL lines, skipping blank lines and reporting malformed ones as errors."""
+    for index, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            yield parse_batch_line(line, index)
+        except (ValueError, TypeError, AttributeError) as e:
+            yield {"id": index, "error": f"Invalid batch item: {e}"}
+
+
+class BatchRunner:
+    """
+    Runs many independent conversations through one assistant concurrently.
+
+    At most ``concurrency`` conversations are in flight at any time; items are read lazily from the input so very
+    large batches are not loaded into memory up front. Results are yielded in completion order, each with its own
+    timing, and a failing item is reported without stopping the rest of the batch.
+    """
+
+    def __init__(self, assistant: AzureOpenAIFunctions, concurrency: int = 8):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.assistant = assistant
+        self.concurrency = concurrency
+
+    def _run_item(self, item: Dict, batch_start: float) -> Dict:
+        started = time.monotonic()
+        result = {"id": item["id"], "started_at": round(started - batch_start, 4)}
+        if "error" in item:
+            result.update({"status": "error", "error": item["error"], "duration": 0.0})
+            return result
+        try:
+            # Interactive questions get provider quota first
+            with priority(BATCH):
+                response = self.assistant.ask(item["conversation"])
+            result.update({"status": "ok", "reply": response.choices[0].message.content})
+        except Exception as e:
+            logger.error(f"Batch item {item['id']} failed: {e}", exc_info=True)
+            result.update({"status": "error", "error": str(e)})
+        result["duration"] = round(time.monotonic() - started, 4)
+        return result
+
+    def run(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Runs the batch and yields one result per item as soon as it completes.
+
+        :param items: Batch items as produced by ``read_batch_lines``.
+        :return: An iterator of result dictionaries with ``id``, ``status``, ``reply`` or ``error`` and timings.
+        """
+        batch_start = time.monotonic()
+        items = iter(items)
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.concurrency:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(self._run_item, item, batch_start))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def run_jsonl(self, lines: Iterable[str]) -> Iterator[str]:
+        """Runs a batch given as JSONL lines and yields JSONL result lines."""
+        for result in self.run(read_batch_lines(lines)):
+            yield json.dumps(result) + "\n"
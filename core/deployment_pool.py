@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict
+
+import openai
+from openai import AzureOpenAI
+
+import config
+from core.rolling_stats import RollingStats
+
+logger = logging.getLogger(__name__)
+
+
+class AzureDeployment(RollingStats):
+    """
+    A single Azure OpenAI deployment (endpoint + key + deployment name) together with its rolling health statistics.
+    """
+
+    def __init__(
+            self,
+            azure_openai_endpoint: str,
+            azure_openai_key_key: str,
+            azure_api_version: str,
+            model: str,
+            region: Optional[str] = None,
+            window: int = 50
+    ):
+        self.azure_openai_endpoint = azure_openai_endpoint
+        self.azure_openai_key_key = azure_openai_key_key
+        self.azure_api_version = azure_api_version
+        self.model = model
+        self.region = region or azure_openai_endpoint
+        super().__init__(window)
+        # Retries are disabled on purpose: the pool fails over to another deployment instead.
+        self.client = AzureOpenAI(
+            azure_endpoint=self.azure_openai_endpoint,
+            api_key=self.azure_openai_key_key,
+            api_version=self.azure_api_version,
+            max_retries=0,
+        )
+
+    @property
+    def name(self) -> str:
+        return f"{self.region}/{self.model}"
+
+    def stats(self) -> Dict:
+        return dict(deployment=self.name, **super().stats())
+
+
+class DeploymentPool:
+    """
+    Routes chat completions across several Azure OpenAI deployments.
+
+    Every call goes to the healthiest, least-loaded deployment. Throttled (429) or unreachable deployments are put
+    on cooldown and the call fails over to the next candidate. Optionally, a call can be hedged: if the primary
+    deployment has not answered within its own p95 latency, the same request is sent to the runner-up and whichever
+    answers first wins.
+    """
+
+    # Errors that indicate a problem with the deployment rather than with the request itself.
+    FAILOVER_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+    def __init__(
+            self,
+            deployments: List[AzureDeployment],
+            throttle_cooldown: float = 10.0,
+            error_cooldown: float = 5.0,
+            min_hedge_delay: float = 0.25
+    ):
+        if not deployments:
+            raise ValueError("DeploymentPool requires at least one deployment")
+        self.deployments = deployments
+        self.throttle_cooldown = throttle_cooldown
+        self.error_cooldown = error_cooldown
+        self.min_hedge_delay = min_hedge_delay
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(deployments) + 4, thread_name_prefix="deployment")
+
+    @classmethod
+    def from_config(cls) -> "DeploymentPool":
+        """
+        Builds the pool from ``AZURE_OPENAI_DEPLOYMENTS`` (a JSON list of objects with ``endpoint``, ``key``,
+        ``deployment`` and optional ``region``/``api_version``), falling back to the single deployment configured
+        through ``AZURE_OPENAI_ENDPOINT``/``AZURE_OPENAI_KEY``/``AZURE_OPENAI_DEPLOYMENT_NAME``.
+        """
+        if config.azure_openai_deployments:
+            entries = json.loads(config.azure_openai_deployments)
+            deployments = [
+                AzureDeployment(
+                    azure_openai_endpoint=entry["endpoint"],
+                    azure_openai_key_key=entry["key"],
+                    azure_api_version=entry.get("api_version", config.azure_api_version),
+                    model=entry["deployment"],
+                    region=entry.get("region"),
+                )
+                for entry in entries
+            ]
+        else:
+            deployments = [
+                AzureDeployment(
+                    azure_openai_endpoint=config.azure_openai_endpoint,
+                    azure_openai_key_key=config.azure_openai_key_key,
+                    azure_api_version=config.azure_api_version,
+                    model=config.azure_openai_deployment_name,
+                )
+            ]
+        return cls(deployments)
+
+    def _ranked(self) -> List[AzureDeployment]:
+        """Deployments ordered by preference: available ones by score, then cooling-down ones by expiry."""
+        with self._lock:
+            available = sorted((d for d in self.deployments if d.is_available()), key=lambda d: d.score())
+            cooling = sorted((d for d in self.deployments if not d.is_available()), key=lambda d: d.cooldown_until)
+        return available + cooling
+
+    def _cooldown_for(self, error: Exception) -> float:
+        if isinstance(error, openai.RateLimitError):
+            retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+            try:
+                return float(retry_after) if retry_after else self.throttle_cooldown
+            except ValueError:
+                return self.throttle_cooldown
+        return self.error_cooldown
+
+    def _call(self, deployment: AzureDeployment, kwargs: Dict):
+        """Runs one completion against one deployment, recording latency and outcome."""
+        with self._lock:
+            deployment.in_flight += 1
+        start = time.monotonic()
+        try:
+            response = deployment.client.chat.completions.create(model=deployment.model, **kwargs)
+            deployment.record_success(time.monotonic() - start)
+            return response
+        except self.FAILOVER_ERRORS as e:
+            cooldown = self._cooldown_for(e)
+            deployment.record_failure(cooldown)
+            logger.warning(f"Deployment '{deployment.name}' failed ({type(e).__name__}), cooling down {cooldown}s")
+            raise
+        finally:
+            with self._lock:
+                deployment.in_flight -= 1
+
+    def _call_with_failover(self, candidates: List[AzureDeployment], kwargs: Dict):
+        last_error = None
+        for deployment in candidates:
+            try:
+                return self._call(deployment, kwargs)
+            except self.FAILOVER_ERRORS as e:
+                last_error = e
+        raise last_error
+
+    def _call_hedged(self, candidates: List[AzureDeployment], kwargs: Dict):
+        primary, secondary = candidates[0], candidates[1]
+        hedge_delay = max(self.min_hedge_delay, primary.latency_percentile(95))
+        first = self._executor.submit(self._call_with_failover, [primary] + candidates[2:], kwargs)
+        done, _ = wait([first], timeout=hedge_delay)
+        if done and first.exception() is None:
+            return first.result()
+
+        logger.info(f"Hedging request to '{secondary.name}' after {hedge_delay:.3f}s")
+        pending = {first, self._executor.submit(self._call_with_failover, [secondary], kwargs)}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def create_chat_completion(self, hedge: bool = False, **kwargs):
+        """
+        Creates a chat completion on the best available deployment.
+
+        :param hedge: Whether to hedge the request on a second deployment if the first one is slow.
+        :param kwargs: Arguments passed to ``chat.completions.create`` (``model`` is set per deployment).
+        :return: The chat completion response.
+        """
+        candidates = self._ranked()
+        if hedge and len(candidates) > 1:
+            return self._call_hedged(candidates, kwargs)
+        return self._call_with_failover(candidates, kwargs)
+
+    def stats(self) -> List[Dict]:
+        """Rolling statistics per deployment."""
+        return [deployment.stats() for deployment in self.deployments]
+
+
+if __name__ == "__main__":
+    from fakes.azure_openai import FakeAzureOpenAIServer
+
+    logging.basicConfig(level=logging.INFO)
+    servers = [
+        FakeAzureOpenAIServer("westeurope", latency=0.05).start(),
+        FakeAzureOpenAIServer("eastus", latency=0.4).start(),
+        FakeAzureOpenAIServer("swedencentral", fail_status=429).start(),
+    ]
+    pool = DeploymentPool([
+        AzureDeployment(server.endpoint, "fake-key", config.azure_api_version, "gpt-4", region=server.name)
+        for server in servers
+    ])
+    for i in range(20):
+        reply = pool.create_chat_completion(messages=[{"role": "user", "content": f"ping {i}"}], hedge=i % 2 == 0)
+        print(reply.choices[0].message.content)
+    print(json.dumps(pool.stats(), indent=2))
+    for server in servers:
+        server.stop()
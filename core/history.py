@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Summarizes messages into a rolling summary: (previous summary or None, messages to fold in) -> new summary
+Summarizer = Callable[[Optional[str], List[Dict]], str]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def message_tokens(messages: List[Dict]) -> int:
+    """Estimated prompt tokens of a list of messages."""
+    return sum(estimate_tokens(json.dumps(message, ensure_ascii=False)) for message in messages)
+
+
+def _digest(messages: List[Dict]) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class HistoryCompactor:
+    """
+    Keeps the prompt of long conversations under a token budget.
+
+    Recent messages are kept verbatim; older ones are folded into a rolling summary. The summary is cached per
+    conversation together with how many messages it covers, so each new turn only summarizes the messages that
+    dropped out of the recent window since the previous turn instead of re-summarizing the whole history.
+
+    :param max_prompt_tokens: The token budget for the conversation (system prompt and summary included).
+    :param keep_recent: Number of most recent messages always kept verbatim, budget permitting.
+    :param tool_output_tokens: Older function results are cut to this many tokens when over budget.
+    :param max_conversations: Number of conversation summaries kept in memory.
+    """
+
+    def __init__(self, max_prompt_tokens: int = 6000, keep_recent: int = 6, tool_output_tokens: int = 500,
+                 max_conversations: int = 1000):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.keep_recent = keep_recent
+        self.tool_output_tokens = tool_output_tokens
+        self.max_conversations = max_conversations
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, conversation_id: Optional[str], older: List[Dict]) -> Tuple[int, Optional[str]]:
+        """Returns how many of the older messages the cached summary already covers, and the summary."""
+        if conversation_id is None:
+            return 0, None
+        with self._lock:
+            entry = self._summaries.get(conversation_id)
+            if entry is not None:
+                self._summaries.move_to_end(conversation_id)
+        if entry is None:
+            return 0, None
+        covered, digest, summary = entry
+        # The conversation must still start with the messages the summary was made from
+        if covered > len(older) or _digest(older[:covered]) != digest:
+            return 0, None
+        return covered, summary
+
+    def _store(self, conversation_id: Optional[str], older: List[Dict], summary: str):
+        if conversation_id is None:
+            return
+        with self._lock:
+            self._summaries[conversation_id] = (len(older), _digest(older), summary)
+            self._summaries.move_to_end(conversation_id)
+            while len(self._summaries) > self.max_conversations:
+                self._summaries.popitem(last=False)
+
+    def compact(self, conversation_id: Optional[str], messages: List[Dict], summarize: Summarizer) -> List[Dict]:
+        """
+        Compacts a conversation to fit the budget.
+
+        :param conversation_id: Identifies the conversation for summary caching (no caching if None).
+        :param messages: The conversation, optionally starting with system messages (the system prompt and the
+                         client's own instructions), which are always kept.
+        :param summarize: Folds messages into the rolling summary.
+        :return: The system messages, a summary message if needed, and the recent messages.
+        """
+        if message_tokens(messages) <= self.max_prompt_tokens:
+            return messages
+        leading = 0
+        while leading < len(messages) and messages[leading]["role"] == "system":
+            leading += 1
+        system, body = messages[:leading], messages[leading:]
+        if len(body) <= 1:
+            return messages
+
+        keep = max(1, min(self.keep_recent, len(body) - 1))
+        latest = (0, None)  # The summary made in this call, for conversations that are not cached
+        while True:
+            older, recent = body[:len(body) - keep], body[len(body) - keep:]
+            covered, summary = self._cached(conversation_id, older)
+            if covered < latest[0]:
+                covered, summary = latest
+            if covered < len(older):
+                logger.debug(f"Summarizing {len(older) - covered} messages of conversation {conversation_id}")
+                try:
+                    summary = summarize(summary, older[covered:])
+                    self._store(conversation_id, older, summary)
+                    latest = (len(older), summary)
+                except Exception as e:
+                    # Without a summary the older messages are simply dropped
+                    logger.error(f"Failed to summarize conversation {conversation_id}: {e}", exc_info=True)
+            summary_message = [{"role": "system", "content": SUMMARY_PREFIX + summary}] if summary else []
+            compacted = system + summary_message + recent
+            if keep <= 1 or message_tokens(compacted) <= self.max_prompt_tokens:
+                return compacted
+            keep -= 1
+
+    def trim_tool_outputs(self, messages: List[Dict], internal_thoughts: List[Dict]) -> List[Dict]:
+        """
+        Cuts older function results when the conversation plus the results exceed the budget.
+        The latest result is always kept in full.
+        """
+        budget = self.max_prompt_tokens - message_tokens(messages)
+        if message_tokens(internal_thoughts) <= budget:
+            return internal_thoughts
+        limit = self.tool_output_tokens * 4
+        trimmed = []
+        for index, thought in enumerate(internal_thoughts):
+            content = thought.get("content") or ""
+            if index < len(internal_thoughts) - 1 and thought.get("role") == "function" and len(content) > limit:
+                thought = dict(thought, content=content[:limit] + " [truncated]")
+            trimmed.append(thought)
+        return trimmed
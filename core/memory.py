@@ -0,0 +1,152 @@
+import contextlib
+import logging
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the profiler itself and the import machinery are not interesting
+IGNORED_FILES = ["<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>",
+                 "*/tracemalloc.py", "*/linecache.py"]
+
+
+class SpanStats:
+    """Memory accounting for one kind of span (e.g. every ``assistant.ask`` call)."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.calls = 0
+        self.retained = 0
+        self.max_retained = 0
+        self.high_water = 0
+
+    def stats(self) -> Dict:
+        return {
+            "label": self.label,
+            "calls": self.calls,
+            "retained_bytes": self.retained,
+            "avg_retained_bytes": self.retained // self.calls if self.calls else 0,
+            "max_retained_bytes": self.max_retained,
+            "high_water_bytes": self.high_water,
+        }
+
+
+class MemoryProfiler:
+    """
+    Opt-in memory accounting based on tracemalloc.
+
+    Code paths are wrapped in ``track(label)`` spans. For every span, the profiler records how much traced memory
+    it left behind (retained) and how far traced memory rose above its starting point while it ran (high-water
+    mark). Spans of concurrent requests overlap, so both figures are upper bounds when requests run in parallel.
+    ``top()`` compares the current allocations with a baseline snapshot and lists the call sites that grew most,
+    which points at what is being kept alive between requests.
+
+    Tracing slows every allocation down noticeably, so it is only enabled on demand.
+
+    :param frames: Number of stack frames stored per allocation (more frames give better call sites, cost more).
+    """
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._spans: Dict[str, SpanStats] = {}
+        self._active = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Starts tracing allocations and takes the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.warning(f"Memory profiling is enabled ({self.frames} frames per allocation)")
+        self.reset()
+
+    def stop(self):
+        tracemalloc.stop()
+        self._baseline = None
+
+    def reset(self):
+        """Takes a new baseline snapshot and clears the span statistics."""
+        self._baseline = self._snapshot()
+        with self._lock:
+            self._spans.clear()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in IGNORED_FILES]
+        )
+
+    @contextlib.contextmanager
+    def track(self, label: str):
+        """Accounts the memory retained and the high-water mark of the wrapped code under ``label``."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+        with self._lock:
+            if self._active == 0 and hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self._active += 1
+        start = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                self._active -= 1
+                span = self._spans.get(label)
+                if span is None:
+                    span = self._spans[label] = SpanStats(label)
+                span.calls += 1
+                span.retained += current - start
+                span.max_retained = max(span.max_retained, current - start)
+                span.high_water = max(span.high_water, peak - start)
+
+    def top(self, limit: int = 20, group_by: str = "traceback") -> List[Dict]:
+        """
+        The call sites whose allocations grew most since the baseline.
+
+        :param limit: Number of call sites to return.
+        :param group_by: "traceback" (full stacks), "lineno" or "filename".
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = self._snapshot()
+        baseline = self._baseline or snapshot
+        differences = snapshot.compare_to(baseline, group_by)
+        differences.sort(key=lambda difference: difference.size_diff, reverse=True)
+        return [
+            {
+                "size_diff_bytes": difference.size_diff,
+                "size_bytes": difference.size,
+                "count_diff": difference.count_diff,
+                "traceback": [f"{frame.filename}:{frame.lineno}" for frame in reversed(difference.traceback)],
+            }
+            for difference in differences[:limit]
+        ]
+
+    def stats(self, limit: int = 20, group_by: str = "traceback") -> Dict:
+        if not tracemalloc.is_tracing():
+            return {"enabled": False}
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            spans = [span.stats() for span in self._spans.values()]
+        return {
+            "enabled": True,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "spans": spans,
+            "top": self.top(limit, group_by),
+        }
+
+
+# The process-wide profiler; spans are free unless it has been started
+profiler = MemoryProfiler()
+
+
+def track(label: str):
+    """Wraps a code path in a memory accounting span of the process-wide profiler."""
+    return profiler.track(label)
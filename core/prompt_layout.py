@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_KEYS = ("role", "name", "content", "function_call")
+
+
+class PromptLayout:
+    """
+    Builds requests whose leading part is byte-identical across conversations, so upstream prompt caching applies.
+
+    The prefix is the function definitions followed by the system prompt. Function schemas are canonicalized
+    (sorted keys, registration order) and serialized once per distinct subset; the same payload objects are reused
+    for every request. Messages are normalized to a fixed key order without empty fields, so equal conversations
+    always produce equal request bodies.
+    """
+
+    def __init__(self, system_prompt: Optional[str] = None):
+        self.system_prompt = system_prompt.strip() if system_prompt else None
+        self._payloads: Dict[Tuple[str, ...], Tuple[List[Dict], str]] = {}
+        self._lock = threading.Lock()
+
+    def functions_payload(self, functions: Optional[List[Dict]]) -> Optional[List[Dict]]:
+        """Returns the canonical, cached payload for a list of function schemas."""
+        if not functions:
+            return None
+        return self._payload(functions)[0]
+
+    def _payload(self, functions: List[Dict]) -> Tuple[List[Dict], str]:
+        key = tuple(schema["name"] for schema in functions)
+        with self._lock:
+            cached = self._payloads.get(key)
+            if cached is None:
+                serialized = json.dumps(functions, sort_keys=True, separators=(",", ":"))
+                cached = (json.loads(serialized), serialized)
+                self._payloads[key] = cached
+        return cached
+
+    @staticmethod
+    def normalize_message(message: Dict) -> Dict:
+        """Returns the message with a fixed key order and without empty fields."""
+        return {key: message[key] for key in MESSAGE_KEYS if message.get(key) is not None}
+
+    def build_messages(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Normalizes a conversation and puts the canonical system prompt first.
+
+        A system message sent by the client is kept right after the canonical one, so the shared prefix stays the
+        same across conversations without losing the caller's instructions. It is only dropped when it merely
+        repeats the canonical system prompt.
+
+        :param messages: The conversation as sent by the client.
+        :return: The conversation laid out for the request.
+        """
+        messages = [self.normalize_message(message) for message in messages]
+        if self.system_prompt is None:
+            return messages
+        if messages and messages[0]["role"] == "system" and \
+                (messages[0].get("content") or "").strip() == self.system_prompt:
+            messages = messages[1:]
+        return [{"role": "system", "content": self.system_prompt}] + messages
+
+    def fingerprint(self, functions: Optional[List[Dict]]) -> str:
+        """A short hash identifying the shared prefix (function definitions + system prompt)."""
+        serialized = self._payload(functions)[1] if functions else ""
+        digest = hashlib.sha256(f"{serialized}\n{self.system_prompt or ''}".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+
+class PromptCacheStats:
+    """Aggregates prompt and cached-prompt token counts reported in the ``usage`` of completions, per prefix."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def cached_tokens(usage) -> int:
+        """Reads ``usage.prompt_tokens_details.cached_tokens`` whether it was parsed as an object or a dict."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is None and isinstance(usage, dict):
+            details = usage.get("prompt_tokens_details")
+        if details is None:
+            return 0
+        if isinstance(details, dict):
+            return details.get("cached_tokens") or 0
+        return getattr(details, "cached_tokens", 0) or 0
+
+    def record(self, fingerprint: str, usage):
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        cached_tokens = self.cached_tokens(usage)
+        with self._lock:
+            entry = self._prefixes.setdefault(fingerprint, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            entry["requests"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["cached_tokens"] += cached_tokens
+        logger.debug(f"Prefix {fingerprint}: {cached_tokens}/{prompt_tokens} prompt tokens served from cache")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            prefixes = {fingerprint: dict(entry) for fingerprint, entry in self._prefixes.items()}
+        prompt_tokens = sum(entry["prompt_tokens"] for entry in prefixes.values())
+        cached_tokens = sum(entry["cached_tokens"] for entry in prefixes.values())
+        return {
+            "requests": sum(entry["requests"] for entry in prefixes.values()),
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+            "prefixes": prefixes,
+        }
@@ -0,0 +1,240 @@
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import config
+from core.tool_executor import is_cancelled, time_left
+
+logger = logging.getLogger(__name__)
+
+# Call priorities: lower is served first when a provider's quota is scarce
+INTERACTIVE = 0
+BATCH = 1
+SPECULATIVE = 2
+
+# How long a call of each priority may wait for quota before falling back to the cache
+MAX_WAIT = {INTERACTIVE: 10.0, BATCH: 60.0, SPECULATIVE: 0.0}
+
+# Conservative defaults: SerpAPI's developer plan, OpenWeatherMap's free plan, and a pace DuckDuckGo tolerates
+DEFAULT_QUOTAS = {
+    "serpapi": {"per_minute": 30, "per_month": 5000},
+    "openweathermap": {"per_minute": 60, "per_month": 1000000},
+    "duckduckgo": {"per_minute": 20, "burst": 5},
+}
+
+_priority = contextvars.ContextVar("quota_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Runs the wrapped code (and the tool calls it makes) with the given quota priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class QuotaExceeded(Exception):
+    """Raised when a provider's quota is spent and no cached result can stand in for the call."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"The {provider} quota is exhausted, retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, and bursts of up to ``capacity`` calls."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, cost: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until ``cost`` tokens are available."""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+
+def _month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _seconds_to_next_month() -> float:
+    now = datetime.now(timezone.utc)
+    start = datetime(now.year + now.month // 12, now.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return (start - now).total_seconds()
+
+
+class ProviderQuota:
+    """
+    The quota of one provider: a per-minute token bucket and an optional monthly allowance.
+
+    :param name: The provider name.
+    :param per_minute: Calls allowed per minute on average.
+    :param burst: Calls allowed at once (defaults to ``per_minute``).
+    :param per_month: Calls allowed per calendar month (counted since the process started).
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: Optional[float] = None, per_month: Optional[int] = None):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_month = per_month
+        self.bucket = TokenBucket(per_minute / 60.0, burst or per_minute)
+        self.month = _month()
+        self.month_used = 0
+        self.waiters: List[tuple] = []
+        self.counts = {"granted": 0, "denied": 0, "served_stale": 0}
+
+    def month_remaining(self) -> Optional[int]:
+        if self.month != _month():
+            self.month, self.month_used = _month(), 0
+        return None if self.per_month is None else max(0, self.per_month - self.month_used)
+
+    def stats(self) -> Dict:
+        return dict(provider=self.name, per_minute=self.per_minute, available_now=int(self.bucket.available()),
+                    month_used=self.month_used, month_remaining=self.month_remaining(), waiting=len(self.waiters),
+                    **self.counts)
+
+
+class QuotaManager:
+    """
+    Coordinates the calls made to rate-limited third-party providers (SerpAPI, OpenWeatherMap, DuckDuckGo) across
+    all tools and conversations.
+
+    Each call takes a token from its provider's bucket. When tokens are scarce, waiting calls are served by
+    priority (interactive questions before batch items before speculative prefetches), each waiting at most
+    ``MAX_WAIT`` for its priority, and never past the deadline of the tool call it is made from. A call that gets no token, or whose provider's monthly allowance is spent, is
+    answered with the last result of the same call if there is one, however old, and raises ``QuotaExceeded``
+    otherwise. Providers without a quota are not limited.
+
+    :param quotas: The provider quotas.
+    :param stale_entries: Number of results kept per provider to serve when it is over budget.
+    """
+
+    def __init__(self, quotas: List[ProviderQuota], stale_entries: int = 256):
+        self._quotas = {quota.name: quota for quota in quotas}
+        self.stale_entries = stale_entries
+        self._stale: Dict[str, OrderedDict] = {quota.name: OrderedDict() for quota in quotas}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_config(cls) -> "QuotaManager":
+        """Builds the manager from the defaults, overridden per provider by the ``PROVIDER_QUOTAS`` JSON object."""
+        settings = dict(DEFAULT_QUOTAS, **(json.loads(config.provider_quotas) if config.provider_quotas else {}))
+        return cls([ProviderQuota(name, **limits) for name, limits in settings.items() if limits])
+
+    def acquire(self, provider: str, cost: int = 1) -> bool:
+        """
+        Takes ``cost`` tokens of the provider's quota, waiting for them according to the current priority and
+        the time left to the current tool call.
+
+        :return: Whether the call may be made; False once the tool call is cancelled.
+        """
+        quota = self._quotas.get(provider)
+        if quota is None:
+            return True
+        level = _priority.get()
+        max_wait = MAX_WAIT.get(level, 0.0)
+        deadline = time.monotonic() + (time_left(max_wait) if max_wait > 0 else 0.0)
+        with self._condition:
+            remaining = quota.month_remaining()
+            if remaining is not None and remaining < cost:
+                quota.counts["denied"] += 1
+                return False
+            entry = (level, next(self._sequence))
+            heapq.heappush(quota.waiters, entry)
+            try:
+                while True:
+                    if is_cancelled():
+                        quota.counts["denied"] += 1
+                        return False
+                    if quota.waiters[0] == entry and quota.bucket.try_take(cost):
+                        quota.month_used += cost
+                        quota.counts["granted"] += 1
+                        return True
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        quota.counts["denied"] += 1
+                        return False
+                    self._condition.wait(min(left, max(0.01, quota.bucket.wait_time(cost))))
+            finally:
+                quota.waiters.remove(entry)
+                heapq.heapify(quota.waiters)
+                self._condition.notify_all()
+
+    def call(self, provider: str, key: str, func: Callable[[], object], cost: int = 1):
+        """
+        Makes a call within the provider's quota, or answers it from the results of earlier identical calls.
+
+        :param provider: The provider the call goes to.
+        :param key: Identifies identical calls (e.g. the normalized query).
+        :param func: Makes the call.
+        :param cost: Quota units the call takes.
+        :return: The result of the call.
+        :raises QuotaExceeded: When the quota is spent and no earlier result exists.
+        """
+        quota = self._quotas.get(provider)
+        if self.acquire(provider, cost):
+            result = func()
+            if quota is not None:
+                with self._condition:
+                    stale = self._stale[provider]
+                    stale[key] = result
+                    stale.move_to_end(key)
+                    while len(stale) > self.stale_entries:
+                        stale.popitem(last=False)
+            return result
+
+        with self._condition:
+            stale = self._stale[provider]
+            if key in stale:
+                quota.counts["served_stale"] += 1
+                logger.info(f"The {provider} quota is spent, answering from an earlier result")
+                return stale[key]
+            month_spent = quota.month_remaining() is not None and quota.month_remaining() < cost
+            retry_after = _seconds_to_next_month() if month_spent else quota.bucket.wait_time(cost)
+        logger.warning(f"The {provider} quota is exhausted")
+        raise QuotaExceeded(provider, retry_after)
+
+    def remaining(self, provider: str) -> Dict:
+        """The current state of a provider's quota."""
+        with self._condition:
+            quota = self._quotas.get(provider)
+            return quota.stats() if quota is not None else {"provider": provider, "limited": False}
+
+    def stats(self) -> List[Dict]:
+        with self._condition:
+            return [quota.stats() for quota in self._quotas.values()]
+
+
+# The process-wide quota manager shared by all tools
+quotas = QuotaManager.from_config()
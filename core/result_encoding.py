@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import logging
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def minify_json(data: Any) -> str:
+    """Serializes data as JSON without whitespace or ASCII escaping."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project(data: Any, fields: List[str]) -> Any:
+    """
+    Keeps only the given fields of a result.
+
+    Fields are dotted paths (``main.temp``); a path crossing a list is applied to every element of it
+    (``weather.description`` on ``{"weather": [{"description": ...}, ...]}``). Missing fields are left out.
+
+    :param data: A dictionary or a list of dictionaries.
+    :param fields: The dotted paths to keep.
+    :return: The projected data.
+    """
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    projected = {}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        if head not in data:
+            continue
+        value = data[head]
+        if not rest:
+            projected[head] = value
+        elif isinstance(value, list):
+            projected[head] = [project(item, [rest]) for item in value]
+            if all(isinstance(item, dict) and len(item) == 1 for item in projected[head]):
+                # Collapse single-field records ([{"description": "rain"}] -> ["rain"])
+                projected[head] = [next(iter(item.values())) for item in projected[head]]
+        elif isinstance(value, dict):
+            nested = projected.setdefault(head, {})
+            nested.update(project(value, [rest]))
+    return projected
+
+
+def is_tabular(data: Any) -> bool:
+    """Whether data is a non-empty list of dictionaries that all share the same keys."""
+    if not isinstance(data, list) or not data or not all(isinstance(item, dict) for item in data):
+        return False
+    keys = list(data[0].keys())
+    return bool(keys) and all(list(item.keys()) == keys for item in data)
+
+
+def to_csv(records: List[dict]) -> str:
+    """Renders uniform records as CSV with a header row; nested values become minified JSON cells."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    keys = list(records[0].keys())
+    writer.writerow(keys)
+    for record in records:
+        writer.writerow([
+            value if isinstance(value, SCALAR_TYPES) else minify_json(value)
+            for value in (record[key] for key in keys)
+        ])
+    return buffer.getvalue().rstrip("\n")
+
+
+class ResultEncoding:
+    """
+    How a tool's result is turned into the text the model sees.
+
+    :param fields: Dotted paths to keep from the result (all fields if not given).
+    :param tabular: Render lists of uniform records as CSV instead of JSON.
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None, tabular: bool = True):
+        self.fields = fields
+        self.tabular = tabular
+
+    def encode(self, result: Any) -> str:
+        data = result
+        if isinstance(result, (str, bytes)):
+            # Tools that already return JSON text (e.g. the scraper) are re-encoded compactly
+            try:
+                data = json.loads(result)
+            except ValueError:
+                return result if isinstance(result, str) else result.decode("utf-8", errors="replace")
+        if self.fields:
+            data = project(data, self.fields)
+        if self.tabular and is_tabular(data):
+            return to_csv(data)
+        return minify_json(data)
+
+
+def result_encoding(fields: Optional[List[str]] = None, tabular: bool = True) -> Callable:
+    """
+    Opts a tool into compact result encoding.
+
+    The function itself is returned unchanged (so its signature and docstring still drive the schema); the
+    encoding is attached to it and applied by the assistant when the result is sent back to the model.
+
+    :param fields: Dotted paths to keep from the result (all fields if not given).
+    :param tabular: Render lists of uniform records as CSV instead of JSON.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.result_encoding = ResultEncoding(fields=fields, tabular=tabular)
+        return func
+    return decorator
+
+
+def encode_result(func: Optional[Callable], result: Any) -> str:
+    """Encodes a tool result using the tool's encoding, falling back to ``str(result)`` for tools without one."""
+    encoding = getattr(func, "result_encoding", None)
+    if encoding is None:
+        return str(result)
+    try:
+        return encoding.encode(result)
+    except Exception as e:
+        logger.error(f"Failed to encode result of {getattr(func, '__name__', func)}: {e}")
+        return str(result)
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+
+class RollingStats:
+    """
+    Rolling latency and error-rate statistics for an upstream (a deployment, a search provider, a domain), with a
+    cooldown that keeps it out of rotation for a while after failures.
+    """
+
+    def __init__(self, window: int = 50):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+
+    def latency(self, default: float = 0.5) -> float:
+        """Mean latency in seconds over the rolling window."""
+        with self._lock:
+            if not self._latencies:
+                return default
+            return sum(self._latencies) / len(self._latencies)
+
+    def latency_percentile(self, percentile: float, default: float = 1.0) -> float:
+        """Latency at the given percentile (0-100) over the rolling window."""
+        with self._lock:
+            if not self._latencies:
+                return default
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    def error_rate(self) -> float:
+        """Fraction of failed calls over the rolling window."""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def score(self) -> float:
+        """Lower is better: expected latency inflated by the current load and recent error rate."""
+        return self.latency() * (1 + self.in_flight) / max(0.05, 1.0 - self.error_rate())
+
+    def record_success(self, elapsed: float):
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._outcomes.append(True)
+
+    def record_failure(self, cooldown: float = 0.0):
+        with self._lock:
+            self._outcomes.append(False)
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+
+    def stats(self) -> Dict:
+        return {
+            "latency": round(self.latency(), 4),
+            "p99_latency": round(self.latency_percentile(99), 4),
+            "error_rate": round(self.error_rate(), 4),
+            "in_flight": self.in_flight,
+            "available": self.is_available(),
+        }
@@ -0,0 +1,116 @@
+import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from core.quota import SPECULATIVE, priority
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\')\]]+')
+WEATHER_PATTERN = re.compile(
+    r"\bweather\b[^.?!]{0,20}?\b(?:in|for|at)\s+([A-Z][\w\-]*(?:\s+[A-Z][\w\-]*)*)",
+    re.DOTALL
+)
+
+# An extractor returns the argument sets for which a tool will very likely be called, given the user's message.
+Extractor = Callable[[str], List[Dict]]
+
+
+def extract_urls(text: str) -> List[Dict]:
+    """Every URL in the message, as ``{"url": ...}`` (without trailing punctuation)."""
+    return [{"url": url.rstrip(".,;:!?")} for url in URL_PATTERN.findall(text)]
+
+
+def extract_weather_city(text: str) -> List[Dict]:
+    """The city of "weather in <City>" questions, as ``{"city": ...}``."""
+    match = WEATHER_PATTERN.search(text)
+    return [{"city": match.group(1)}] if match else []
+
+
+def _key(func_name: str, args: Dict) -> tuple:
+    """Matching key for a call; string arguments are compared case- and whitespace-insensitively."""
+    normalized = {
+        name: " ".join(value.split()).casefold() if isinstance(value, str) else value
+        for name, value in args.items()
+    }
+    return func_name, tuple(sorted((name, repr(value)) for name, value in normalized.items()))
+
+
+class SpeculativeCalls:
+    """The tool calls speculatively started for one question."""
+
+    def __init__(self, speculator: "Speculator"):
+        self._speculator = speculator
+        self._futures: Dict[tuple, Future] = {}
+
+    def add(self, func_name: str, args: Dict, future: Future):
+        self._futures[_key(func_name, args)] = future
+
+    def take(self, func_name: str, args: Dict) -> Optional[Future]:
+        """Returns (and consumes) the prefetched call matching the model's call, if any."""
+        return self._futures.pop(_key(func_name, args), None)
+
+    def finish(self):
+        """Counts the speculative calls the model never asked for as wasted."""
+        for future in self._futures.values():
+            future.cancel()
+            self._speculator.record("wasted")
+        self._futures.clear()
+
+
+class Speculator:
+    """
+    Starts tool calls the model is almost certain to make (e.g. scraping a URL pasted in the question) in parallel
+    with the first completion, so their I/O overlaps the LLM round trip instead of following it.
+
+    :param extractors: Tool name to the extractor that predicts its arguments from the latest user message.
+    :param max_calls: Maximum number of speculative calls per question.
+    :param max_workers: Size of the thread pool running speculative calls.
+    """
+
+    def __init__(self, extractors: Dict[str, Extractor], max_calls: int = 3, max_workers: int = 4):
+        self.extractors = extractors
+        self.max_calls = max_calls
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+        self._stats = {"started": 0, "used": 0, "wasted": 0, "failed": 0}
+
+    @staticmethod
+    def _call(call: Callable[[str, Dict], object], func_name: str, args: Dict):
+        # Prefetches only use provider quota that is free right now, never ahead of real calls
+        with priority(SPECULATIVE):
+            return call(func_name, args)
+
+    def record(self, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def start(self, messages: List[Dict], call: Callable[[str, Dict], object],
+              available: Optional[List[str]] = None) -> SpeculativeCalls:
+        """
+        Predicts tool calls from the latest user message and starts them in the background.
+
+        :param messages: The conversation.
+        :param call: Runs a tool given its name and arguments.
+        :param available: Names of the tools the model can call this time (all extractors if not given).
+        :return: The started calls, to be matched against the model's function calls.
+        """
+        calls = SpeculativeCalls(self)
+        text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        predicted = [
+            (func_name, args)
+            for func_name, extractor in self.extractors.items()
+            if available is None or func_name in available
+            for args in extractor(text)
+        ]
+        for func_name, args in predicted[:self.max_calls]:
+            logger.debug("Speculatively calling '%s' with %s", func_name, args)
+            calls.add(func_name, args, self._executor.submit(self._call, call, func_name, args))
+            self.record("started")
+        return calls
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
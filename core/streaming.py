@@ -0,0 +1,92 @@
+import logging
+import time
+from typing import Callable, Iterable, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message import FunctionCall
+
+logger = logging.getLogger(__name__)
+
+# Called with the function name and its complete (JSON) arguments as soon as they have been streamed
+OnFunctionCall = Callable[[str, str], None]
+
+
+class JsonCompletionTracker:
+    """
+    Tells when a JSON object streamed in pieces is complete, without parsing it: it follows braces and brackets
+    outside of strings, so the closing brace of the top-level object can be detected in the piece it arrives in.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.complete = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> bool:
+        """Consumes the next piece of the JSON text; returns True once the top-level object is complete."""
+        for char in text:
+            if self.complete:
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self.depth += 1
+                self.started = True
+            elif char in "}]":
+                self.depth -= 1
+                self.complete = self.started and self.depth == 0
+        return self.complete
+
+
+def collect_stream(chunks: Iterable, on_function_call: Optional[OnFunctionCall] = None) -> ChatCompletion:
+    """
+    Consumes a streamed chat completion and assembles it into a regular ``ChatCompletion``.
+
+    :param chunks: The ``ChatCompletionChunk`` stream returned by ``chat.completions.create(stream=True)``.
+    :param on_function_call: Called as soon as the arguments of the function call are complete, while the rest of
+                             the stream is still being read.
+    :return: The completion, as if it had been requested without streaming (without ``usage``).
+    """
+    completion_id, model, created = "", "", int(time.time())
+    content, name, arguments = [], "", []
+    finish_reason = None
+    tracker = JsonCompletionTracker()
+    dispatched = False
+    for chunk in chunks:
+        completion_id, model, created = chunk.id or completion_id, chunk.model or model, chunk.created or created
+        if not chunk.choices:
+            continue  # e.g. Azure's prompt filter results
+        choice = chunk.choices[0]
+        delta = choice.delta
+        if delta is not None and delta.content:
+            content.append(delta.content)
+        if delta is not None and delta.function_call is not None:
+            name += delta.function_call.name or ""
+            piece = delta.function_call.arguments or ""
+            arguments.append(piece)
+            if not dispatched and tracker.feed(piece) and on_function_call is not None:
+                dispatched = True
+                logger.debug("Arguments of '%s' complete before the end of the stream", name)
+                on_function_call(name, "".join(arguments))
+        finish_reason = choice.finish_reason or finish_reason
+
+    function_call = FunctionCall(name=name, arguments="".join(arguments)) if name else None
+    message = ChatCompletionMessage(role="assistant", content="".join(content) if content else None,
+                                    function_call=function_call)
+    return ChatCompletion(
+        id=completion_id,
+        object="chat.completion",
+        created=created,
+        model=model,
+        choices=[Choice(index=0, finish_reason=finish_reason or "stop", message=message)],
+    )
@@ -0,0 +1,6 @@
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about four characters per token for English and JSON)."""
+    return math.ceil(len(text) / 4)
@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Dict, Any
+
+from core.tool_executor import ToolError, time_left
+
+logger = logging.getLogger(__name__)
+
+
+def is_error_result(result: Any) -> bool:
+    """
+    Whether a tool result reports a failure: an ``{"error": ...}`` dictionary, a list containing one (e.g. a page
+    that could not be scraped among search results), or the JSON encoding of either.
+    """
+    if isinstance(result, str):
+        stripped = result.lstrip()
+        if not stripped.startswith(("{", "[")) or '"error"' not in stripped:
+            return False
+        try:
+            result = json.loads(stripped)
+        except ValueError:
+            return False
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return any(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+class ToolCache:
+    """
+    A thread-safe, TTL-bounded LRU cache for tool call results.
+
+    Results are keyed by function name and canonicalized arguments. Concurrent calls with the same key are
+    coalesced: the first caller runs the tool and the others wait for its result instead of repeating the call.
+    Exceptions and error results (see ``is_error_result``) are never cached, so a transient upstream failure is not
+    served to other conversations.
+
+    A waiting caller gives up at its own tool deadline (see ``time_left``), or after ``wait_timeout`` seconds outside
+    of a tool call, and gets a ``ToolError`` instead of the result.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024, wait_timeout: float = 30.0):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(func_name: str, args: Dict) -> str:
+        """Builds a cache key that does not depend on argument order."""
+        return f"{func_name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+    def get_or_call(self, func_name: str, args: Dict, func: Callable[..., Any]):
+        """
+        Returns the cached result for the call, or runs it and caches the result.
+
+        :param func_name: The name of the tool.
+        :param args: The keyword arguments of the call.
+        :param func: The tool itself.
+        :return: The tool result, or a ToolError if an identical call in flight did not finish in time.
+        """
+        key = self.make_key(func_name, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            timeout = time_left(self.wait_timeout)
+            logger.debug("Waiting up to %.1fs for in-flight call to '%s'", timeout, func_name)
+            try:
+                return future.result(timeout=timeout)
+            except TimeoutError:
+                return ToolError(func_name, f"An identical call in flight did not finish within {timeout:.1f}s",
+                                 timed_out=True, elapsed=timeout)
+
+        try:
+            result = func(**args)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if is_error_result(result):
+                logger.debug(f"Not caching the error result of '{func_name}'")
+            else:
+                self._entries[key] = (time.monotonic() + self.ttl, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,220 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, Dict, List, Optional
+
+import config
+from core.rolling_stats import RollingStats
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class CancelToken:
+    """
+    The deadline of one tool call, counted from when the call starts running. Set when the call times out, so the
+    tool can stop early.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.deadline: Optional[float] = None
+        self.started = threading.Event()
+        self.finished = False
+        self.straggling = False
+        self._cancelled = threading.Event()
+
+    def start(self):
+        self.deadline = time.monotonic() + self.timeout
+        self.started.set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return self.timeout
+        return max(0.0, self.deadline - time.monotonic())
+
+
+def is_cancelled() -> bool:
+    """For tools: whether the current tool call ran out of time and should return what it has."""
+    token = getattr(_local, "token", None)
+    return token is not None and token.cancelled()
+
+
+def time_left(default: float) -> float:
+    """For tools: the time left before the current call's deadline, capped at ``default`` (e.g. an HTTP timeout)."""
+    token = getattr(_local, "token", None)
+    if token is None:
+        return default
+    return max(0.1, min(default, token.remaining()))
+
+
+class ToolError:
+    """A failed or timed out tool call, sent back to the model as a result instead of being raised."""
+
+    def __init__(self, func_name: str, message: str, timed_out: bool = False, elapsed: float = 0.0):
+        self.func_name = func_name
+        self.message = message
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+
+    def to_dict(self) -> Dict:
+        return {"error": self.message, "tool": self.func_name, "timed_out": self.timed_out,
+                "elapsed": round(self.elapsed, 3)}
+
+
+class ToolStats(RollingStats):
+    """Timing of one tool's calls, and how many of them failed or timed out."""
+
+    def __init__(self, func_name: str, window: int = 100):
+        super().__init__(window)
+        self.func_name = func_name
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.stragglers = 0
+
+    def stats(self) -> Dict:
+        return {
+            "tool": self.func_name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "stragglers": self.stragglers,
+            "latency": round(self.latency(default=0.0), 4),
+            "p50_latency": round(self.latency_percentile(50, default=0.0), 4),
+            "p99_latency": round(self.latency_percentile(99, default=0.0), 4),
+            "error_rate": round(self.error_rate(), 4),
+        }
+
+
+class ToolExecutor:
+    """
+    Runs tool calls with a deadline each, so one hung upstream cannot stall a conversation.
+
+    Every call runs in a thread of its own, and its deadline starts when the call starts running. Tools see their
+    deadline through ``time_left()`` and ``is_cancelled()`` and can cut their own I/O short and return partial
+    results; the executor itself waits ``grace`` seconds longer before giving up on the call. A call that times out
+    or raises is returned as a ``ToolError``, which the model receives as an error result. Timed out calls are
+    cancelled cooperatively: their thread finishes in the background once the tool notices, and their result is
+    discarded. Such stragglers are counted per tool, and once a tool has ``max_stragglers`` of them still running,
+    its new calls fail right away instead of piling up more threads behind the same hung upstream; other tools are
+    not affected.
+
+    :param default_timeout: Deadline in seconds for tools without an entry in ``timeouts``.
+    :param timeouts: Tool name to its deadline in seconds.
+    :param grace: Extra seconds given to a tool to return partial results after its deadline.
+    :param max_stragglers: Timed out calls of one tool allowed to keep running before its new calls are refused.
+    """
+
+    def __init__(self, default_timeout: float = 30.0, timeouts: Optional[Dict[str, float]] = None,
+                 grace: float = 1.0, max_stragglers: int = 8):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.grace = grace
+        self.max_stragglers = max_stragglers
+        self._stats: Dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "ToolExecutor":
+        """Builds the executor from ``TOOL_TIMEOUT`` and the per-tool ``TOOL_TIMEOUTS`` JSON object."""
+        timeouts = json.loads(config.tool_timeouts) if config.tool_timeouts else {}
+        return cls(default_timeout=config.tool_timeout, timeouts={name: float(t) for name, t in timeouts.items()})
+
+    def timeout_for(self, func_name: str) -> float:
+        return self.timeouts.get(func_name, self.default_timeout)
+
+    def _stats_for(self, func_name: str) -> ToolStats:
+        with self._lock:
+            stats = self._stats.get(func_name)
+            if stats is None:
+                stats = self._stats[func_name] = ToolStats(func_name)
+            stats.calls += 1
+            return stats
+
+    def _run(self, stats: ToolStats, token: CancelToken, future: Future, func: Callable, args: Dict):
+        if not future.set_running_or_notify_cancel():
+            return
+        token.start()
+        _local.token = token
+        try:
+            future.set_result(func(**args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            _local.token = None
+            with self._lock:
+                token.finished = True
+                if token.straggling:
+                    stats.stragglers -= 1
+
+    def run(self, func_name: str, func: Callable, args: Dict):
+        """
+        Calls a tool within its deadline.
+
+        :param func_name: The name of the tool.
+        :param func: Called with the arguments as keyword arguments.
+        :param args: The arguments chosen by the model.
+        :return: The tool result, or a ToolError if the tool raised or timed out.
+        """
+        timeout = self.timeout_for(func_name)
+        stats = self._stats_for(func_name)
+        with self._lock:
+            stragglers = stats.stragglers
+        if stragglers >= self.max_stragglers:
+            with self._lock:
+                stats.errors += 1
+            logger.warning("Tool '%s' refused: %d earlier calls are still running", func_name, stragglers)
+            return ToolError(func_name, f"{stragglers} earlier calls of this tool are still running past their "
+                                        f"deadline; try again later")
+
+        token = CancelToken(timeout)
+        future = Future()
+        # The tool runs in the caller's context (e.g. its quota priority)
+        thread = threading.Thread(target=contextvars.copy_context().run,
+                                  args=(self._run, stats, token, future, func, args),
+                                  name=f"tool-{func_name}", daemon=True)
+        thread.start()
+        token.started.wait()
+        start = token.deadline - timeout
+        try:
+            result = future.result(timeout=token.remaining() + self.grace)
+        except TimeoutError:
+            token.cancel()
+            future.cancel()
+            elapsed = time.monotonic() - start
+            with self._lock:
+                stats.timeouts += 1
+                if not token.finished:
+                    token.straggling = True
+                    stats.stragglers += 1
+            stats.record_failure()
+            logger.warning(f"Tool '{func_name}' timed out after {elapsed:.1f}s")
+            return ToolError(func_name, f"The tool did not answer within {timeout:g}s", timed_out=True,
+                             elapsed=elapsed)
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                stats.errors += 1
+            stats.record_failure()
+            logger.error(f"Tool '{func_name}' failed after {elapsed:.1f}s: {e}", exc_info=True)
+            return ToolError(func_name, f"{type(e).__name__}: {e}", elapsed=elapsed)
+        elapsed = time.monotonic() - start
+        stats.record_success(elapsed)
+        logger.debug("Tool '%s' took %.3fs", func_name, elapsed)
+        return result
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            tools = list(self._stats.values())
+        return [stats.stats() for stats in tools]
@@ -0,0 +1,229 @@
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import config
+from core.parser import FunctionDefinitionParser
+
+logger = logging.getLogger(__name__)
+
+# Installed packages can contribute tools under this entry point group, e.g. in their pyproject.toml:
+# [project.entry-points."azure_openai_function_calling.tools"]
+# get_ticket = "mypackage.jira:get_ticket"
+ENTRY_POINT_GROUP = "azure_openai_function_calling.tools"
+
+# Bump when the schema format produced by FunctionDefinitionParser changes, to discard cached manifests
+MANIFEST_VERSION = 1
+
+
+def lazy(factory: Callable) -> Callable:
+    """
+    Turns a factory into an accessor that builds the object on first use and returns the same object afterwards.
+    Safe to call from several threads: the factory runs once.
+    """
+    lock = threading.Lock()
+    instance = []
+
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.__name__ = factory.__name__
+    get.__doc__ = factory.__doc__
+    return get
+
+
+def resolve(target: str) -> Callable:
+    """Imports the module of a ``"package.module:function"`` target and returns the function."""
+    module_name, _, attribute = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _source_stamp(target: str) -> Optional[Dict]:
+    """The path, modification time and size of the source file of a target's module, without importing it."""
+    try:
+        spec = importlib.util.find_spec(target.partition(":")[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return None
+    stat = os.stat(spec.origin)
+    return {"source": spec.origin, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+class LazyTool:
+    """
+    Stands in for a tool function until the model first calls it.
+
+    The proxy carries the tool's name and schema, so the assistant can offer the tool without importing it. The
+    first call imports the module declaring the tool (and whatever clients it builds at import time); later calls go
+    straight to the function.
+
+    :param target: The function, as ``"package.module:function"``.
+    :param schema: The function schema, as produced by ``FunctionDefinitionParser``.
+    :param integration: The integration the tool belongs to (e.g. "argocd").
+    """
+
+    def __init__(self, target: str, schema: Dict, integration: str):
+        self.target = target
+        self.schema = schema
+        self.integration = integration
+        self.__name__ = schema["name"]
+        self.__doc__ = schema.get("description")
+        self._func: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._func is not None
+
+    @property
+    def result_encoding(self):
+        # The encoding is only needed for results, so the function has been loaded by then
+        return getattr(self._func, "result_encoding", None)
+
+    def load(self) -> Callable:
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    self._func = resolve(self.target)
+                    logger.info(f"Loaded tool '{self.__name__}' from {self.target}")
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyTool({self.target!r}, loaded={self.loaded})"
+
+
+class ToolRegistry:
+    """
+    Declares the tools of each integration by import path and hands them to the assistant as ``LazyTool`` proxies.
+
+    Schemas are kept in a JSON manifest, keyed by target and stamped with the modification time and size of the
+    module's source file. A tool whose source has not changed is offered from the manifest without being imported;
+    only new or changed tools are imported to (re)build their schema. A tool whose module cannot be imported is left
+    out, so one broken integration does not keep the others from starting.
+
+    :param manifest_path: The manifest file; schemas are rebuilt on every start when not given.
+    """
+
+    def __init__(self, manifest_path: Optional[str] = None):
+        self.manifest_path = manifest_path
+        self.function_parser = FunctionDefinitionParser()
+        self._declared: Dict[str, str] = {}  # target -> integration
+        self._tools: Dict[str, LazyTool] = {}
+
+    @classmethod
+    def from_config(cls, integrations: Dict[str, List[str]]) -> "ToolRegistry":
+        """
+        Builds the registry from the given integrations and the installed entry points, keeping only the
+        integrations listed in ``TOOL_INTEGRATIONS`` (all of them when it is empty).
+
+        :param integrations: The targets of each integration, e.g. ``{"weather": ["functions.weather:get_weather"]}``.
+        """
+        registry = cls(config.tool_manifest_path or None)
+        for integration, targets in integrations.items():
+            registry.declare(integration, targets)
+        registry.declare_entry_points()
+        enabled = [name.strip() for name in config.tool_integrations.split(",") if name.strip()]
+        if enabled:
+            registry._declared = {target: integration for target, integration in registry._declared.items()
+                                  if integration in enabled}
+        return registry
+
+    def declare(self, integration: str, targets: List[str]) -> "ToolRegistry":
+        """Declares tools of an integration by their ``"package.module:function"`` targets."""
+        for target in targets:
+            self._declared[target] = integration
+        return self
+
+    def declare_entry_points(self, group: str = ENTRY_POINT_GROUP) -> "ToolRegistry":
+        """Declares the tools installed packages register under the entry point group."""
+        entry_points = importlib.metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            entry_points = entry_points.select(group=group)
+        else:
+            entry_points = entry_points.get(group, [])
+        for entry_point in entry_points:
+            dist = getattr(entry_point, "dist", None)
+            integration = dist.name if dist is not None else entry_point.value.partition(":")[0].split(".")[0]
+            self.declare(integration, [entry_point.value])
+        return self
+
+    def _load_manifest(self) -> Dict:
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable tool manifest {self.manifest_path}: {e}")
+            return {}
+        return manifest.get("tools", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+    def _save_manifest(self, entries: Dict):
+        directory = os.path.dirname(self.manifest_path)
+        temporary = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump({"version": MANIFEST_VERSION, "tools": entries}, file, indent=2)
+            os.replace(temporary, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not write the tool manifest {self.manifest_path}: {e}")
+
+    def _build_schema(self, target: str) -> Optional[Dict]:
+        try:
+            schema = self.function_parser.convert_function_to_json_schema(resolve(target))
+        except Exception as e:
+            logger.error(f"Tool {target} is unavailable: {e}")
+            return None
+        return schema or None
+
+    def tools(self) -> List[LazyTool]:
+        """
+        The declared tools, as proxies. Schemas missing from the manifest or outdated are rebuilt (importing their
+        module) and the manifest is updated; entries of tools not declared this time (e.g. of a disabled
+        integration) are kept.
+        """
+        manifest = self._load_manifest()
+        registered, rebuilt = [], 0
+        for target, integration in self._declared.items():
+            stamp = _source_stamp(target)
+            entry = manifest.get(target)
+            if stamp is not None and entry is not None and entry.get("stamp") == stamp:
+                schema = entry["schema"]
+            else:
+                schema = self._build_schema(target)
+                if schema is None:
+                    continue
+                manifest[target] = {"integration": integration, "stamp": stamp, "schema": schema}
+                rebuilt += 1
+            if target not in self._tools or self._tools[target].schema != schema:
+                self._tools[target] = LazyTool(target, schema, integration)
+            registered.append(self._tools[target])
+
+        if self.manifest_path and rebuilt:
+            self._save_manifest(manifest)
+        logger.info(f"{len(registered)} tools registered, {rebuilt} schemas rebuilt")
+        return registered
+
+    def stats(self) -> List[Dict]:
+        return [
+            {"name": tool.__name__, "integration": tool.integration, "target": tool.target, "loaded": tool.loaded}
+            for tool in self._tools.values()
+        ]
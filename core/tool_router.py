@@ -0,0 +1,112 @@
+import json
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from core.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r'https?://\S+')
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "function", "give", "how", "i",
+    "if", "in", "is", "it", "me", "my", "of", "on", "or", "please", "provide", "show", "tell", "that", "the", "this",
+    "to", "use", "what", "when", "which", "who", "will", "with", "you", "your", "return", "returns", "query",
+    "user", "gpt", "model", "result", "results", "search", "string", "list", "dictionary", "json", "formatted",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases, drops stop words and stems the text. URLs become the single token ``url``."""
+    text = URL_PATTERN.sub(" url ", text.lower())
+    return [_stem(token) for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+
+class ToolRouter:
+    """
+    Picks the function schemas that are relevant to a conversation, so each completion only carries those.
+
+    A TF-IDF index is built once from the schemas produced by ``FunctionDefinitionParser`` (name, description and
+    parameter descriptions) plus optional extra keywords per tool. The latest user message is scored against it;
+    tools scoring close to the best match are selected. When nothing matches confidently, the full set is returned
+    so the model is never left without the tool it needs.
+    """
+
+    def __init__(
+            self,
+            keywords: Optional[Dict[str, List[str]]] = None,
+            max_tools: int = 3,
+            min_score: float = 0.1,
+            relative_cutoff: float = 0.5
+    ):
+        self.keywords = keywords or {}
+        self.max_tools = max_tools
+        self.min_score = min_score
+        self.relative_cutoff = relative_cutoff
+        self.schemas: List[Dict] = []
+        self._vectors: Dict[str, Dict[str, float]] = {}
+        self._idf: Dict[str, float] = {}
+
+    def build(self, schemas: Optional[List[Dict]]) -> "ToolRouter":
+        """Builds the index from the function schemas."""
+        self.schemas = schemas or []
+        documents = {}
+        for schema in self.schemas:
+            name = schema["name"]
+            parts = [name.replace("_", " "), schema.get("description", "")]
+            parts += [param.get("description", "") for param in schema.get("parameters", {}).get("properties", {}).values()]
+            parts += self.keywords.get(name, [])
+            documents[name] = Counter(tokenize(" ".join(parts)))
+
+        document_frequency = Counter(term for terms in documents.values() for term in terms)
+        count = len(documents)
+        self._idf = {term: math.log((1 + count) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self._vectors = {name: self._normalize(terms) for name, terms in documents.items()}
+        return self
+
+    def _normalize(self, terms: Counter) -> Dict[str, float]:
+        vector = {term: (1 + math.log(tf)) * self._idf.get(term, 0.0) for term, tf in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def score(self, text: str) -> Dict[str, float]:
+        """Cosine similarity of the text against every indexed tool."""
+        query = self._normalize(Counter(tokenize(text)))
+        return {
+            name: sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            for name, vector in self._vectors.items()
+        }
+
+    def select(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Selects the schemas relevant to the conversation.
+
+        :param messages: The conversation; the latest user message drives the selection.
+        :return: The selected function schemas, or every schema if no tool matches confidently.
+        """
+        query = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        scores = self.score(query)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < self.min_score:
+            logger.debug("Tool router found no confident match, sending all functions")
+            return self.schemas
+
+        best = ranked[0][1]
+        selected = {name for name, value in ranked[:self.max_tools] if value >= best * self.relative_cutoff}
+        logger.debug("Tool router selected %s with scores %s", sorted(selected), ranked)
+        return [schema for schema in self.schemas if schema["name"] in selected]
+
+    @staticmethod
+    def payload_tokens(schemas: List[Dict]) -> int:
+        """Estimated prompt tokens taken by a list of function schemas."""
+        return estimate_tokens(json.dumps(schemas, separators=(",", ":")))
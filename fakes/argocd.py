@@ -0,0 +1,206 @@
+import copy
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1/applications"
+
+
+class FakeArgoCDServer:
+    """
+    A local stand-in for the ArgoCD applications API (``/api/v1/applications``), for exercising the ArgoCD
+    functions without a cluster.
+
+    Applications are kept in memory by name. Like the real server, the fake fills in defaults the manifests usually
+    leave out (``spec.project``, ``spec.source.targetRevision``) and reports a health and sync status. Requests
+    must carry the configured bearer token. Requests are counted per method, and every request can be slowed
+    down by ``latency`` seconds.
+
+    Pod logs (``/logs``, newline-delimited JSON honouring ``container`` and ``tailLines``) and resource trees
+    (``/resource-tree``) are served from ``logs`` and ``resource_trees``; both are streamed in small pieces so
+    clients can be checked for stopping early. The query parameters of every request are kept in ``queries``.
+
+    :param applications: Initial applications, as manifests.
+    :param token: The API token clients must send.
+    """
+
+    def __init__(self, applications: Optional[List[Dict]] = None, token: str = "fake-token",
+                 host: str = "127.0.0.1", port: int = 0):
+        self.token = token
+        self.latency = 0.0
+        self.applications: Dict[str, Dict] = {}
+        self.requests: Dict[str, int] = {}
+        self.logs: Dict[str, List[Dict]] = {}
+        self.resource_trees: Dict[str, Dict] = {}
+        self.queries: List[Dict] = []
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        for manifest in applications or []:
+            self._store(manifest)
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeArgoCDServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def add_logs(self, app_name: str, lines: List[str], container: str = "main", pod_name: Optional[str] = None):
+        """Adds log lines of a container of the application."""
+        pod_name = pod_name or f"{app_name}-7d9f8c6b5-x2x4q"
+        self.logs.setdefault(app_name, []).extend(
+            {"content": line, "podName": pod_name, "container": container} for line in lines
+        )
+
+    def _store(self, manifest: Dict):
+        application = copy.deepcopy(manifest)
+        spec = application.setdefault("spec", {})
+        spec.setdefault("project", "default")
+        spec.get("source", {}).setdefault("targetRevision", "HEAD")
+        application["status"] = {"health": {"status": "Healthy"}, "sync": {"status": "Synced"}}
+        with self._lock:
+            self.applications[application["metadata"]["name"]] = application
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _begin(self, method: str) -> bool:
+                with fake._lock:
+                    fake.requests[method] = fake.requests.get(method, 0) + 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if self.headers.get("Authorization") != f"Bearer {fake.token}":
+                    self._send_json(401, {"error": "invalid session"})
+                    return False
+                return True
+
+            def _name(self) -> Optional[str]:
+                return self._route()[0]
+
+            def _route(self):
+                """The application name and sub-resource (e.g. "logs") of the request path."""
+                url = urlsplit(self.path)
+                with fake._lock:
+                    fake.queries.append(self._query())
+                if not url.path.startswith(API_PREFIX + "/"):
+                    return None, None
+                parts = url.path[len(API_PREFIX) + 1:].split("/", 1)
+                return parts[0], parts[1] if len(parts) > 1 else None
+
+            def _query(self) -> Dict[str, str]:
+                return {key: values[-1] for key, values in parse_qs(urlsplit(self.path).query).items()}
+
+            def _body(self) -> Dict:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if not self._begin("GET"):
+                    return
+                name, resource = self._route()
+                if resource == "logs":
+                    self._send_logs(name)
+                    return
+                if resource == "resource-tree":
+                    tree = fake.resource_trees.get(name)
+                    if tree is None:
+                        self._send_json(404, {"error": f"application '{name}' not found"})
+                    else:
+                        self._send_stream([json.dumps(tree).encode("utf-8")])
+                    return
+                with fake._lock:
+                    if name is None:
+                        payload = {"items": list(fake.applications.values())}
+                    else:
+                        payload = fake.applications.get(name)
+                if payload is None:
+                    self._send_json(404, {"error": f"application '{name}' not found"})
+                else:
+                    self._send_json(200, payload)
+
+            def do_POST(self):
+                if not self._begin("POST"):
+                    return
+                manifest = self._body()
+                if manifest["metadata"]["name"] in fake.applications:
+                    self._send_json(409, {"error": "existing application spec is different"})
+                    return
+                fake._store(manifest)
+                self._send_json(200, fake.applications[manifest["metadata"]["name"]])
+
+            def do_PUT(self):
+                if not self._begin("PUT"):
+                    return
+                name = self._name()
+                if name not in fake.applications:
+                    self._send_json(404, {"error": f"application '{name}' not found"})
+                    return
+                fake._store(self._body())
+                self._send_json(200, fake.applications[name])
+
+            def do_DELETE(self):
+                if not self._begin("DELETE"):
+                    return
+                with fake._lock:
+                    removed = fake.applications.pop(self._name(), None)
+                self._send_json(404 if removed is None else 200, {})
+
+            def _send_logs(self, name):
+                query = self._query()
+                entries = [entry for entry in fake.logs.get(name, [])
+                           if not query.get("container") or entry["container"] == query["container"]]
+                if query.get("tailLines"):
+                    entries = entries[-int(query["tailLines"]):]
+                lines = [json.dumps({"result": {"content": entry["content"], "podName": entry["podName"],
+                                                "timeStamp": "2023-11-21T10:00:00Z"}})
+                         for entry in entries]
+                lines.append(json.dumps({"result": {"content": "", "last": True}}))
+                self._send_stream([(line + "\n").encode("utf-8") for line in lines])
+
+            def _send_stream(self, pieces: List[bytes]):
+                """Sends a body of unknown length in small writes, until the client hangs up."""
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                try:
+                    for piece in pieces:
+                        for start in range(0, len(piece), 4096):
+                            self.wfile.write(piece[start:start + 4096])
+                            with fake._lock:
+                                fake.bytes_sent += len(piece[start:start + 4096])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
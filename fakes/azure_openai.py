@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FakeAzureOpenAIServer:
+    """
+    A local stand-in for an Azure OpenAI chat completions endpoint.
+
+    It answers ``POST /openai/deployments/{deployment}/chat/completions`` with a canned completion after an
+    optional delay, or with a configurable error status, so routing and failover can be exercised without
+    touching a real Azure resource. Latency and failure mode can be changed while the server is running.
+
+    ``function_call`` lets the fake act like a model using tools: it receives the request body and returns a
+    ``(name, arguments)`` pair to answer with a function call, or None to answer with the reply. By default, a
+    function call is only made while no function result is in the conversation yet.
+
+    Requests with ``"stream": true`` are answered with server-sent events, the reply or the function call arguments
+    being split into small pieces sent ``chunk_delay`` seconds apart; a finished function call is followed by
+    ``tail_chunks`` empty chunks, like the trailing content-filter chunks Azure sends before the end of a stream.
+    Without streaming, the answer is sent after the time all its chunks would have taken.
+    """
+
+    def __init__(self, name: str = "fake", latency: float = 0.0, fail_status: Optional[int] = None,
+                 reply: Optional[str] = None, host: str = "127.0.0.1", port: int = 0,
+                 function_call: Optional[Callable[[dict], Optional[Tuple[str, dict]]]] = None,
+                 chunk_delay: float = 0.0, chunk_size: int = 8, tail_chunks: int = 0):
+        self.name = name
+        self.latency = latency
+        self.fail_status = fail_status
+        self.reply = reply or f"Reply from {name}"
+        self.function_call = function_call
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.tail_chunks = tail_chunks
+        self.request_count = 0
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAzureOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _usage(self, body: dict) -> dict:
+        """
+        Estimates token usage (four characters per token) and simulates prompt caching: the function definitions
+        and the first message count as cached once the same prefix has been seen before.
+        """
+        messages = body.get("messages", [])
+        prefix = json.dumps([body.get("functions"), messages[:1]], sort_keys=True)
+        prompt_tokens = len(json.dumps(messages)) // 4 + len(json.dumps(body.get("functions") or [])) // 4
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = digest in self._seen_prefixes
+            self._seen_prefixes.add(digest)
+        completion_tokens = len(self.reply) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": len(prefix) // 4 if cached else 0},
+        }
+
+    def _choice(self, body: dict) -> dict:
+        messages = body.get("messages", [])
+        answered = any(message.get("role") == "function" for message in messages)
+        call = self.function_call(body) if self.function_call and body.get("functions") and not answered else None
+        if call is None:
+            return {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": self.reply}}
+        name, arguments = call
+        return {
+            "index": 0,
+            "finish_reason": "function_call",
+            "message": {"role": "assistant", "content": None,
+                        "function_call": {"name": name, "arguments": json.dumps(arguments)}},
+        }
+
+    def build_completion(self, body: dict) -> dict:
+        """Builds the completion payload returned for a request body."""
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", self.name),
+            "choices": [self._choice(body)],
+            "usage": self._usage(body),
+        }
+
+    def build_chunks(self, completion: dict) -> List[dict]:
+        """Splits a completion payload into the chunks of a streamed completion."""
+        choice = completion["choices"][0]
+        message = choice["message"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+
+        def chunk(delta, finish_reason=None):
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        def pieces(text):
+            return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+        if message.get("function_call"):
+            name, arguments = message["function_call"]["name"], message["function_call"]["arguments"]
+            chunks = [chunk({"role": "assistant", "content": None, "function_call": {"name": name, "arguments": ""}})]
+            chunks += [chunk({"function_call": {"arguments": piece}}) for piece in pieces(arguments)]
+            chunks += [chunk({}) for _ in range(self.tail_chunks)]
+        else:
+            chunks = [chunk({"role": "assistant", "content": ""})]
+            chunks += [chunk({"content": piece}) for piece in pieces(message["content"])]
+        chunks.append(chunk({}, choice["finish_reason"]))
+        return chunks
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.fail_status:
+                    self._send_json(fake.fail_status, {"error": {"code": str(fake.fail_status),
+                                                                 "message": f"{fake.name} is failing"}},
+                                    extra_headers={"Retry-After": "1"} if fake.fail_status == 429 else None)
+                    return
+                completion = fake.build_completion(body)
+                chunks = fake.build_chunks(completion)
+                if body.get("stream"):
+                    self._send_stream(chunks)
+                else:
+                    # A complete answer is only sent once all of it has been generated
+                    time.sleep(fake.chunk_delay * len(chunks))
+                    self._send_json(200, completion)
+
+            def _send_stream(self, chunks):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if fake.chunk_delay:
+                        time.sleep(fake.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _send_json(self, status, payload, extra_headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (extra_headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(f"{fake.name}: {format % args}")
+
+        return Handler
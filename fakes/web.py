@@ -0,0 +1,89 @@
+import hashlib
+import logging
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FakeWebServer:
+    """
+    A local web server serving fixed HTML pages, for exercising the scraper without the internet.
+
+    Pages are served with ``ETag`` and ``Last-Modified`` headers and conditional requests are answered with
+    ``304 Not Modified``. Individual paths can be made slow or fail with a status code. Requests are counted per
+    path and by status, so tests can tell cache hits from real fetches.
+    """
+
+    def __init__(self, pages: Optional[Dict[str, str]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.pages = dict(pages or {})
+        self.latency: Dict[str, float] = {}
+        self.fail_status: Dict[str, int] = {}
+        self.requests: Dict[str, int] = {}
+        self.not_modified = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self) -> "FakeWebServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path
+                with fake._lock:
+                    fake.requests[path] = fake.requests.get(path, 0) + 1
+                if path in fake.latency:
+                    time.sleep(fake.latency[path])
+                if path in fake.fail_status:
+                    self.send_response(fake.fail_status[path])
+                    self.end_headers()
+                    return
+                if path not in fake.pages:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                body = fake.pages[path].encode("utf-8")
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with fake._lock:
+                        fake.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", fake.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
@@ -1,6 +1,8 @@
+from core.result_encoding import result_encoding
 from functions.argocd_controller import ArgoCDController
 
 
+@result_encoding()
 def get_available_applications() -> dict:
     """Retrieve the names of all ArgoCD applications available on the Kubernetes cluster.
 
@@ -25,6 +27,20 @@ def deploy_application(manifest_path: str) -> dict:
     return controller.deploy_argocd_application(manifest_path)
 
 
+def deploy_applications(manifests: str) -> dict:
+    """Deploy several ArgoCD applications on the Kubernetes cluster at once, skipping the unchanged ones.
+
+    Use this function when you want to deploy or update many ArgoCD applications from a directory of manifests or a
+    list of manifest files. Applications whose spec already matches the cluster are left untouched.
+
+    :param manifests: A directory of ArgoCD application manifests (YAML), or comma-separated manifest file paths.
+    :return: A dictionary with the result of each application (created, updated, unchanged or failed) and a summary.
+    """
+    controller = ArgoCDController()
+    return controller.bulk_deploy(manifests)
+
+
+@result_encoding()
 def get_application_status(app_name: str) -> dict:
     """Retrieve the health and sync status of a specific ArgoCD application.
 
@@ -38,6 +54,37 @@ def get_application_status(app_name: str) -> dict:
     return controller.get_argocd_application_status(app_name)
 
 
+@result_encoding()
+def get_application_logs(app_name: str, container: str = None, since_seconds: int = 3600) -> dict:
+    """Retrieve the error lines of the recent pod logs of an ArgoCD application.
+
+    Use this function when you want to find out why an ArgoCD application is degraded, crashing or failing. Only
+    error lines (grouped, with a count) and the last lines of the log are returned.
+
+    :param app_name: The name of the ArgoCD application.
+    :param container: The name of the container to read the logs of. Defaults to all containers. (optional)
+    :param since_seconds: How far back to read the logs, in seconds. Defaults to 3600. (optional)
+    :return: A dictionary with the distinct error lines and their counts, the last log lines, or an error message.
+    """
+    controller = ArgoCDController()
+    return controller.get_application_logs(app_name, container=container or None, since_seconds=int(since_seconds))
+
+
+@result_encoding()
+def get_unhealthy_resources(app_name: str) -> dict:
+    """Retrieve the Kubernetes resources of an ArgoCD application that are not healthy.
+
+    Use this function when you want to find out which resources (pods, deployments, services...) of an ArgoCD
+    application are degraded, progressing or missing, and why.
+
+    :param app_name: The name of the ArgoCD application.
+    :return: A dictionary with the number of resources per health status and the unhealthy resources with their
+    health message, or an error message.
+    """
+    controller = ArgoCDController()
+    return controller.get_application_resource_tree(app_name)
+
+
 def delete_application(app_name: str) -> dict:
     """Delete an ArgoCD application from the Kubernetes cluster.
 
@@ -65,11 +112,19 @@ if __name__ == "__main__":
     # deploy_result = deploy_application(manifest_path)
     # print(deploy_result)
 
+    # -- Deploy every manifest of a directory, skipping unchanged applications
+    # bulk_result = deploy_applications("manifests")
+    # print(bulk_result)
+
     # -- Retrieve the ArgoCD application's status
     # app_name = "guestbook"
     # status_result = get_application_status(app_name)
     # print(status_result)
 
+    # -- Find out why the ArgoCD application is degraded
+    # print(get_unhealthy_resources(app_name))
+    # print(get_application_logs(app_name))
+
     # -- Delete the ArgoCD application
     # app_name = "guestbook"
     # delete_result = delete_application(app_name)
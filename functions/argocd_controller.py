@@ -1,3 +1,13 @@
+import codecs
+import copy
+import hashlib
+import json
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
 import requests
 import yaml
 import logging
@@ -6,20 +16,140 @@ import config
 logger = logging.getLogger(__name__)
 
 
-class ArgoCDController:
-    argocd_url = config.argocd_url
-    argocd_api_key = config.argocd_api_key
+def spec_hash(spec: dict) -> str:
+    """A stable hash of an application spec, independent of key order."""
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+ERROR_PATTERN = re.compile(
+    r"\b(error|err|exception|traceback|fatal|panic|fail(ed|ure)?|crash\w*|oom\w*|killed|refused|timed? ?out)\b",
+    re.IGNORECASE
+)
+# Digits, hex ids and quoted values vary between otherwise identical log lines
+VARIABLE_PATTERN = re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{8,}\b|\d+|\"[^\"]*\"", re.IGNORECASE)
+
+
+class StreamBudget:
+    """Limits how much of a streamed response is read; the response is closed once the budget is spent."""
+
+    def __init__(self, max_bytes: int = 2 * 1024 * 1024, max_lines: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.exhausted = False
+
+    def chunks(self, response: requests.Response, chunk_size: int = 16 * 1024) -> Iterator[bytes]:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if self.bytes_read + len(chunk) > self.max_bytes:
+                self.exhausted = True
+                break
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def lines(self, response: requests.Response) -> Iterator[bytes]:
+        for line in response.iter_lines(chunk_size=16 * 1024):
+            if self.bytes_read + len(line) + 1 > self.max_bytes or \
+                    (self.max_lines is not None and self.lines_read >= self.max_lines):
+                self.exhausted = True
+                break
+            self.bytes_read += len(line) + 1
+            self.lines_read += 1
+            yield line
+
+
+class TailWindow:
+    """Keeps the newest items of a stream within a byte and item budget, dropping the oldest ones as new ones arrive."""
+
+    def __init__(self, max_bytes: int, max_items: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.bytes = 0
+        self.dropped = 0
+        self._items = deque()
+
+    def append(self, item, size: int):
+        self._items.append((item, size))
+        self.bytes += size
+        while self._items and (self.bytes > self.max_bytes or
+                               (self.max_items is not None and len(self._items) > self.max_items)):
+            _, dropped = self._items.popleft()
+            self.bytes -= dropped
+            self.dropped += 1
+
+    def __iter__(self):
+        return (item for item, _ in self._items)
+
+    def __len__(self):
+        return len(self._items)
 
-    if argocd_api_key is None:
-        raise ValueError("ARGOCD_API_KEY is not defined")
-    ARGOCD_API_URL = f"{argocd_url}/api/v1/applications"
-    HEADERS = {
-        "Authorization": f"Bearer {argocd_api_key}",
-        "Content-Type": "application/json"
-    }
 
-    def __init__(self):
-        pass
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[dict]:
+    """
+    Yields the items of the array under ``key`` of a JSON document received in chunks, each as soon as it has been
+    received, without holding the whole document in memory.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    marker = f'"{key}"'
+    buffer, in_array = "", False
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        if not in_array:
+            index = buffer.find(marker)
+            bracket = buffer.find("[", index + len(marker)) if index >= 0 else -1
+            if bracket < 0:
+                buffer = buffer[index:] if index >= 0 else buffer[-len(marker):]
+                continue
+            buffer, in_array = buffer[bracket + 1:], True
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,")
+            if buffer.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except ValueError:
+                break  # The item is not complete yet
+            yield item
+            buffer = buffer[end:]
+
+
+# Fields the ArgoCD API server fills in when a manifest leaves them out, and the value it fills in
+SERVER_DEFAULTS = [(("project",), "default"), (("source", "targetRevision"), "HEAD")]
+
+
+def normalize_spec(spec: dict) -> dict:
+    """
+    A copy of an application spec without the fields that are set to the server's defaults, so a manifest leaving
+    them out matches the live application. Every other field counts, including fields missing on one side only.
+    """
+    spec = copy.deepcopy(spec or {})
+    for path, default in SERVER_DEFAULTS:
+        parent = spec
+        for key in path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+        if isinstance(parent, dict) and parent.get(path[-1]) == default:
+            del parent[path[-1]]
+    for source in spec.get("sources") or []:
+        if isinstance(source, dict) and source.get("targetRevision") == "HEAD":
+            del source["targetRevision"]
+    return spec
+
+
+class ArgoCDController:
+    def __init__(self, argocd_url: Optional[str] = None, argocd_api_key: Optional[str] = None):
+        # Defaults to the configured server; the overrides allow working against a local fake ArgoCD API
+        argocd_url = argocd_url or config.argocd_url
+        argocd_api_key = argocd_api_key or config.argocd_api_key
+        # Checked here rather than at import time, so a missing key only affects the ArgoCD tools
+        if argocd_api_key is None:
+            raise ValueError("ARGOCD_API_KEY is not defined")
+        self.ARGOCD_API_URL = f"{argocd_url}/api/v1/applications"
+        self.HEADERS = {
+            "Authorization": f"Bearer {argocd_api_key}",
+            "Content-Type": "application/json"
+        }
 
     def check_authentication(self) -> dict:
         """
@@ -106,6 +236,226 @@ class ArgoCDController:
             logger.info(f"Application '{app_name}' does not exist. Creating...")
             return self.create_new_argocd_application(manifest)
 
+    @staticmethod
+    def _manifest_files(manifests: Union[str, List[str]]) -> List[str]:
+        """Expands a directory, a comma-separated list or a list of manifest paths into manifest file paths."""
+        if isinstance(manifests, str):
+            if os.path.isdir(manifests):
+                return sorted(
+                    os.path.join(manifests, name) for name in os.listdir(manifests)
+                    if name.endswith((".yaml", ".yml"))
+                )
+            manifests = manifests.split(",")
+        return [path.strip() for path in manifests if path.strip()]
+
+    @staticmethod
+    def _load_manifest_file(path: str) -> List[dict]:
+        """Loads the application manifests of a (possibly multi-document) YAML file."""
+        with open(path, 'r') as file:
+            return [document for document in yaml.safe_load_all(file) if document]
+
+    def _list_applications(self) -> Dict[str, dict]:
+        """All live applications by name, from a single list call."""
+        response = requests.get(self.ARGOCD_API_URL, headers=self.HEADERS, timeout=30)
+        response.raise_for_status()
+        return {application['metadata']['name']: application for application in response.json().get("items") or []}
+
+    def _plan(self, loaded: List[Tuple[str, Union[List[dict], Exception]]], live: Dict[str, dict]) -> List[dict]:
+        """Decides, per manifest, whether the application has to be created, updated, or is unchanged."""
+        plan, seen = [], set()
+        for path, documents in loaded:
+            if isinstance(documents, Exception):
+                plan.append({"app": None, "source": path, "action": "failed",
+                             "error": f"Failed to parse manifest: {documents}"})
+                continue
+            for manifest in documents:
+                app_name = (manifest.get('metadata') or {}).get('name')
+                entry = {"app": app_name, "source": path, "manifest": manifest}
+                if not app_name:
+                    entry.update(action="failed", error="The manifest has no metadata.name")
+                elif app_name in seen:
+                    entry.update(action="failed", error=f"Application '{app_name}' is defined more than once")
+                elif app_name not in live:
+                    entry.update(action="create", spec_hash=spec_hash(normalize_spec(manifest.get('spec'))))
+                else:
+                    entry["spec_hash"] = spec_hash(normalize_spec(manifest.get('spec')))
+                    live_hash = spec_hash(normalize_spec(live[app_name].get('spec')))
+                    entry["action"] = "unchanged" if live_hash == entry["spec_hash"] else "update"
+                seen.add(app_name)
+                plan.append(entry)
+        return plan
+
+    def _apply(self, entry: dict) -> dict:
+        """Creates or updates one application of the plan."""
+        try:
+            if entry["action"] == "create":
+                result = self.create_new_argocd_application(entry["manifest"])
+            else:
+                result = self.update_argocd_application(entry["app"], entry["manifest"])
+        except requests.RequestException as e:
+            result = {"error": f"Failed to deploy application '{entry['app']}': {e}"}
+        if "error" in result:
+            return dict(entry, action="failed", error=result["error"])
+        return dict(entry, action=result["status"])
+
+    def bulk_deploy(self, manifests: Union[str, List[str]], max_parallel: int = 4, dry_run: bool = False) -> dict:
+        """
+        Deploy many ArgoCD applications at once, only touching the ones that changed.
+
+        The manifests are parsed concurrently and compared with the live applications fetched in a single list
+        call: applications whose spec matches the live one are skipped, and only the creates and updates are sent,
+        at most max_parallel at a time.
+
+        :param manifests: A directory of YAML manifests, or a list (or comma-separated string) of manifest paths.
+        :param max_parallel: Maximum number of concurrent create/update requests.
+        :param dry_run: Only report what would be done.
+        :return: A dictionary with one result per application and a count per action, or an error message.
+        """
+        paths = self._manifest_files(manifests)
+        if not paths:
+            return {"error": f"No manifests found in {manifests}"}
+
+        def load(path):
+            try:
+                return path, self._load_manifest_file(path)
+            except (OSError, yaml.YAMLError) as e:
+                return path, e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(paths)))) as executor:
+            loaded = list(executor.map(load, paths))
+        try:
+            live = self._list_applications()
+        except requests.RequestException as e:
+            logger.error(f"Error retrieving available applications: {e}")
+            return {"error": f"Error retrieving available applications: {e}"}
+
+        plan = self._plan(loaded, live)
+        changes = [entry for entry in plan if entry["action"] in ("create", "update")]
+        if not dry_run and changes:
+            with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+                applied = dict(zip(map(id, changes), executor.map(self._apply, changes)))
+            plan = [applied.get(id(entry), entry) for entry in plan]
+
+        results = [{key: value for key, value in entry.items() if key != "manifest"} for entry in plan]
+        summary = {}
+        for result in results:
+            summary[result["action"]] = summary.get(result["action"], 0) + 1
+        logger.info(f"Bulk deploy of {len(results)} applications: {summary}")
+        return {"results": results, "summary": summary, "dry_run": dry_run}
+
+    def _stream(self, path: str, params: Dict) -> requests.Response:
+        response = requests.get(f"{self.ARGOCD_API_URL}/{path}", headers=self.HEADERS,
+                                params={key: value for key, value in params.items() if value is not None},
+                                stream=True, timeout=30)
+        response.raise_for_status()
+        return response
+
+    def iter_application_logs(self, app_name: str, budget: StreamBudget, container: Optional[str] = None,
+                              since_seconds: Optional[int] = None, tail_lines: Optional[int] = None,
+                              pod_name: Optional[str] = None) -> Iterator[dict]:
+        """
+        Streams the log lines of an application's pods, filtered by the server, until the budget is spent.
+
+        :return: The log entries (``content``, ``podName``, ``timeStamp``) in order.
+        """
+        response = self._stream(f"{app_name}/logs", {
+            "container": container, "sinceSeconds": since_seconds, "tailLines": tail_lines, "podName": pod_name,
+            "follow": "false",
+        })
+        with response:
+            for line in budget.lines(response):
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if "error" in entry:
+                    raise requests.HTTPError(entry["error"].get("message", str(entry["error"])), response=response)
+                result = entry.get("result") or {}
+                if result.get("last"):
+                    break
+                yield result
+
+    def iter_resource_tree(self, app_name: str, budget: StreamBudget) -> Iterator[dict]:
+        """Streams the nodes of an application's resource tree until the budget is spent."""
+        with self._stream(f"{app_name}/resource-tree", {}) as response:
+            yield from iter_json_array(budget.chunks(response), "nodes")
+
+    def get_application_logs(self, app_name: str, container: Optional[str] = None, since_seconds: int = 3600,
+                             tail_lines: int = 5000, max_bytes: int = 2 * 1024 * 1024, max_lines: int = 20000,
+                             max_errors: int = 20, context_lines: int = 10,
+                             max_read_bytes: int = 32 * 1024 * 1024) -> dict:
+        """
+        Condense an application's recent pod logs to their error lines.
+
+        The server filters by container, time and number of lines. The client keeps the newest max_bytes and
+        max_lines of what it receives, so the lines closest to a failure are the ones condensed, and stops reading
+        altogether after max_read_bytes. Error lines that differ only in numbers, ids or quoted values are grouped
+        with a count.
+
+        :return: The distinct error lines with their counts, the last lines of the log, and how much was read.
+        """
+        budget = StreamBudget(max_bytes=max_read_bytes)
+        window = TailWindow(max_bytes=max_bytes, max_items=max_lines)
+        try:
+            for entry in self.iter_application_logs(app_name, budget, container=container,
+                                                    since_seconds=since_seconds, tail_lines=tail_lines):
+                content = (entry.get("content") or "").strip()
+                if content:
+                    window.append((entry.get("podName", ""), content), len(content) + 1)
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Failed to fetch logs of application '{app_name}': {e}")
+            return {"error": f"Failed to fetch logs of application '{app_name}': {e}"}
+
+        errors, samples, last_lines = Counter(), {}, deque(maxlen=context_lines)
+        for pod_name, content in window:
+            last_lines.append(content[:300])
+            if ERROR_PATTERN.search(content):
+                key = VARIABLE_PATTERN.sub("#", content)
+                errors[key] += 1
+                samples.setdefault(key, f"{pod_name}: {content[:500]}")
+        return {
+            "app": app_name,
+            "lines_read": budget.lines_read,
+            "bytes_read": budget.bytes_read,
+            "truncated": budget.exhausted or window.dropped > 0,
+            "older_lines_dropped": window.dropped,
+            "error_lines": sum(errors.values()),
+            "errors": [{"line": samples[key], "count": count} for key, count in errors.most_common(max_errors)],
+            "last_lines": list(last_lines),
+        }
+
+    def get_application_resource_tree(self, app_name: str, unhealthy_only: bool = True,
+                                      max_bytes: int = 4 * 1024 * 1024, max_resources: int = 50) -> dict:
+        """
+        Condense an application's resource tree to its unhealthy resources.
+
+        :return: The number of resources per health status, and the unhealthy (or all) resources with their
+                 health message.
+        """
+        budget = StreamBudget(max_bytes=max_bytes)
+        statuses, resources = Counter(), []
+        try:
+            for node in self.iter_resource_tree(app_name, budget):
+                status = (node.get("health") or {}).get("status")
+                statuses[status or "None"] += 1
+                if unhealthy_only and status in (None, "Healthy"):
+                    continue
+                if len(resources) < max_resources:
+                    resource = {"kind": node.get("kind"), "name": node.get("name"),
+                                "namespace": node.get("namespace"), "health": status,
+                                "message": (node.get("health") or {}).get("message")}
+                    resources.append({key: value for key, value in resource.items() if value})
+        except requests.RequestException as e:
+            logger.error(f"Failed to fetch the resource tree of application '{app_name}': {e}")
+            return {"error": f"Failed to fetch the resource tree of application '{app_name}': {e}"}
+        return {
+            "app": app_name,
+            "resource_count": sum(statuses.values()),
+            "health": dict(statuses),
+            "truncated": budget.exhausted,
+            "unhealthy_only": unhealthy_only,
+            "resources": resources,
+        }
+
     def get_argocd_application_status(self, app_name: str) -> dict:
         """Retrieve the health and sync status of a specific ArgoCD application."""
         try:
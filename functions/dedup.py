@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import re
+from collections import Counter
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|newsletter|subscribe|sign up|all rights reserved|advertisement|javascript|privacy policy|"
+    r"terms of (use|service)|follow us|share this|read more|related (articles|stories)",
+    re.IGNORECASE
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    Computes a 64-bit SimHash of a text over its word shingles. Texts that share most of their shingles get hashes
+    that differ in only a few bits.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    weights = [0] * 64
+    for shingle, count in Counter(shingles).items():
+        value = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateFilter:
+    """
+    Removes redundant content from a set of scraped pages before it reaches the model.
+
+    - Pages whose SimHash differs in at most ``max_distance`` bits (syndicated copies of the same story) are
+      collapsed into the first one; the URLs of the copies are kept under ``duplicate_urls`` for citation.
+    - Paragraphs repeated across the remaining pages are kept only where they first appear.
+    - Short paragraphs that repeat on ``boilerplate_pages`` or more pages are dropped everywhere, as are short
+      paragraphs that repeat on at least two pages and look like boilerplate (cookie banners, newsletter blurbs).
+      A paragraph found on a single page is always kept, even when it mentions cookies or privacy policies.
+
+    :param max_distance: Maximum SimHash distance for two pages to count as duplicates.
+    :param boilerplate_words: Paragraphs up to this many words may be treated as boilerplate.
+    :param boilerplate_pages: Number of pages a short paragraph must appear on to count as boilerplate.
+    """
+
+    def __init__(self, max_distance: int = 3, boilerplate_words: int = 30, boilerplate_pages: int = 3):
+        self.max_distance = max_distance
+        self.boilerplate_words = boilerplate_words
+        self.boilerplate_pages = boilerplate_pages
+
+    def _is_boilerplate(self, paragraph: str, key: str, occurrences: int) -> bool:
+        if len(key.split()) > self.boilerplate_words:
+            return False
+        if occurrences >= self.boilerplate_pages:
+            return True
+        # The keywords only tip the balance for paragraphs that do repeat across pages
+        return occurrences > 1 and bool(BOILERPLATE_PATTERN.search(paragraph))
+
+    def _collapse_pages(self, results: List[Dict]) -> List[Dict]:
+        kept, fingerprints = [], []
+        for result in results:
+            if "content" not in result:
+                kept.append(result)
+                continue
+            fingerprint = simhash(result["content"])
+            original = next((kept_result for kept_result, kept_fingerprint in fingerprints
+                             if hamming_distance(fingerprint, kept_fingerprint) <= self.max_distance), None)
+            if original is not None:
+                original.setdefault("duplicate_urls", []).append(result["url"])
+                logger.debug(f"Collapsed {result['url']} into near-duplicate {original['url']}")
+                continue
+            result = dict(result)
+            kept.append(result)
+            fingerprints.append((result, fingerprint))
+        return kept
+
+    def _drop_repeated_paragraphs(self, results: List[Dict]) -> List[Dict]:
+        """Drops repeated and boilerplate paragraphs; returns the pages emptied by paragraphs found on another page."""
+        pages = [result for result in results if "content" in result]
+        occurrences = Counter()
+        for result in pages:
+            occurrences.update({_normalize(p) for p in result["content"].split("\n") if _normalize(p)})
+
+        owners, merged = {}, []
+        for result in pages:
+            paragraphs, duplicate_of = [], None
+            for paragraph in result["content"].split("\n"):
+                key = _normalize(paragraph)
+                if not key:
+                    continue
+                if self._is_boilerplate(paragraph, key, occurrences[key]):
+                    continue
+                if key in owners:
+                    duplicate_of = duplicate_of or owners[key]
+                    continue
+                owners[key] = result
+                paragraphs.append(paragraph)
+            result["content"] = "\n".join(paragraphs)
+            if not paragraphs and duplicate_of is not None and duplicate_of is not result:
+                # Everything on this page was already said by another one: cite it there
+                duplicate_of.setdefault("duplicate_urls", []).append(result["url"])
+                duplicate_of["duplicate_urls"].extend(result.get("duplicate_urls", []))
+                merged.append(result)
+        return merged
+
+    def filter(self, results: List[Dict]) -> List[Dict]:
+        """
+        Filters a list of scrape results (``{"url": ..., "content": ...}`` or ``{"url": ..., "error": ...}``).
+
+        :param results: The scrape results, in order of preference.
+        :return: The filtered results. Pages whose content was all said on another page are dropped, keeping their
+                 URLs on that page; pages left with nothing but boilerplate are kept with an empty body, so their
+                 URL is not lost.
+        """
+        results = self._collapse_pages(results)
+        merged = self._drop_repeated_paragraphs(results)
+        return [result for result in results if not any(result is page for page in merged)]
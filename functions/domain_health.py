@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from core.rolling_stats import RollingStats
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def domain_of(url: str) -> str:
+    """Returns the host of a URL without ``www.``."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainHealth(RollingStats):
+    """
+    Health of one domain: rolling latency plus a failure score that decays over time, driving a circuit breaker.
+
+    The circuit opens when the failure score reaches the threshold. Once the open period has passed, one probe
+    request is let through (half-open): a good result closes the circuit, another failure re-opens it for twice as
+    long. The score only starts decaying ``burst_window`` seconds after the last update, so failures in quick
+    succession add up to exactly their weights.
+    """
+
+    def __init__(self, domain: str, window: int = 20):
+        super().__init__(window)
+        self.domain = domain
+        self.failure_score = 0.0
+        self.state = CLOSED
+        self.open_for = 0.0
+        self.probing = False
+        self._updated = time.monotonic()
+
+    def decayed_score(self, half_life: float, burst_window: float = 0.0) -> float:
+        elapsed = max(0.0, time.monotonic() - self._updated - burst_window)
+        return self.failure_score * 0.5 ** (elapsed / half_life)
+
+    def stats(self) -> Dict:
+        return dict(domain=self.domain, state=self.state, failure_score=round(self.failure_score, 2),
+                    **super().stats())
+
+
+class DomainHealthRegistry:
+    """
+    Remembers how each domain behaved recently (failures, latency, pages without content) so the scraper can skip
+    domains whose circuit is open and try healthy domains first.
+
+    :param threshold: Failure score at which a domain's circuit opens.
+    :param half_life: Seconds after which half of a domain's failure score is forgotten.
+    :param open_duration: Seconds a circuit stays open the first time; doubles on every failed probe.
+    :param max_open_duration: Upper bound for the open period.
+    :param empty_weight: Failure score added when a page is fetched but has no extractable text.
+    :param burst_window: Seconds after a failure during which the failure score does not decay yet.
+    :param max_domains: Domains remembered; beyond that the least recently seen closed circuits are forgotten, while
+        open and half-open circuits are always kept.
+    """
+
+    def __init__(self, threshold: float = 3.0, half_life: float = 600.0, open_duration: float = 60.0,
+                 max_open_duration: float = 1800.0, empty_weight: float = 0.5, burst_window: float = 60.0,
+                 max_domains: int = 4096):
+        self.threshold = threshold
+        self.half_life = half_life
+        self.burst_window = burst_window
+        self.open_duration = open_duration
+        self.max_open_duration = max_open_duration
+        self.empty_weight = empty_weight
+        self.max_domains = max_domains
+        self._domains: "OrderedDict[str, DomainHealth]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, url: str) -> DomainHealth:
+        domain = domain_of(url)
+        with self._lock:
+            health = self._domains.get(domain)
+            if health is None:
+                health = self._domains[domain] = DomainHealth(domain)
+                self._evict()
+            else:
+                self._domains.move_to_end(domain)
+            return health
+
+    def _evict(self):
+        while len(self._domains) > self.max_domains:
+            idle = next((domain for domain, health in self._domains.items() if health.state == CLOSED), None)
+            if idle is None:
+                break
+            del self._domains[idle]
+
+    def allow(self, url: str) -> bool:
+        """Whether a fetch of the URL should be attempted now. Lets one probe through when an open circuit expires."""
+        health = self._get(url)
+        with self._lock:
+            if health.state == CLOSED:
+                return True
+            if health.is_available() and not health.probing:
+                health.state = HALF_OPEN
+                health.probing = True
+                logger.info(f"Probing domain '{health.domain}'")
+                return True
+            return False
+
+    def _add_failure(self, health: DomainHealth, weight: float, reason: str):
+        with self._lock:
+            health.failure_score = health.decayed_score(self.half_life, self.burst_window) + weight
+            health._updated = time.monotonic()
+            probe_failed = health.state == HALF_OPEN
+            health.probing = False
+            if probe_failed or health.failure_score >= self.threshold:
+                health.open_for = min(self.max_open_duration,
+                                      health.open_for * 2 if probe_failed else self.open_duration)
+                health.state = OPEN
+                health.record_failure(health.open_for)
+                logger.warning(f"Circuit open for domain '{health.domain}' for {health.open_for:.0f}s ({reason})")
+            else:
+                health.record_failure()
+
+    def record_success(self, url: str, elapsed: float):
+        """Records a fetch that returned content."""
+        health = self._get(url)
+        with self._lock:
+            health.record_success(elapsed)
+            health.failure_score = health.decayed_score(self.half_life, self.burst_window)
+            health._updated = time.monotonic()
+            if health.state != CLOSED:
+                logger.info(f"Circuit closed for domain '{health.domain}'")
+                health.failure_score = 0.0
+                health.open_for = 0.0
+            health.state = CLOSED
+            health.probing = False
+
+    def end_probe(self, url: str):
+        """
+        Ends a probe whose outcome was not recorded (e.g. the scrape raised), so a later request can probe again
+        instead of the domain being skipped forever.
+        """
+        health = self._get(url)
+        with self._lock:
+            health.probing = False
+
+    def record_failure(self, url: str, reason: str):
+        """Records a failed fetch (timeout, HTTP error, connection error)."""
+        self._add_failure(self._get(url), 1.0, reason)
+
+    def record_empty(self, url: str):
+        """Records a fetch that succeeded but yielded no text (e.g. paywalls)."""
+        self._add_failure(self._get(url), self.empty_weight, "no content")
+
+    def order(self, urls: List[str]) -> List[str]:
+        """Orders URLs healthiest domain first, keeping the original order between equally healthy domains."""
+        def key(url):
+            health = self._get(url)
+            return health.decayed_score(self.half_life, self.burst_window), health.latency(default=0.0)
+        return sorted(urls, key=key)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            domains = list(self._domains.values())
+        return [health.stats() for health in domains]
@@ -1,12 +1,25 @@
 from duckduckgo_search import DDGS
 import json
 
+from core.quota import quotas
+
 
 class DuckDuckGoSearchManager:
     """
     A class to perform various types of web searches using DuckDuckGo.
+
+    Every search takes one unit of the "duckduckgo" quota, so bursts do not get the client throttled; when the
+    quota is spent, repeated searches are answered from their earlier results.
     """
 
+    def __init__(self, quota_manager=None):
+        self.quota_manager = quota_manager or quotas
+
+    def _call(self, kind, search, *args):
+        """Runs a search within the DuckDuckGo quota. Raises QuotaExceeded if it is spent and there is no earlier
+        result for the same search."""
+        return self.quota_manager.call("duckduckgo", json.dumps([kind, *args]), search)
+
     def text_search(self, query, num_results=3) -> list:
         """
         Performs a DuckDuckGo text search and returns a list of URLs.
@@ -18,10 +31,12 @@ class DuckDuckGoSearchManager:
         Returns:
         - list of str: A list containing the URLs of the search results. Each URL in the list corresponds to a page that matches the search query.
         """
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=num_results)
-            urls = [result['href'] for result in results]
-            return urls
+        def search():
+            with DDGS() as ddgs:
+                results = ddgs.text(query, max_results=num_results)
+                urls = [result['href'] for result in results]
+                return urls
+        return self._call("text", search, query, num_results)
 
     def news_search(self, query, num_results=3) -> list:
         """
@@ -34,10 +49,12 @@ class DuckDuckGoSearchManager:
         Returns:
         - list of str: A list containing the URLs of the news articles. Each URL in the list corresponds to a news article that matches the search query.
         """
-        with DDGS() as ddgs:
-            results = ddgs.news(query, max_results=num_results)
-            urls = [result['url'] for result in results]
-            return urls
+        def search():
+            with DDGS() as ddgs:
+                results = ddgs.news(query, max_results=num_results)
+                urls = [result['url'] for result in results]
+                return urls
+        return self._call("news", search, query, num_results)
 
     def images_search(self, query, num_results=3) -> list:
         """
@@ -52,11 +69,13 @@ class DuckDuckGoSearchManager:
             'image': URL of the actual image,
             'thumbnail': URL of the thumbnail of the image.
         """
-        with DDGS() as ddgs:
-            results = ddgs.images(query, max_results=num_results)
-            # Extract image and thumbnail URLs
-            image_info = [{'image': result['image'], 'thumbnail': result['thumbnail']} for result in results]
-            return image_info
+        def search():
+            with DDGS() as ddgs:
+                results = ddgs.images(query, max_results=num_results)
+                # Extract image and thumbnail URLs
+                image_info = [{'image': result['image'], 'thumbnail': result['thumbnail']} for result in results]
+                return image_info
+        return self._call("images", search, query, num_results)
 
     def videos_search(self, query, num_results=3):
         """
@@ -70,10 +89,12 @@ class DuckDuckGoSearchManager:
         - list of dict: A list where each dictionary contains 'title' and 'content' keys.
           'title' is the title of the video, and 'content' is the URL of the video.
         """
-        with DDGS() as ddgs:
-            results = ddgs.videos(query, max_results=num_results)
-            video_info = [{'title': result['title'], 'content': result['content']} for result in results]
-            return video_info
+        def search():
+            with DDGS() as ddgs:
+                results = ddgs.videos(query, max_results=num_results)
+                video_info = [{'title': result['title'], 'content': result['content']} for result in results]
+                return video_info
+        return self._call("videos", search, query, num_results)
 
     def maps_search(self, query, place, num_results=3):
         """
@@ -94,14 +115,16 @@ class DuckDuckGoSearchManager:
 
         Each dictionary represents one map search result, providing concise details about a location relevant to the search query.
         """
-        with DDGS() as ddgs:
-            results = ddgs.maps(query, place, max_results=num_results)
-            map_info = [{'title': result['title'],
-                         'address': result['address'],
-                         'phone': result.get('phone', 'Not available'),
-                         'url': result.get('url', 'Not available'),
-                         'operating_hours': result.get('hours', 'Not available')} for result in results]
-            return map_info
+        def search():
+            with DDGS() as ddgs:
+                results = ddgs.maps(query, place, max_results=num_results)
+                map_info = [{'title': result['title'],
+                             'address': result['address'],
+                             'phone': result.get('phone', 'Not available'),
+                             'url': result.get('url', 'Not available'),
+                             'operating_hours': result.get('hours', 'Not available')} for result in results]
+                return map_info
+        return self._call("maps", search, query, place, num_results)
 
 
 if __name__ == "__main__":
@@ -1,79 +1,184 @@
+import contextvars
+import json
 import logging
-from serpapi import GoogleSearch
-from core.azure_functions import AzureOpenAIFunctions
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
 import config
+from core.quota import QuotaExceeded, QuotaManager, quotas
+from core.tool_cache import ToolCache
+from core.tool_executor import ToolError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# SerpAPI "tbm" parameter and the key holding the results, per search type
+SEARCH_TYPES = {
+    "news": ("nws", "news_results"),
+    "web": (None, "organic_results"),
+}
+
+
+class SearchError:
+    """
+    A failed search, returned instead of a list of URLs so callers can tell the two apart.
+
+    :param query: The query that failed.
+    :param message: What went wrong.
+    :param status_code: The HTTP status code, if the API answered.
+    :param provider: The search backend that failed, as shown to the model.
+    """
+
+    def __init__(self, query: str, message: str, status_code: Optional[int] = None, provider: str = "Google Search"):
+        self.query = query
+        self.message = message
+        self.status_code = status_code
+        self.provider = provider
+
+    @property
+    def retryable(self) -> bool:
+        """Whether repeating the search later may succeed (throttling, server errors or no response)."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    def to_dict(self) -> dict:
+        return {"error": f"Error in performing {self.provider}: {self.message}", "query": self.query}
+
+    def __repr__(self):
+        return f"SearchError(query={self.query!r}, message={self.message!r}, status_code={self.status_code}, " \
+               f"provider={self.provider!r})"
+
 
 class GoogleSearchManager:
     """
-    A class to perform web searches and scrape web content.
+    A class to perform Google news and web searches through SerpAPI.
+
+    Requests share one pooled HTTP session. Results are cached by normalized query and locale, larger result sets
+    are fetched as concurrent pages, and several queries can be searched at once. Every page request takes one
+    unit of the "serpapi" quota.
     """
 
-    def __init__(self):
-        self.gpt = AzureOpenAIFunctions(
-            azure_openai_endpoint=config.azure_openai_endpoint,
-            azure_openai_key_key=config.azure_openai_key_key,
-            azure_api_version=config.azure_api_version,
-            model=config.azure_openai_deployment_name,
-        )
-
-    # def optimize_google_search_query(self, search_query):
-    #     """
-    #     Generates an optimized Google Search query using GPT-4-turbo.
-    #     """
-    #     messages = [
-    #         {"role": "system",
-    #          "content": "You are a Google Search Expert. You task is to convert unstructured user inputs to optimized "
-    #                     "Google search queries. For example, USER INPUT: 'What is the current weather in Berlin?' "
-    #                     "OPTIMIZED Google Search Query: 'current weather Berlin'"},
-    #         {"role": "user",
-    #          "content": f"Convert the following user query into a optimized Google Search query: {search_query}"}
-    #     ]
-    #     try:
-    #         response = self.gpt.ask(messages)
-    #         if response.choices:
-    #             optimized_query = response.choices[0].message
-    #             if hasattr(optimized_query, "content"):
-    #                 return optimized_query.content.strip()
-    #     except Exception as e:
-    #         logger.error(f"Error in generating Google Search query: {e}")
-    #         raise
-
-    def google_search(self, query, num_results=3, location="United States"):
-        """
-        Performs a Google Search and returns a list of URLs.
-        """
+    def __init__(self, timeout: float = 10.0, max_workers: int = 4, page_size: int = 10, cache_ttl: float = 300.0,
+                 quota_manager: Optional[QuotaManager] = None):
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="serpapi")
+        self.cache = ToolCache(ttl=cache_ttl)
+        self.quota_manager = quota_manager or quotas
+
+    @staticmethod
+    def _redact(message: str) -> str:
+        """Removes the API key from error messages, which include the request URL."""
+        return message.replace(config.serpapi_key, "***") if config.serpapi_key else message
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercases the query and collapses whitespace so equivalent queries share a cache entry."""
+        return " ".join(query.lower().split())
+
+    def _fetch_page(self, params: Dict, results_key: str) -> List[str]:
+        """Fetches one page of results within the SerpAPI quota and returns its URLs. Raises on failure."""
+        key = json.dumps({name: value for name, value in params.items() if name != "api_key"}, sort_keys=True)
+        return self.quota_manager.call("serpapi", key, lambda: self._request_page(params, results_key))
+
+    def _request_page(self, params: Dict, results_key: str) -> List[str]:
+        response = self.session.get(SERPAPI_URL, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        results = response.json()
+        if "error" in results and not results.get(results_key):
+            # SerpAPI reports "no results" as an error; anything else is a real failure
+            if "hasn't returned any results" in results["error"]:
+                return []
+            raise ValueError(results["error"])
+        return [result["link"] for result in results.get(results_key, []) if "link" in result]
+
+    def _search(self, query: str, num_results: int, location: str, hl: str, gl: str, search_type: str) -> List[str]:
+        tbm, results_key = SEARCH_TYPES[search_type]
         params = {
             "api_key": config.serpapi_key,
             "engine": "google",
             "q": query,
-            "num": str(num_results),
-            "tbm": "nws",  # Search type: news, images, videos, shopping, books, apps
             "location": location,
-            "hl": "en",  # language
-            "gl": "us",  # country code to search from (e.g. United States = us, Germany = de)
+            "hl": hl,  # language
+            "gl": gl,  # country code to search from (e.g. United States = us, Germany = de)
             "google_domain": "google.com",  # google domain to search from
-            "output": "json",
             "safe": "active",
         }
+        if tbm:
+            params["tbm"] = tbm  # Search type: news, images, videos, shopping, books, apps
+        pages = math.ceil(num_results / self.page_size)
+        page_params = [
+            dict(params, num=str(min(self.page_size, num_results)), start=str(page * self.page_size))
+            for page in range(pages)
+        ]
+        if pages == 1:
+            page_results = [self._fetch_page(page_params[0], results_key)]
+        else:
+            page_results = list(self.executor.map(
+                lambda p, context: context.run(self._fetch_page, p, results_key),
+                page_params, [contextvars.copy_context() for _ in page_params]
+            ))
+
+        urls = []
+        for page in page_results:
+            urls.extend(url for url in page if url not in urls)
+        return urls[:num_results]
+
+    def google_search(self, query, num_results=3, location="United States", hl="en", gl="us", search_type="news") \
+            -> Union[List[str], SearchError]:
+        """
+        Performs a Google search ("news" or "web") and returns a list of URLs, or a SearchError if it failed.
+        """
+        args = {"query": self.normalize_query(query), "num_results": int(num_results), "location": location,
+                "hl": hl, "gl": gl, "search_type": search_type}
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            news_results = results.get("news_results", [])
-            urls = [result["link"] for result in news_results]
-            return urls
+            urls = self.cache.get_or_call("google_search", args, self._search)
+            if isinstance(urls, ToolError):
+                logger.warning(f"Google Search timed out for '{query}': {urls.message}")
+                return SearchError(query, urls.message)
+            return list(urls)
+        except QuotaExceeded as e:
+            logger.warning(f"Google Search skipped for '{query}': {e}")
+            return SearchError(query, str(e), 429)
+        except requests.HTTPError as e:
+            message = self._redact(str(e))
+            logger.error(f"Google Search failed for '{query}': {message}")
+            return SearchError(query, message, e.response.status_code if e.response is not None else None)
         except Exception as e:
-            return f"Error in performing Google Search: {e}"
+            message = self._redact(str(e))
+            logger.error(f"Google Search failed for '{query}': {message}")
+            return SearchError(query, message)
+
+    def google_search_many(self, queries: List[str], num_results=3, location="United States", hl="en", gl="us",
+                           search_type="news") -> Dict[str, Union[List[str], SearchError]]:
+        """
+        Performs several Google searches concurrently.
+
+        :return: A dictionary mapping each query to its URLs or its SearchError.
+        """
+        # A separate pool, so queries waiting on their pages never starve the shared page executor
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(queries))), thread_name_prefix="serpapi-query") as executor:
+            futures = {
+                query: executor.submit(self.google_search, query, num_results, location, hl, gl, search_type)
+                for query in queries
+            }
+            return {query: future.result() for query, future in futures.items()}
 
 
 # Usage Example
 if __name__ == "__main__":
     web = GoogleSearchManager()
     result = web.google_search("Is Sam Altman fired from OpenAI?")
-    if result is not None:
-        print(result)
+    if isinstance(result, SearchError):
+        logger.error(f"Failed to process the search query: {result}")
     else:
-        logger.error("Failed to process the search query.")
+        print(result)
@@ -0,0 +1,128 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPage:
+    """A cached page: its validators, compressed body and extracted text."""
+
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str], body: bytes, text: str,
+                 fetched_at: float):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+        self.text = text
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that revalidate this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    A persistent, size-bounded cache of fetched pages in a local SQLite file.
+
+    Each entry keeps the page body (zlib-compressed), the text extracted from it and the ``ETag``/``Last-Modified``
+    validators. Pages younger than ``fresh_for`` seconds are served without a request; older ones are revalidated
+    with a conditional request, and a ``304 Not Modified`` answer is served from the cache without re-parsing. When
+    the stored size exceeds ``max_bytes``, the least recently used pages are evicted.
+
+    :param path: The SQLite file to store pages in (created if needed).
+    :param max_bytes: The maximum total size of stored bodies and texts.
+    :param fresh_for: Seconds during which a cached page is used without revalidation.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, fresh_for: float = 300.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, text TEXT, "
+            "size INTEGER, fetched_at REAL, accessed_at REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+        self._connection.commit()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Returns the cached page for the URL, if any, and marks it as recently used."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, body, text, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._connection.commit()
+        etag, last_modified, body, text, fetched_at = row
+        return CachedPage(url, etag, last_modified, zlib.decompress(body) if body else b"", text, fetched_at)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age() < self.fresh_for
+
+    def put(self, url: str, body: bytes, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Stores a page and evicts least recently used pages if the cache is over its size limit."""
+        compressed = zlib.compress(body)
+        size = len(compressed) + len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, text, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, compressed, text, size, now, now)
+            )
+            self._evict()
+            self._connection.commit()
+
+    def touch(self, url: str):
+        """Marks a page as just revalidated (after a 304 answer)."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._connection.commit()
+
+    def _evict(self):
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._connection.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._connection.executemany("DELETE FROM pages WHERE url = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} pages from the page cache")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, total = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"pages": count, "bytes": total, "hits": self.hits, "revalidated": self.revalidated,
+                "misses": self.misses}
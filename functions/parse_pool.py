@@ -0,0 +1,89 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up() -> int:
+    # Imports the parser in the worker so the first real task does not pay for it
+    from bs4 import BeautifulSoup
+    BeautifulSoup(b"<p>warm</p>", "html.parser").get_text()
+    return os.getpid()
+
+
+def _mp_context():
+    # Forking a process that already runs threads (uvicorn, tool executors) can copy locks held by those threads
+    # into the children and deadlock them; workers are started from a clean server process instead
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class ParsePool:
+    """
+    Runs CPU-bound page processing (HTML parsing, text extraction, deduplication) in a pool of worker processes,
+    so it does not hold the GIL of the process serving requests.
+
+    The workers are started once and kept warm across requests. Pages are sent as the raw response bytes, which
+    pickle as a single buffer copy, and only the extracted text comes back. At most ``max_pending`` tasks are queued
+    or running at a time; callers beyond that wait for a slot, which bounds the memory held by queued pages.
+    If the pool breaks (e.g. a worker is killed), it is restarted and the task runs in the calling thread. Workers
+    are started with the "forkserver" method ("spawn" where it is not available), never forked from the threaded
+    service process.
+
+    :param workers: Number of worker processes (defaults to the number of CPUs).
+    :param max_pending: Maximum number of tasks queued or running (defaults to four per worker).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+        self._stats = {"completed": 0, "inline": 0, "restarts": 0}
+        self.warm()
+
+    def warm(self):
+        """Starts the worker processes and loads the parser in each of them."""
+        wait([self._executor.submit(_warm_up) for _ in range(self.workers)])
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not executor:
+                return  # Another thread already restarted it
+            logger.error("Parse pool is broken, restarting it")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+            self._stats["restarts"] += 1
+        executor.shutdown(wait=False)
+
+    def _record(self, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def run(self, func: Callable, *args):
+        """
+        Runs a picklable function (a module-level function or a method of a picklable object) in a worker process
+        and waits for its result. Blocks while ``max_pending`` tasks are already in the pool.
+        """
+        with self._slots:
+            executor = self._executor
+            try:
+                result = executor.submit(func, *args).result()
+                self._record("completed")
+                return result
+            except BrokenProcessPool:
+                self._restart(executor)
+        self._record("inline")
+        return func(*args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, max_pending=self.max_pending)
@@ -0,0 +1,165 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Union
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from core.rolling_stats import RollingStats
+from functions.google_search import SearchError
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("hedge", "race", "merge")
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a URL for de-duplication: no scheme, ``www.``, fragment, tracking parameters or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+class SearchProvider(RollingStats):
+    """
+    A named search backend: a callable taking ``(query, num_results)`` and returning a list of URLs. It may raise or
+    return a SearchError on failure.
+    """
+
+    def __init__(self, name: str, search: Callable[[str, int], Union[List[str], SearchError]], window: int = 50):
+        super().__init__(window)
+        self.name = name
+        self.search = search
+
+    def stats(self) -> Dict:
+        return dict(provider=self.name, **super().stats())
+
+
+class SearchBroker:
+    """
+    Runs one search across several providers and returns the first good result set, or a merged one.
+
+    Modes:
+    - ``hedge``: query the best-ranked provider first and start the next one only if no good result arrived within
+      ``hedge_delay`` seconds (or as soon as the previous one failed).
+    - ``race``: query all providers at once and return the first non-empty result set.
+    - ``merge``: query all providers at once, wait up to ``timeout`` and merge their URLs, de-duplicated.
+
+    Providers are ranked by their rolling latency and error rate; a provider that fails is put on cooldown for
+    ``error_cooldown`` seconds and only used when nothing better is left.
+    """
+
+    def __init__(
+            self,
+            providers: List[SearchProvider],
+            mode: str = "hedge",
+            hedge_delay: float = 1.5,
+            timeout: float = 15.0,
+            error_cooldown: float = 30.0
+    ):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+        if not providers:
+            raise ValueError("SearchBroker requires at least one provider")
+        self.providers = providers
+        self.mode = mode
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.error_cooldown = error_cooldown
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(providers), thread_name_prefix="search-broker")
+
+    def _ranked(self) -> List[SearchProvider]:
+        available = sorted((p for p in self.providers if p.is_available()), key=lambda p: p.score())
+        cooling = sorted((p for p in self.providers if not p.is_available()), key=lambda p: p.cooldown_until)
+        return available + cooling
+
+    def _run(self, provider: SearchProvider, query: str, num_results: int) -> List[str]:
+        """Runs one provider, recording its latency and outcome. Raises on failure or empty results."""
+        with provider._lock:
+            provider.in_flight += 1
+        start = time.monotonic()
+        try:
+            urls = provider.search(query, num_results)
+            if isinstance(urls, SearchError):
+                raise RuntimeError(urls.message)
+            provider.record_success(time.monotonic() - start)
+        except Exception as e:
+            provider.record_failure(self.error_cooldown)
+            logger.warning(f"Search provider '{provider.name}' failed for '{query}': {e}")
+            raise RuntimeError(f"{provider.name}: {e}") from e
+        finally:
+            with provider._lock:
+                provider.in_flight -= 1
+        if not urls:
+            raise LookupError(f"{provider.name} returned no results")
+        return list(urls)
+
+    def _first_good(self, providers: List[SearchProvider], query: str, num_results: int, delay: float) -> List[str]:
+        """Starts providers one after another every ``delay`` seconds and returns the first good result set."""
+        remaining = list(providers)
+        pending = set()
+        errors = []
+        deadline = time.monotonic() + self.timeout
+        while remaining or pending:
+            if remaining:
+                provider = remaining.pop(0)
+                pending.add(self._executor.submit(contextvars.copy_context().run, self._run, provider, query,
+                                                  num_results))
+            # Wait for the hedge delay before starting the next provider, or until the last one is done
+            timeout = delay if remaining else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                errors.append(str(future.exception()))
+            if not done and not remaining:
+                errors.append(f"timed out after {self.timeout}s")
+                break
+        raise RuntimeError("; ".join(errors) or "no search provider available")
+
+    def _merged(self, providers: List[SearchProvider], query: str, num_results: int) -> List[str]:
+        """Queries all providers and interleaves their URLs by provider rank, without duplicates."""
+        futures = [self._executor.submit(contextvars.copy_context().run, self._run, provider, query, num_results)
+                   for provider in providers]
+        wait(futures, timeout=self.timeout)
+        result_sets = [f.result() for f in futures if f.done() and f.exception() is None]
+        if not result_sets:
+            errors = [str(f.exception()) for f in futures if f.done() and f.exception() is not None]
+            raise RuntimeError("; ".join(errors) or f"timed out after {self.timeout}s")
+
+        urls, seen = [], set()
+        for rank in range(max(len(result_set) for result_set in result_sets)):
+            for result_set in result_sets:
+                if rank < len(result_set) and normalize_url(result_set[rank]) not in seen:
+                    seen.add(normalize_url(result_set[rank]))
+                    urls.append(result_set[rank])
+        return urls[:num_results]
+
+    def search(self, query: str, num_results: int = 3) -> Union[List[str], SearchError]:
+        """
+        Searches across the providers according to the broker's mode.
+
+        :param query: The search query.
+        :param num_results: The maximum number of URLs to return.
+        :return: A list of URLs, or a SearchError if no provider returned results.
+        """
+        providers = self._ranked()
+        try:
+            if self.mode == "merge":
+                return self._merged(providers, query, num_results)
+            delay = 0.0 if self.mode == "race" else self.hedge_delay
+            urls = self._first_good(providers, query, num_results, delay)
+            unique = {}
+            for url in urls:
+                unique.setdefault(normalize_url(url), url)
+            return list(unique.values())[:num_results]
+        except Exception as e:
+            return SearchError(query, str(e), provider=f"search ({', '.join(p.name for p in providers)})")
+
+    def stats(self) -> List[Dict]:
+        """Rolling statistics per provider."""
+        return [provider.stats() for provider in self.providers]
@@ -1,8 +1,15 @@
 import json
 import requests
 import config
+from core.quota import QuotaExceeded, quotas
+from core.result_encoding import result_encoding
+from core.tool_executor import time_left
 
 
+@result_encoding(fields=[
+    "name", "sys.country", "weather.description", "main.temp", "main.feels_like", "main.temp_min", "main.temp_max",
+    "main.humidity", "wind.speed", "clouds.all", "rain", "snow", "message", "error"
+])
 def get_weather(city, api_key=config.openweathermap_key):
     """Fetch the current weather for a given city using OpenWeatherMap API. The output should be in Markdown format.
 
@@ -15,8 +22,13 @@ def get_weather(city, api_key=config.openweathermap_key):
     """
     try:
         url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        response = requests.get(url)
-        return response.json()
+        # Within the OpenWeatherMap quota; when it is spent, the last weather seen for the city is returned
+        return quotas.call("openweathermap", " ".join(city.lower().split()),
+                           lambda: requests.get(url, timeout=time_left(10)).json())
+    except QuotaExceeded:
+        # Raised rather than returned, so the denial becomes a tool error that is neither cached nor used as a
+        # prefetched result
+        raise
     except Exception as e:
         return json.dumps({"error": f"Error occurred while fetching weather data: {e}"})
 
@@ -1,14 +1,48 @@
 import json
 
+import config
+from core.result_encoding import result_encoding
+from core.tool_registry import lazy
 from functions.duck_duck_go_search import DuckDuckGoSearchManager
-from functions.google_search import GoogleSearchManager
+from functions.google_search import GoogleSearchManager, SearchError
+from functions.page_cache import PageCache
+from functions.parse_pool import ParsePool
+from functions.search_broker import SearchBroker, SearchProvider
 from functions.web_scraper import WebContentScraper
 
-ddg = DuckDuckGoSearchManager()
-gs = GoogleSearchManager()
-scraper = WebContentScraper()
+# The clients are built on first use, so a tool only pays for what it needs (e.g. images_search never starts the
+# parse workers or opens the page cache).
+ddg = lazy(DuckDuckGoSearchManager)
+gs = lazy(GoogleSearchManager)
 
 
+@lazy
+def scraper() -> WebContentScraper:
+    page_cache = PageCache(config.page_cache_path, max_bytes=config.page_cache_max_mb * 1024 * 1024,
+                           fresh_for=config.page_cache_fresh_for) if config.page_cache_path else None
+    parse_pool = ParsePool(config.parse_workers, config.parse_max_pending or None) if config.parse_workers else None
+    return WebContentScraper(page_cache=page_cache, parse_pool=parse_pool)
+
+
+# Search brokers run the configured providers concurrently (or hedged) and keep the first good result set.
+# Google (SerpAPI) providers are only used when a SerpAPI key is configured.
+@lazy
+def text_broker() -> SearchBroker:
+    providers = [SearchProvider("duckduckgo", ddg().text_search)]
+    if config.serpapi_key:
+        providers.append(SearchProvider("google", lambda q, n: gs().google_search(q, n, search_type="web")))
+    return SearchBroker(providers, mode=config.search_mode, hedge_delay=config.search_hedge_delay)
+
+
+@lazy
+def news_broker() -> SearchBroker:
+    providers = [SearchProvider("duckduckgo", ddg().news_search)]
+    if config.serpapi_key:
+        providers.insert(0, SearchProvider("google", lambda q, n: gs().google_search(q, n, search_type="news")))
+    return SearchBroker(providers, mode=config.search_mode, hedge_delay=config.search_hedge_delay)
+
+
+@result_encoding(tabular=False)
 def text_search(query: str, num_results: int = 3) -> str:
     """Conducts a general web text search and retrieves information from the internet in response to user queries.
 
@@ -24,11 +58,14 @@ def text_search(query: str, num_results: int = 3) -> str:
     :return: A JSON-formatted string. Each element in the JSON represents the result of scraping a single URL,
     containing either the scraped content or an error message.
     """
-    urls = ddg.text_search(query, int(num_results))
-    scraped_data = scraper.scrape_multiple_websites(urls)
+    urls = text_broker().search(query, int(num_results))
+    if isinstance(urls, SearchError):
+        return json.dumps(urls.to_dict())
+    scraped_data = scraper().scrape_multiple_websites(urls)
     return scraped_data
 
 
+@result_encoding(tabular=False)
 def news_search(query, num_results=3):
     """Conducts a search for news articles and retrieves information from the internet in response to user queries.
 
@@ -44,12 +81,14 @@ def news_search(query, num_results=3):
     :return: A JSON-formatted string. Each element in the JSON represents the result of scraping a single URL,
     containing either the scraped content or an error message.
     """
-    # urls = ddg.news_search(query, int(num_results)) # DuckDuckGo search
-    urls = gs.google_search(query, int(num_results))  # Google search
-    scraped_data = scraper.scrape_multiple_websites(urls)
+    urls = news_broker().search(query, int(num_results))
+    if isinstance(urls, SearchError):
+        return json.dumps(urls.to_dict())
+    scraped_data = scraper().scrape_multiple_websites(urls)
     return scraped_data
 
 
+@result_encoding()
 def images_search(query, num_results=3):
     """Performs the image search for a specific query. For example, "puppies". If possible, the output should be in Markdown format.
 
@@ -61,10 +100,11 @@ def images_search(query, num_results=3):
     :return: A list of dictionaries, where each dictionary contains 'image' (URL of the actual image) and 'thumbnail' (URL of the image's thumbnail).
     """
 
-    image_info = ddg.images_search(query, int(num_results))
+    image_info = ddg().images_search(query, int(num_results))
     return image_info
 
 
+@result_encoding()
 def videos_search(query, num_results=3):
     """Performs the video for a specific query. For example, "video tutorial for Excel pivot table". If possible, the output should be in Markdown format.
 
@@ -76,10 +116,11 @@ def videos_search(query, num_results=3):
     :return: A list of dictionaries, where each dictionary represents a search result. Each dictionary contains two keys: 'title', title of the content, and 'content', URL to the resource.
     """
 
-    video_info = ddg.videos_search(query, int(num_results))
+    video_info = ddg().videos_search(query, int(num_results))
     return video_info
 
 
+@result_encoding()
 def maps_search(query, place, num_results=3):
     """Performs the location for a specific query. For example, "Italian restaurant in Berlin". If possible, the output should be in Markdown format.
 
@@ -91,10 +132,11 @@ def maps_search(query, place, num_results=3):
 
     :return: A list of dictionaries, each representing a restaurant. Each dictionary includes the location's title, address, phone number, URL, and a nested dictionary of operating hours with keys indicating days of the week and additional status information like 'closes_soon', 'is_open', and 'state_switch_time'.
     """
-    map_info = ddg.maps_search(query, place, int(num_results))
+    map_info = ddg().maps_search(query, place, int(num_results))
     return map_info
 
 
+@result_encoding()
 def webpage_scraper(url):
     """Scrape a webpage for its text content.
 
@@ -105,7 +147,7 @@ def webpage_scraper(url):
     :return: A JSON-formatted string containing the scraped text. In case of an error, it returns a JSON-formatted string with an error message.
     """
     try:
-        result = scraper.scrape_website(url)
+        result = scraper().scrape_website(url)
         return result
     except Exception as e:
         return json.dumps({"error": str(e)})
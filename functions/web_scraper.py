@@ -1,37 +1,79 @@
 import json
 import logging
+import time
 
 import requests
 from bs4 import BeautifulSoup
 
+from core.memory import track
+from core.tool_executor import is_cancelled, time_left
+from functions.dedup import NearDuplicateFilter
+from functions.domain_health import DomainHealthRegistry
+
 # Configure logging
 logging = logging.getLogger(__name__)
 
 
+def extract_text(content):
+    """Extracts the text of the paragraph elements of an HTML page, separated by newlines.
+
+    Kept at module level so it can run in a parse pool worker process.
+    """
+    soup = BeautifulSoup(content, "html.parser")
+    return "\n".join(paragraph.get_text() for paragraph in soup.find_all("p"))
+
+
 class WebContentScraper:
-    def __init__(self, user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"):
+    def __init__(self, user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)", timeout=10,
+                 domain_health=None, page_cache=None, duplicate_filter=None, parse_pool=None):
         self.headers = {"User-Agent": user_agent}
+        self.timeout = timeout
+        self.domain_health = domain_health or DomainHealthRegistry()
+        self.page_cache = page_cache
+        self.duplicate_filter = duplicate_filter or NearDuplicateFilter()
+        self.parse_pool = parse_pool
 
-    def _fetch_page_content(self, url):
-        """Fetches the content of a web page from a given URL.
+    def _fetch_response(self, url, extra_headers=None):
+        """Requests a web page, optionally with extra (e.g. conditional) headers.
 
         Parameters:
         - url (str): The URL of the web page to be fetched.
+        - extra_headers (dict): Headers sent in addition to the default ones.
 
         Returns:
-        - bytes: The content of the web page in bytes if the request is successful; otherwise, None.
+        - requests.Response: The response if the request is successful (including 304 Not Modified);
+          otherwise, None. Failures are recorded in the domain health registry.
         """
         try:
-            response = requests.get(url, headers=self.headers)
+            response = requests.get(url, headers=dict(self.headers, **(extra_headers or {})),
+                                    timeout=time_left(self.timeout))
             response.raise_for_status()  # Raises HTTPError for bad requests
-            return response.content
+            return response
         except requests.exceptions.HTTPError as http_err:
             logging.error(f"HTTP error occurred: {http_err}")
+            self.domain_health.record_failure(url, f"HTTP {http_err.response.status_code}")
+            return None
+        except requests.exceptions.Timeout as timeout_err:
+            logging.error(f"Timeout occurred: {timeout_err}")
+            self.domain_health.record_failure(url, "timeout")
             return None
         except Exception as err:
             logging.error(f"Error occurred: {err}")
+            self.domain_health.record_failure(url, type(err).__name__)
             return None
 
+    def _fetch_page_content(self, url):
+        """Fetches the content of a web page from a given URL.
+
+        Parameters:
+        - url (str): The URL of the web page to be fetched.
+
+        Returns:
+        - bytes: The content of the web page in bytes if the request is successful; otherwise, None.
+        """
+        response = self._fetch_response(url)
+        return response.content if response is not None else None
+
     def _parse_web_content(self, content):
         """Parses HTML content and extracts text from it.
 
@@ -42,15 +84,18 @@ class WebContentScraper:
         Returns:
         - str: A single string containing all the extracted text from paragraph elements,
           separated by newlines. If parsing fails, returns None.
+
+        With a parse pool, the parsing runs in a worker process.
         """
         try:
-            soup = BeautifulSoup(content, "html.parser")
-            paragraphs = soup.find_all("p")
-            return "\n".join(paragraph.get_text() for paragraph in paragraphs)
+            if self.parse_pool:
+                return self.parse_pool.run(extract_text, content)
+            return extract_text(content)
         except Exception as e:
             logging.error(f"Failed to parse the content: {e}")
             return None
 
+    @track("scraper.scrape_website")
     def scrape_website(self, url):
         """Scrapes the content from a given website URL.
 
@@ -62,16 +107,54 @@ class WebContentScraper:
             - 'url': The URL of the website.
             - 'content': The scraped and parsed content from the website, if successful.
             - 'error': An error message, if the scraping process failed at any stage.
+
+        With a page cache, fresh pages are served from it, and stale ones are revalidated with a
+        conditional request; a 304 answer reuses the cached text without parsing the page again.
         """
         logging.debug(f"Scraping URL: {url}")
-        page_content = self._fetch_page_content(url)
-        if page_content:
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached is not None and self.page_cache.is_fresh(cached):
+            self.page_cache.hits += 1
+            return {"url": url, "content": cached.text}
+        if not self.domain_health.allow(url):
+            return {"url": url, "error": "Skipped: the domain has been failing recently"}
+
+        try:
+            return self._fetch_and_parse(url, cached)
+        finally:
+            # A probe of a failing domain must not stay pending, whatever happened to it
+            self.domain_health.end_probe(url)
+
+    def _fetch_and_parse(self, url, cached):
+        """Fetches (or revalidates) and parses a page, recording the outcome in the domain health registry."""
+        start = time.monotonic()
+        response = self._fetch_response(url, cached.validators() if cached else None)
+        if response is not None and response.status_code == 304 and cached is not None:
+            self.page_cache.revalidated += 1
+            self.page_cache.touch(url)
+            self.domain_health.record_success(url, time.monotonic() - start)
+            return {"url": url, "content": cached.text}
+        if response is None:
+            return {"url": url, "error": "Failed to fetch page content"}
+
+        page_content = response.content
+        if not page_content:
+            self.domain_health.record_empty(url)
+            return {"url": url, "error": "Failed to fetch page content"}
+        try:
             parsed_content = self._parse_web_content(page_content)
-            if parsed_content:
-                return {"url": url, "content": parsed_content}
-            else:
-                return {"url": url, "error": "Failed to parse content"}
-        return {"url": url, "error": "Failed to fetch page content"}
+        except Exception as e:
+            self.domain_health.record_failure(url, type(e).__name__)
+            raise
+        if not parsed_content:
+            self.domain_health.record_empty(url)
+            return {"url": url, "error": "Failed to parse content"}
+        self.domain_health.record_success(url, time.monotonic() - start)
+        if self.page_cache:
+            self.page_cache.misses += 1
+            self.page_cache.put(url, page_content, parsed_content, response.headers.get("ETag"),
+                                response.headers.get("Last-Modified"))
+        return {"url": url, "content": parsed_content}
 
     def scrape_multiple_websites(self, urls):
         """Scrapes the content from multiple websites.
@@ -82,9 +165,27 @@ class WebContentScraper:
         Returns:
         - str: A JSON-formatted string. Each element in the JSON represents the result
           of scraping a single URL, containing either the scraped content or an error message.
+          URLs from healthy domains come first; domains whose circuit is open are skipped.
+          Near-duplicate pages are collapsed into one entry listing the other sources under
+          'duplicate_urls', and repeated boilerplate paragraphs are removed (in the parse pool, if any).
+          When the tool call runs out of time, the remaining URLs are skipped and the pages scraped so far
+          are returned.
         """
+        if isinstance(urls, str):
+            return json.dumps({"error": f"Expected a list of URLs, got a string: {urls}"})
         try:
-            return json.dumps([self.scrape_website(url) for url in urls], indent=2)
+            urls = self.domain_health.order(urls)
+            results = []
+            for url in urls:
+                if is_cancelled():
+                    results.append({"url": url, "error": "Skipped: out of time"})
+                else:
+                    results.append(self.scrape_website(url))
+            if self.parse_pool:
+                results = self.parse_pool.run(self.duplicate_filter.filter, results)
+            else:
+                results = self.duplicate_filter.filter(results)
+            return json.dumps(results, indent=2)
         except Exception as e:
             logging.error(f"Error during scraping multiple websites: {e}")
             return json.dumps({"error": str(e)})
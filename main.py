@@ -1,22 +1,33 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal
 import logging
 
 from core.azure_functions import AzureOpenAIFunctions
+from core.batch import BatchRunner
+from core.deployment_pool import DeploymentPool
+from core.history import HistoryCompactor
+from core.memory import profiler, track
+from core.quota import quotas
+from core.speculation import Speculator, extract_urls, extract_weather_city
+from core.tool_cache import ToolCache
+from core.tool_executor import ToolExecutor
+from core.tool_registry import ToolRegistry
+from core.tool_router import ToolRouter
 import config
-import functions.argocd as argocd
-import functions.web_browsing as browser
-import functions.weather as weather
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 logger.propagate = True
 
+if config.memory_profiling:
+    profiler.frames = config.memory_profiling_frames
+    profiler.start()
+
 
 # -- The message schema for the assistant
 class Message(BaseModel):
@@ -42,7 +53,7 @@ app.add_middleware(
 
 # -- Exception handler for the FastAPI app
 @app.exception_handler(RequestValidationError)
-async def validation_exception_handler(exc):
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return PlainTextResponse(str(exc), status_code=400)
 
 
@@ -60,38 +71,144 @@ The weather function provides real-time capabilities to offer current weather up
 All your responses should be in a human-readable format.
 """
 
+# Initialize the deployment pool used to route completions across the configured Azure OpenAI deployments
+deployment_pool = DeploymentPool.from_config()
+
+# Tool results are cached and shared across conversations, including batch items
+tool_cache = ToolCache(ttl=config.tool_cache_ttl)
+
+# The functions exposed to the assistant, per integration. They are declared by import path: their schemas come from
+# the tool manifest, and each module is only imported (and its clients built) when one of its tools is first called.
+# Installed packages can add tools through the "azure_openai_function_calling.tools" entry point group.
+integrations = {
+    "argocd": [
+        "functions.argocd:get_available_applications",
+        "functions.argocd:get_application_status",
+        "functions.argocd:get_application_logs",
+        "functions.argocd:get_unhealthy_resources",
+    ],
+    "weather": ["functions.weather:get_weather"],
+    "web": [
+        "functions.web_browsing:text_search",
+        "functions.web_browsing:news_search",
+        "functions.web_browsing:images_search",
+        "functions.web_browsing:videos_search",
+        "functions.web_browsing:maps_search",
+        "functions.web_browsing:webpage_scraper",
+    ],
+}
+tool_registry = ToolRegistry.from_config(integrations)
+functions = tool_registry.tools()
+
+# Extra keywords that help the tool router match user questions the docstrings do not spell out
+tool_keywords = {
+    "get_available_applications": ["argocd", "applications", "apps", "deployed", "cluster", "kubernetes", "how many"],
+    "get_application_status": ["argocd", "status", "health", "sync", "degraded", "healthy"],
+    "get_application_logs": ["argocd", "logs", "errors", "crashing", "failing", "why", "pod", "container"],
+    "get_unhealthy_resources": ["argocd", "degraded", "unhealthy", "resources", "pods", "why", "missing"],
+    "get_weather": ["weather", "rain", "temperature", "forecast", "sunny", "snow", "wind", "humidity"],
+    "text_search": ["information", "about", "explain", "person"],
+    "news_search": ["news", "happened", "latest", "today", "recent", "fired", "announced"],
+    "images_search": ["images", "pictures", "photos"],
+    "videos_search": ["videos", "tutorial", "youtube", "watch"],
+    "maps_search": ["restaurants", "near", "address", "places", "hotels", "cafes", "suggestions"],
+    "webpage_scraper": ["summarize", "article", "page", "link", "url"],
+}
+
 # Initialize the assistant (GPT Model) with the functions
 assistant = AzureOpenAIFunctions(
     azure_openai_endpoint=config.azure_openai_endpoint,
     azure_openai_key_key=config.azure_openai_key_key,
     azure_api_version=config.azure_api_version,
     model=config.azure_openai_deployment_name,
-    functions=[
-        argocd.get_available_applications,
-        argocd.get_application_status,
-        weather.get_weather,
-        browser.text_search,
-        browser.news_search,
-        browser.images_search,
-        browser.videos_search,
-        browser.maps_search,
-        browser.webpage_scraper
-    ]
+    functions=functions,
+    deployment_pool=deployment_pool,
+    hedge_final_answer=config.azure_openai_hedge_final_answer,
+    tool_cache=tool_cache,
+    tool_router=ToolRouter(keywords=tool_keywords) if config.tool_routing_enabled else None,
+    system_prompt=system_prompt,
+    speculator=Speculator({
+        "webpage_scraper": extract_urls,
+        "get_weather": extract_weather_city,
+    }) if config.speculative_tools_enabled else None,
+    history_compactor=HistoryCompactor(
+        max_prompt_tokens=config.history_max_tokens,
+        keep_recent=config.history_keep_recent
+    ) if config.history_max_tokens > 0 else None,
+    tool_executor=ToolExecutor.from_config(),
+    stream_function_calls=config.stream_function_calls
 )
 
 
 # -- FastAPI endpoints
+@app.post("/assistant/batch")
+async def batch_endpoint(request: Request,
+                         concurrency: int = Query(config.batch_concurrency, ge=1, le=config.batch_concurrency)):
+    """
+    Runs a JSONL body of conversations concurrently and streams JSONL results back in completion order. Clients may
+    lower the concurrency, but not raise it above BATCH_CONCURRENCY.
+    """
+    body = await request.body()
+    runner = BatchRunner(assistant, concurrency=concurrency)
+    return StreamingResponse(runner.run_jsonl(body.decode("utf-8").splitlines()), media_type="application/x-ndjson")
+
+
 @app.post("/assistant/{conversation_id}")
 async def endpoint(conversation_id: str, conversation: Conversation):
-    system_message = Message(role='system', content=system_prompt)
-    conversation.conversation.insert(0, system_message)
     conversation_dict = [message.model_dump() for message in conversation.conversation]
-    logger.debug(f"Conversation: {conversation_dict}")
-    response = assistant.ask(conversation_dict)
-    logger.debug(f"Reply: {response.choices[0].message.content}")
+    logger.debug("Conversation: %s", conversation_dict)
+    with track("endpoint.assistant"):
+        response = assistant.ask(conversation_dict, conversation_id=conversation_id)
+    logger.debug("Reply: %s", response.choices[0].message.content)
     return {"id": conversation_id, "reply": response.choices[0].message.content}
 
 
+@app.get("/deployments/stats")
+async def deployment_stats():
+    return {"deployments": deployment_pool.stats()}
+
+
+@app.get("/prompt-cache/stats")
+async def prompt_cache_stats():
+    return assistant.prompt_cache_stats.stats()
+
+
+@app.get("/speculation/stats")
+async def speculation_stats():
+    return assistant.speculator.stats() if assistant.speculator else {}
+
+
+@app.get("/tools/stats")
+async def tool_stats():
+    return {"tools": assistant.tool_executor.stats()}
+
+
+@app.get("/tools/registry")
+async def tool_registry_stats():
+    """The registered tools and whether their module has been loaded yet."""
+    return {"tools": tool_registry.stats()}
+
+
+@app.get("/quotas/stats")
+async def quota_stats():
+    """The remaining quota of each third-party provider."""
+    return {"providers": quotas.stats()}
+
+
+@app.get("/debug/memory")
+async def memory_stats(limit: int = 20, group_by: Literal["traceback", "lineno", "filename"] = "traceback"):
+    """Memory accounting per span and the call sites that allocated most since the baseline (MEMORY_PROFILING)."""
+    return profiler.stats(limit=limit, group_by=group_by)
+
+
+@app.post("/debug/memory/reset")
+async def memory_reset():
+    """Takes a new baseline snapshot, e.g. after warm-up, so only later growth is listed."""
+    if profiler.enabled:
+        profiler.reset()
+    return {"enabled": profiler.enabled}
+
+
 # -- Test the assistant. This is not part of the FastAPI app, only for demonstration purposes.
 if __name__ == "__main__":
     prompt = "Is Sam Altman fired from OpenAI?"
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Adds the parent directory to sys.path to access the 'core', 'functions' and 'fakes' packages
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
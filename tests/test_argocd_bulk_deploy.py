@@ -0,0 +1,102 @@
+import pytest
+import yaml
+
+import config
+from fakes.argocd import FakeArgoCDServer
+from functions.argocd_controller import ArgoCDController, normalize_spec
+
+
+def application(name, revision=None, **spec):
+    source = {"repoURL": "https://github.com/example/apps.git", "path": name}
+    if revision:
+        source["targetRevision"] = revision
+    return {
+        "apiVersion": "argoproj.io/v1alpha1",
+        "kind": "Application",
+        "metadata": {"name": name},
+        "spec": dict({"source": source, "destination": {"server": "https://kubernetes.default.svc",
+                                                         "namespace": name}}, **spec),
+    }
+
+
+def write_manifests(directory, manifests):
+    for manifest in manifests:
+        (directory / f"{manifest['metadata']['name']}.yaml").write_text(yaml.safe_dump(manifest))
+    return str(directory)
+
+
+@pytest.fixture
+def argocd():
+    with FakeArgoCDServer() as server:
+        yield server
+
+
+@pytest.fixture
+def controller(argocd):
+    return ArgoCDController(argocd.url, argocd.token)
+
+
+def test_creates_then_skips_unchanged_applications(argocd, controller, tmp_path):
+    manifests = write_manifests(tmp_path, [application(f"app-{i}") for i in range(5)])
+
+    first = controller.bulk_deploy(manifests)
+    requests_before = dict(argocd.requests)
+    second = controller.bulk_deploy(manifests)
+
+    assert first["summary"] == {"created": 5}
+    # The server filled in spec.project and targetRevision; those defaults do not count as changes
+    assert second["summary"] == {"unchanged": 5}
+    assert argocd.requests["GET"] - requests_before["GET"] == 1
+    assert argocd.requests.get("PUT", 0) == 0
+
+
+def test_updates_only_changed_applications(argocd, controller, tmp_path):
+    write_manifests(tmp_path, [application("api"), application("web")])
+    controller.bulk_deploy(str(tmp_path))
+    write_manifests(tmp_path, [application("api", revision="v2")])
+
+    result = controller.bulk_deploy(str(tmp_path))
+
+    assert {entry["app"]: entry["action"] for entry in result["results"]} == {"api": "updated", "web": "unchanged"}
+    assert argocd.applications["api"]["spec"]["source"]["targetRevision"] == "v2"
+
+
+def test_removed_field_is_an_update(argocd, controller, tmp_path):
+    sync_policy = {"automated": {"prune": True, "selfHeal": True}}
+    write_manifests(tmp_path, [application("api", syncPolicy=sync_policy)])
+    controller.bulk_deploy(str(tmp_path))
+    write_manifests(tmp_path, [application("api")])
+
+    result = controller.bulk_deploy(str(tmp_path))
+
+    assert result["summary"] == {"updated": 1}
+    assert "syncPolicy" not in argocd.applications["api"]["spec"]
+
+
+def test_dry_run_changes_nothing(argocd, controller, tmp_path):
+    result = controller.bulk_deploy(write_manifests(tmp_path, [application("api")]), dry_run=True)
+
+    assert result["summary"] == {"create": 1}
+    assert argocd.applications == {}
+
+
+def test_reports_invalid_manifests(argocd, controller, tmp_path):
+    (tmp_path / "broken.yaml").write_text("metadata: [unclosed")
+    (tmp_path / "nameless.yaml").write_text(yaml.safe_dump({"spec": {}}))
+    write_manifests(tmp_path, [application("api")])
+
+    result = controller.bulk_deploy(str(tmp_path))
+
+    assert result["summary"] == {"created": 1, "failed": 2}
+
+
+def test_normalize_spec_strips_only_server_defaults():
+    spec = {"project": "default", "source": {"path": "api", "targetRevision": "HEAD"}, "syncPolicy": {}}
+    assert normalize_spec(spec) == {"source": {"path": "api"}, "syncPolicy": {}}
+    assert normalize_spec({"project": "payments"}) == {"project": "payments"}
+
+
+def test_missing_api_key_fails_only_when_used(monkeypatch):
+    monkeypatch.setattr(config, "argocd_api_key", None)
+    with pytest.raises(ValueError):
+        ArgoCDController()
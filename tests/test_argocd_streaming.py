@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from fakes.argocd import FakeArgoCDServer
+from functions.argocd_controller import ArgoCDController, TailWindow, iter_json_array
+
+TREE = {"nodes": [
+    {"kind": "Deployment", "name": "api", "namespace": "shop", "health": {"status": "Healthy"}},
+    {"kind": "Pod", "name": "api-1", "namespace": "shop",
+     "health": {"status": "Degraded", "message": "Back-off restarting failed container 'ünïcode'"}},
+    {"kind": "Service", "name": "api", "namespace": "shop"},
+], "hosts": []}
+
+
+@pytest.fixture
+def argocd():
+    with FakeArgoCDServer() as server:
+        yield server
+
+
+@pytest.fixture
+def controller(argocd):
+    return ArgoCDController(argocd.url, argocd.token)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_iter_json_array_across_chunk_boundaries(size):
+    data = json.dumps({"metadata": {"nodes": "not this"}, "nodes": TREE["nodes"]}).encode("utf-8")
+    chunks = [data[start:start + size] for start in range(0, len(data), size)]
+
+    assert list(iter_json_array(chunks, "nodes")) == TREE["nodes"]
+
+
+def test_iter_json_array_stops_at_the_end_of_the_array():
+    def chunks():
+        yield b'{"nodes": [{"a": 1}, {"a": 2}], "rest": '
+        raise AssertionError("read past the array")
+
+    assert list(iter_json_array(chunks(), "nodes")) == [{"a": 1}, {"a": 2}]
+
+
+def test_tail_window_keeps_the_newest_items():
+    window = TailWindow(max_bytes=10, max_items=3)
+    for i in range(6):
+        window.append(i, 3)
+
+    assert list(window) == [3, 4, 5]
+    assert window.dropped == 3 and window.bytes == 9
+
+
+def test_logs_are_condensed_to_distinct_errors(argocd, controller):
+    argocd.add_logs("shop", ["GET /health 200"] * 5 + [f"ERROR payment {i} failed: timeout" for i in range(4)]
+                    + ["Traceback (most recent call last):"])
+
+    result = controller.get_application_logs("shop", context_lines=3)
+
+    assert result["error_lines"] == 5 and not result["truncated"]
+    assert result["errors"][0]["count"] == 4 and "payment 0 failed" in result["errors"][0]["line"]
+    assert result["last_lines"] == ["ERROR payment 2 failed: timeout", "ERROR payment 3 failed: timeout",
+                                    "Traceback (most recent call last):"]
+
+
+def test_truncated_logs_keep_the_newest_lines(argocd, controller):
+    argocd.add_logs("shop", [f"GET /items/{i} 200" for i in range(500)] + ["FATAL out of memory"])
+
+    result = controller.get_application_logs("shop", max_lines=100)
+
+    assert result["truncated"] and result["older_lines_dropped"] == 401
+    assert result["errors"] == [{"line": "shop-7d9f8c6b5-x2x4q: FATAL out of memory", "count": 1}]
+    assert result["last_lines"][-1] == "FATAL out of memory"
+
+
+def test_logs_pass_filters_to_the_server(argocd, controller):
+    argocd.add_logs("shop", ["ERROR in sidecar"], container="sidecar")
+    argocd.add_logs("shop", ["ERROR in main"])
+
+    result = controller.get_application_logs("shop", container="main", tail_lines=10)
+
+    assert [error["line"] for error in result["errors"]] == ["shop-7d9f8c6b5-x2x4q: ERROR in main"]
+    assert argocd.queries[-1]["tailLines"] == "10" and argocd.queries[-1]["container"] == "main"
+
+
+def test_resource_tree_is_condensed_to_unhealthy_resources(argocd, controller):
+    argocd.resource_trees["shop"] = TREE
+
+    result = controller.get_application_resource_tree("shop")
+
+    assert result["resource_count"] == 3
+    assert result["health"] == {"Healthy": 1, "Degraded": 1, "None": 1}
+    assert result["resources"] == [{"kind": "Pod", "name": "api-1", "namespace": "shop", "health": "Degraded",
+                                    "message": "Back-off restarting failed container 'ünïcode'"}]
+
+
+def test_resource_tree_stops_reading_at_the_budget(argocd, controller):
+    argocd.resource_trees["big"] = {"nodes": [{"kind": "Pod", "name": f"pod-{i}" + "x" * 200,
+                                               "health": {"status": "Healthy"}} for i in range(20000)]}
+
+    result = controller.get_application_resource_tree("big", max_bytes=64 * 1024)
+
+    assert result["truncated"] and 0 < result["resource_count"] < 20000
@@ -0,0 +1,81 @@
+from functions.dedup import NearDuplicateFilter
+
+ARTICLE = "\n".join([
+    "The company announced on Monday that its privacy policy will change next month.",
+    "Users will be asked to accept new cookie settings when they sign in.",
+    "Regulators said they would review the change before it takes effect, according to a statement released by "
+    "the agency late on Monday evening after a meeting with consumer groups and the company's lawyers.",
+])
+
+
+def test_keeps_keyword_paragraphs_found_on_one_page():
+    results = NearDuplicateFilter().filter([{"url": "https://news.example/privacy", "content": ARTICLE}])
+
+    assert results[0]["content"] == ARTICLE
+
+
+def test_drops_boilerplate_repeated_across_pages():
+    banner = "We use cookies to improve your experience."
+    pages = [
+        {"url": "https://a.example/story", "content": f"Alpha reports the first part of the story.\n{banner}"},
+        {"url": "https://b.example/other", "content": f"Beta covers an entirely different event today.\n{banner}"},
+    ]
+
+    results = NearDuplicateFilter().filter(pages)
+
+    assert [result["content"] for result in results] == [
+        "Alpha reports the first part of the story.",
+        "Beta covers an entirely different event today.",
+    ]
+
+
+def test_drops_short_paragraphs_repeated_on_many_pages():
+    footer = "Copyright Example Media Group"
+    pages = [{"url": f"https://{name}.example/", "content": f"{name} has its own unique content here.\n{footer}"}
+             for name in ("alpha", "beta", "gamma")]
+
+    results = NearDuplicateFilter().filter(pages)
+
+    assert all(footer not in result["content"] for result in results)
+
+
+def test_collapses_near_duplicate_pages():
+    story = " ".join(f"Sentence {i} of the syndicated story covers district {i * 7} and its {i + 2} candidates."
+                     for i in range(30))
+    pages = [{"url": "https://a.example/story", "content": story},
+             {"url": "https://b.example/copy", "content": story + " (Reuters)"}]
+
+    results = NearDuplicateFilter().filter(pages)
+
+    assert len(results) == 1
+    assert results[0]["duplicate_urls"] == ["https://b.example/copy"]
+
+
+def test_keeps_pages_emptied_only_by_boilerplate():
+    banner = "Subscribe to our newsletter for daily updates."
+    pages = [
+        {"url": "https://a.example/story", "content": f"Alpha reports the first part of the story.\n{banner}"},
+        {"url": "https://paywall.example/story", "content": banner},
+    ]
+
+    results = NearDuplicateFilter().filter(pages)
+
+    assert [(result["url"], result["content"]) for result in results] == [
+        ("https://a.example/story", "Alpha reports the first part of the story."),
+        ("https://paywall.example/story", ""),
+    ]
+
+
+def test_drops_pages_whose_paragraphs_all_appear_elsewhere():
+    first = "Alpha reports the first part of the story in detail."
+    second = "Beta adds a second, independent account of the events."
+    pages = [
+        {"url": "https://a.example/story", "content": first},
+        {"url": "https://b.example/story", "content": second},
+        {"url": "https://c.example/roundup", "content": f"{second}\n{first}"},
+    ]
+
+    results = NearDuplicateFilter().filter(pages)
+
+    assert [result["url"] for result in results] == ["https://a.example/story", "https://b.example/story"]
+    assert results[1]["duplicate_urls"] == ["https://c.example/roundup"]
@@ -0,0 +1,78 @@
+import pytest
+
+from core.deployment_pool import AzureDeployment, DeploymentPool
+from fakes.azure_openai import FakeAzureOpenAIServer
+
+API_VERSION = "2023-07-01-preview"
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(name, **kwargs):
+        server = FakeAzureOpenAIServer(name, **kwargs).start()
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.stop()
+
+
+def deployment(server):
+    return AzureDeployment(server.endpoint, "fake-key", API_VERSION, "gpt-4", region=server.name)
+
+
+def test_fails_over_from_throttled_deployment(servers):
+    throttled, healthy = servers("throttled", fail_status=429), servers("healthy")
+    pool = DeploymentPool([deployment(throttled), deployment(healthy)])
+
+    reply = pool.create_chat_completion(messages=MESSAGES)
+
+    assert reply.choices[0].message.content == "Reply from healthy"
+    assert throttled.request_count == 1
+    # The throttled deployment is cooling down for its Retry-After, so the next call skips it
+    assert not pool.deployments[0].is_available()
+    pool.create_chat_completion(messages=MESSAGES)
+    assert throttled.request_count == 1
+    assert healthy.request_count == 2
+
+
+def test_fails_over_from_unavailable_deployment(servers):
+    failing, healthy = servers("failing", fail_status=500), servers("healthy")
+    pool = DeploymentPool([deployment(failing), deployment(healthy)])
+
+    assert pool.create_chat_completion(messages=MESSAGES).choices[0].message.content == "Reply from healthy"
+    assert pool.deployments[0].error_rate() == 1.0
+
+
+def test_raises_when_every_deployment_fails(servers):
+    pool = DeploymentPool([deployment(servers("a", fail_status=429)), deployment(servers("b", fail_status=503))])
+
+    with pytest.raises(Exception):
+        pool.create_chat_completion(messages=MESSAGES)
+
+
+def test_hedges_slow_primary_on_second_deployment(servers):
+    slow, fast = servers("slow", latency=1.0), servers("fast")
+    pool = DeploymentPool([deployment(slow), deployment(fast)], min_hedge_delay=0.05)
+    # The slow deployment looks fast from its history, so it is picked first and hedged after its p95 latency
+    pool.deployments[0].record_success(0.05)
+
+    reply = pool.create_chat_completion(messages=MESSAGES, hedge=True)
+
+    assert reply.choices[0].message.content == "Reply from fast"
+    assert slow.request_count == 1 and fast.request_count == 1
+
+
+def test_does_not_hedge_fast_primary(servers):
+    primary, secondary = servers("primary"), servers("secondary")
+    pool = DeploymentPool([deployment(primary), deployment(secondary)], min_hedge_delay=0.5)
+    pool.deployments[0].record_success(0.01)
+
+    reply = pool.create_chat_completion(messages=MESSAGES, hedge=True)
+
+    assert reply.choices[0].message.content == "Reply from primary"
+    assert secondary.request_count == 0
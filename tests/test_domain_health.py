@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from fakes.web import FakeWebServer
+from functions.domain_health import CLOSED, OPEN, DomainHealthRegistry
+from functions.web_scraper import WebContentScraper
+
+PAGE = "<html><body><p>" + "Some article text. " * 20 + "</p></body></html>"
+
+
+@pytest.fixture
+def web():
+    with FakeWebServer({"/page": PAGE, "/empty": ""}) as server:
+        server.fail_status["/broken"] = 500
+        yield server
+
+
+def open_circuit(scraper, web):
+    for _ in range(3):
+        scraper.scrape_website(web.url("/broken"))
+    assert scraper.domain_health._get(web.url("/page")).state == OPEN
+
+
+def test_back_to_back_failures_open_the_circuit(web):
+    scraper = WebContentScraper(domain_health=DomainHealthRegistry(open_duration=60))
+    open_circuit(scraper, web)
+
+    result = scraper.scrape_website(web.url("/page"))
+
+    assert result["error"] == "Skipped: the domain has been failing recently"
+    assert "/page" not in web.requests
+
+
+def test_failures_decay_after_the_burst_window():
+    registry = DomainHealthRegistry(half_life=1.0, burst_window=0.0)
+    registry.record_failure("https://example.com/a", "timeout")
+    time.sleep(0.2)
+    assert registry._get("https://example.com").decayed_score(registry.half_life) < 1.0
+
+
+def test_probe_with_empty_body_does_not_stay_pending(web):
+    registry = DomainHealthRegistry(open_duration=0.05)
+    scraper = WebContentScraper(domain_health=registry)
+    open_circuit(scraper, web)
+    time.sleep(0.06)
+
+    assert scraper.scrape_website(web.url("/empty"))["error"]
+    health = registry._get(web.url("/page"))
+    assert health.state == OPEN and not health.probing
+
+    time.sleep(health.open_for + 0.01)
+    assert scraper.scrape_website(web.url("/page"))["content"]
+    assert health.state == CLOSED
+
+
+def test_probe_that_raises_does_not_stay_pending(web, monkeypatch):
+    registry = DomainHealthRegistry(open_duration=0.05)
+    scraper = WebContentScraper(domain_health=registry)
+    open_circuit(scraper, web)
+    time.sleep(0.06)
+
+    def explode(content):
+        raise RuntimeError("parser crashed")
+
+    monkeypatch.setattr(scraper, "_parse_web_content", explode)
+    with pytest.raises(RuntimeError):
+        scraper.scrape_website(web.url("/page"))
+    health = registry._get(web.url("/page"))
+    assert not health.probing
+
+    monkeypatch.undo()
+    time.sleep(health.open_for + 0.01)
+    assert scraper.scrape_website(web.url("/page"))["content"]
+
+
+def test_forgets_idle_closed_circuits_but_keeps_open_ones():
+    registry = DomainHealthRegistry(max_domains=3, threshold=1.0)
+    registry.record_failure("https://failing.example/a", "timeout")
+    for i in range(10):
+        registry.record_success(f"https://site{i}.example/", 0.1)
+
+    domains = [health["domain"] for health in registry.stats()]
+    assert len(domains) == 3
+    assert "failing.example" in domains and "site9.example" in domains
+    assert not registry.allow("https://failing.example/b")
@@ -0,0 +1,89 @@
+from core.history import SUMMARY_PREFIX, HistoryCompactor, message_tokens
+
+
+def conversation(turns, words=40):
+    messages = [{"role": "system", "content": "You are helpful."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: " + "word " * words})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "word " * words})
+    return messages
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, summary, messages):
+        self.calls.append((summary, [message["content"].split(":")[0] for message in messages]))
+        return f"{summary or ''}+{len(messages)}"
+
+
+def test_short_conversations_are_untouched():
+    messages = conversation(2)
+    assert HistoryCompactor(max_prompt_tokens=10000).compact("c", messages, RecordingSummarizer()) is messages
+
+
+def test_keeps_system_messages_a_summary_and_recent_messages():
+    compactor = HistoryCompactor(max_prompt_tokens=300, keep_recent=2)
+    summarize = RecordingSummarizer()
+
+    compacted = compactor.compact("c", conversation(6), summarize)
+
+    assert compacted[0] == {"role": "system", "content": "You are helpful."}
+    assert compacted[1]["content"].startswith(SUMMARY_PREFIX)
+    assert [message["content"].split(":")[0] for message in compacted[2:]] == ["Question 5", "Answer 5"]
+    assert message_tokens(compacted) <= 300
+
+
+def test_later_turns_only_summarize_new_messages():
+    compactor = HistoryCompactor(max_prompt_tokens=300, keep_recent=2)
+    summarize = RecordingSummarizer()
+    messages = conversation(6)
+
+    compactor.compact("c", messages, summarize)
+    messages = messages + [{"role": "user", "content": "Question 6: " + "word " * 40},
+                           {"role": "assistant", "content": "Answer 6: " + "word " * 40}]
+    compacted = compactor.compact("c", messages, summarize)
+
+    assert summarize.calls[-1] == ("+10", ["Question 5", "Answer 5"])
+    assert compacted[1]["content"] == SUMMARY_PREFIX + "+10+2"
+
+
+def test_edited_history_is_summarized_again():
+    compactor = HistoryCompactor(max_prompt_tokens=300, keep_recent=2)
+    summarize = RecordingSummarizer()
+    messages = conversation(6)
+    compactor.compact("c", messages, summarize)
+
+    messages[1] = {"role": "user", "content": "Question 0 (edited): " + "word " * 40}
+    compactor.compact("c", messages, summarize)
+
+    assert summarize.calls[-1][0] is None and len(summarize.calls[-1][1]) == 10
+
+
+def test_failed_summaries_drop_older_messages():
+    def failing(summary, messages):
+        raise RuntimeError("deployment unavailable")
+
+    compacted = HistoryCompactor(max_prompt_tokens=300, keep_recent=2).compact("c", conversation(6), failing)
+
+    assert [message["role"] for message in compacted] == ["system", "user", "assistant"]
+
+
+def test_summary_cache_is_bounded():
+    compactor = HistoryCompactor(max_prompt_tokens=300, keep_recent=2, max_conversations=2)
+    for conversation_id in ("a", "b", "c"):
+        compactor.compact(conversation_id, conversation(6), RecordingSummarizer())
+
+    assert list(compactor._summaries) == ["b", "c"]
+
+
+def test_trim_tool_outputs_keeps_the_latest_result():
+    compactor = HistoryCompactor(max_prompt_tokens=300, tool_output_tokens=10)
+    thoughts = [{"role": "function", "name": "search", "content": "x" * 1000},
+                {"role": "function", "name": "scrape", "content": "y" * 1000}]
+
+    trimmed = compactor.trim_tool_outputs(conversation(1), thoughts)
+
+    assert trimmed[0]["content"] == "x" * 40 + " [truncated]"
+    assert trimmed[1]["content"] == "y" * 1000
@@ -0,0 +1,36 @@
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    patch = pytest.MonkeyPatch()
+    patch.setattr(config, "azure_openai_endpoint", "http://127.0.0.1:9")
+    patch.setattr(config, "azure_openai_key_key", "fake-key")
+    patch.setattr(config, "azure_openai_deployment_name", "gpt-4")
+    patch.setattr(config, "azure_openai_deployments", None)
+    patch.setattr(config, "tool_manifest_path", str(tmp_path_factory.mktemp("tools") / "manifest.json"))
+    main = importlib.import_module("main")
+    yield TestClient(main.app)
+    patch.undo()
+
+
+@pytest.mark.parametrize("concurrency", [0, config.batch_concurrency + 1, 1000])
+def test_batch_concurrency_is_capped(client, concurrency):
+    response = client.post(f"/assistant/batch?concurrency={concurrency}", content="")
+    assert response.status_code == 400
+
+
+def test_batch_accepts_lower_concurrency(client):
+    response = client.post("/assistant/batch?concurrency=1", content="")
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("group_by,status", [("lineno", 200), ("filename", 200), ("function", 400)])
+def test_memory_stats_group_by_is_validated(client, group_by, status):
+    response = client.get(f"/debug/memory?group_by={group_by}")
+    assert response.status_code == status
@@ -0,0 +1,69 @@
+import pytest
+
+from fakes.web import FakeWebServer
+from functions.page_cache import PageCache
+from functions.web_scraper import WebContentScraper
+
+PAGE = "<html><body><p>" + "The original article text. " * 20 + "</p></body></html>"
+UPDATED = "<html><body><p>" + "The updated article text. " * 20 + "</p></body></html>"
+
+
+@pytest.fixture
+def web():
+    with FakeWebServer({"/article": PAGE}) as server:
+        yield server
+
+
+def scraper_with_cache(tmp_path, fresh_for):
+    return WebContentScraper(page_cache=PageCache(str(tmp_path / "pages.sqlite3"), fresh_for=fresh_for))
+
+
+def test_fresh_page_is_served_without_request(web, tmp_path):
+    scraper = scraper_with_cache(tmp_path, fresh_for=300)
+    first = scraper.scrape_website(web.url("/article"))
+    second = scraper.scrape_website(web.url("/article"))
+
+    assert second == first
+    assert web.requests["/article"] == 1
+    assert scraper.page_cache.hits == 1
+
+
+def test_stale_page_is_revalidated_with_etag(web, tmp_path):
+    scraper = scraper_with_cache(tmp_path, fresh_for=0)
+    first = scraper.scrape_website(web.url("/article"))
+    second = scraper.scrape_website(web.url("/article"))
+
+    assert second == first
+    assert web.requests["/article"] == 2
+    assert web.not_modified == 1
+    assert scraper.page_cache.revalidated == 1
+
+
+def test_changed_page_is_fetched_again(web, tmp_path):
+    scraper = scraper_with_cache(tmp_path, fresh_for=0)
+    scraper.scrape_website(web.url("/article"))
+    web.pages["/article"] = UPDATED
+
+    result = scraper.scrape_website(web.url("/article"))
+
+    assert "updated article" in result["content"]
+    assert web.not_modified == 0
+    assert scraper.page_cache.misses == 2
+
+
+def test_cache_persists_across_instances(web, tmp_path):
+    scraper_with_cache(tmp_path, fresh_for=300).scrape_website(web.url("/article"))
+    result = scraper_with_cache(tmp_path, fresh_for=300).scrape_website(web.url("/article"))
+
+    assert "original article" in result["content"]
+    assert web.requests["/article"] == 1
+
+
+def test_evicts_least_recently_used_pages(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), max_bytes=3000)
+    for i in range(5):
+        cache.put(f"https://example.com/{i}", ("<p>%d</p>" % i).encode() * 50, "x" * 1000)
+
+    assert cache.get("https://example.com/0") is None
+    assert cache.get("https://example.com/4") is not None
+    assert cache.stats()["bytes"] <= 3000
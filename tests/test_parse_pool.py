@@ -0,0 +1,14 @@
+from functions.parse_pool import ParsePool
+from functions.web_scraper import extract_text
+
+PAGE = b"<html><body><script>var x = 1;</script><p>Parsed in a worker process.</p></body></html>"
+
+
+def test_parses_in_worker_processes():
+    pool = ParsePool(workers=1)
+    try:
+        assert pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert pool.run(extract_text, PAGE) == extract_text(PAGE)
+        assert pool.stats()["completed"] == 1
+    finally:
+        pool.shutdown()
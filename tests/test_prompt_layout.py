@@ -0,0 +1,49 @@
+from core.history import HistoryCompactor
+from core.prompt_layout import PromptLayout
+
+SYSTEM_PROMPT = "You are an AI assistant."
+
+
+def test_keeps_client_system_message_after_canonical_prompt():
+    layout = PromptLayout(SYSTEM_PROMPT)
+    messages = layout.build_messages([
+        {"role": "system", "content": "Answer in German."},
+        {"role": "user", "content": "Wie ist das Wetter?"},
+    ])
+
+    assert messages == [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": "Answer in German."},
+        {"role": "user", "content": "Wie ist das Wetter?"},
+    ]
+
+
+def test_drops_client_copy_of_canonical_prompt():
+    layout = PromptLayout(SYSTEM_PROMPT)
+    messages = layout.build_messages([
+        {"role": "system", "content": f"  {SYSTEM_PROMPT}\n"},
+        {"role": "user", "content": "Hi"},
+    ])
+
+    assert messages == [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": "Hi"}]
+
+
+def test_normalizes_messages():
+    layout = PromptLayout(None)
+    assert layout.build_messages([{"content": "Hi", "name": None, "role": "user"}]) == \
+        [{"role": "user", "content": "Hi"}]
+
+
+def test_compaction_keeps_every_leading_system_message():
+    compactor = HistoryCompactor(max_prompt_tokens=200, keep_recent=2)
+    layout = PromptLayout(SYSTEM_PROMPT)
+    messages = layout.build_messages(
+        [{"role": "system", "content": "Answer in German."}] +
+        [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} " + "word " * 40}
+         for i in range(10)]
+    )
+
+    compacted = compactor.compact(None, messages, lambda summary, older: "The user asked things.")
+
+    assert compacted[:2] == messages[:2]
+    assert compacted[-2:] == messages[-2:]
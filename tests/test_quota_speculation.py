@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+import functions.weather as weather
+from core.azure_functions import AzureOpenAIFunctions
+from core.deployment_pool import AzureDeployment, DeploymentPool
+from core.quota import ProviderQuota, QuotaManager
+from core.speculation import Speculator, extract_weather_city
+from core.tool_cache import ToolCache
+from core.tool_executor import ToolError, ToolExecutor
+from fakes.azure_openai import FakeAzureOpenAIServer
+
+BERLIN = {"name": "Berlin", "main": {"temp": 7.3}, "weather": [{"description": "light rain"}]}
+
+
+class FakeWeatherAPI:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        api = self
+
+        class Response:
+            @staticmethod
+            def json():
+                return dict(BERLIN, call=api.calls)
+        return Response()
+
+
+@pytest.fixture
+def weather_api(monkeypatch):
+    api = FakeWeatherAPI()
+    monkeypatch.setattr(weather, "requests", api)
+    # One call per second, and the only token is already spent: a prefetch gets none
+    quota_manager = QuotaManager([ProviderQuota("openweathermap", per_minute=60, burst=1)])
+    quota_manager.acquire("openweathermap")
+    monkeypatch.setattr(weather, "quotas", quota_manager)
+    return api
+
+
+@pytest.fixture
+def llm():
+    with FakeAzureOpenAIServer(function_call=lambda body: ("get_weather", {"city": "Berlin"})) as server:
+        yield server
+
+
+def test_quota_denied_prefetch_is_retried_and_never_cached(weather_api, llm):
+    tool_cache = ToolCache(ttl=300)
+    assistant = AzureOpenAIFunctions(
+        azure_openai_endpoint=llm.endpoint,
+        azure_openai_key_key="fake",
+        azure_api_version="2023-07-01-preview",
+        model="fake",
+        functions=[weather.get_weather],
+        deployment_pool=DeploymentPool([AzureDeployment(llm.endpoint, "fake", "2023-07-01-preview", "fake")]),
+        tool_cache=tool_cache,
+        speculator=Speculator({"get_weather": extract_weather_city}),
+    )
+    sent = []
+    create = assistant.deployment_pool.create_chat_completion
+
+    def recording_create(**kwargs):
+        sent.append(kwargs["messages"])
+        return create(**kwargs)
+
+    assistant.deployment_pool.create_chat_completion = recording_create
+
+    assistant.ask([{"role": "user", "content": "What is the weather in Berlin today?"}])
+
+    function_results = [message["content"] for messages in sent for message in messages
+                        if message["role"] == "function"]
+    assert function_results and all("light rain" in result and "quota" not in result
+                                    for result in function_results)
+    assert weather_api.calls == 1
+    assert assistant.speculator.stats()["used"] == 0
+    assert assistant.speculator.stats()["failed"] == 1
+    assert tool_cache.stats()["entries"] == 1
+
+
+def test_quota_wait_ends_at_the_tool_deadline():
+    quota_manager = QuotaManager([ProviderQuota("serpapi", per_minute=1, burst=1)])
+    quota_manager.acquire("serpapi")
+    executor = ToolExecutor(default_timeout=0.3, grace=1.0)
+    calls = []
+
+    start = time.monotonic()
+    # An interactive call may wait 10s for quota, but not past its tool deadline
+    result = executor.run("search", lambda: quota_manager.call("serpapi", "q", lambda: calls.append(1)), {})
+
+    assert isinstance(result, ToolError) and "QuotaExceeded" in result.message
+    assert time.monotonic() - start < 1.0
+    assert calls == []
+    assert quota_manager.remaining("serpapi")["denied"] == 1
@@ -0,0 +1,79 @@
+import json
+
+from core.result_encoding import ResultEncoding, encode_result, is_tabular, minify_json, project, result_encoding
+from core.tool_registry import LazyTool
+
+WEATHER = {"name": "Berlin", "main": {"temp": 7.3, "humidity": 81},
+           "weather": [{"description": "light rain", "icon": "10d"}], "coord": {"lat": 52.5, "lon": 13.4}}
+
+
+def test_minify_json_keeps_unicode():
+    assert minify_json({"city": "Zürich", "temps": [1, 2]}) == '{"city":"Zürich","temps":[1,2]}'
+
+
+def test_project_follows_dotted_paths_and_lists():
+    assert project(WEATHER, ["name", "main.temp", "weather.description", "missing.field"]) == \
+           {"name": "Berlin", "main": {"temp": 7.3}, "weather": ["light rain"]}
+
+
+def test_project_applies_to_every_record():
+    assert project([{"a": 1, "b": 2}, {"a": 3}], ["a"]) == [{"a": 1}, {"a": 3}]
+
+
+def test_is_tabular():
+    assert is_tabular([{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+    assert not is_tabular([{"a": 1}, {"b": 2}])
+    assert not is_tabular([])
+    assert not is_tabular({"a": 1})
+
+
+def test_uniform_records_become_csv():
+    records = [{"name": "shop", "status": "Healthy", "labels": {"team": "web"}},
+               {"name": "cart, v2", "status": "Degraded", "labels": {}}]
+
+    assert ResultEncoding().encode(records) == \
+           'name,status,labels\nshop,Healthy,"{""team"":""web""}"\n"cart, v2",Degraded,{}'
+    assert ResultEncoding(tabular=False).encode(records).startswith('[{"name":"shop"')
+
+
+def test_json_text_is_reencoded_compactly():
+    text = json.dumps([{"url": "https://example.com", "content": "Grüße"}], indent=2)
+    assert ResultEncoding(tabular=False).encode(text) == '[{"url":"https://example.com","content":"Grüße"}]'
+    assert ResultEncoding().encode("plain text, not JSON") == "plain text, not JSON"
+    assert ResultEncoding().encode(b"\xffbytes") == "�bytes"
+
+
+def test_encode_result_uses_the_tool_encoding():
+    @result_encoding(fields=["name", "main.temp"])
+    def get_weather(city: str):
+        return WEATHER
+
+    def plain():
+        return WEATHER
+
+    assert encode_result(get_weather, WEATHER) == '{"name":"Berlin","main":{"temp":7.3}}'
+    assert encode_result(plain, WEATHER) == str(WEATHER)
+
+
+def test_encode_result_falls_back_to_str_when_encoding_fails():
+    class Broken(ResultEncoding):
+        def encode(self, result):
+            raise ValueError("broken")
+
+    def tool():
+        pass
+    tool.result_encoding = Broken()
+
+    assert encode_result(tool, WEATHER) == str(WEATHER)
+
+
+def test_values_json_cannot_represent_are_stringified():
+    assert ResultEncoding(tabular=False).encode({"a": {1}}) == '{"a":"{1}"}'
+
+
+def test_lazy_tools_use_the_encoding_once_loaded():
+    tool = LazyTool("functions.weather:get_weather", {"name": "get_weather"}, "weather")
+    assert tool.result_encoding is None
+    tool.load()
+    assert tool.result_encoding is not None
+    assert '"temp":7.3' in encode_result(tool, WEATHER)
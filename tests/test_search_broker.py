@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from functions.google_search import SearchError
+from functions.search_broker import SearchBroker, SearchProvider, normalize_url
+
+
+def provider(name, urls, delay=0.0):
+    calls = []
+
+    def search(query, num_results):
+        calls.append(query)
+        time.sleep(delay)
+        if isinstance(urls, Exception):
+            raise urls
+        return urls
+    search_provider = SearchProvider(name, search)
+    search_provider.calls = calls
+    return search_provider
+
+
+def test_hedge_uses_only_the_first_provider_when_it_answers_in_time():
+    fast, backup = provider("fast", ["https://a.com/1"]), provider("backup", ["https://b.com/1"])
+
+    assert SearchBroker([fast, backup], hedge_delay=0.5).search("q") == ["https://a.com/1"]
+    assert backup.calls == []
+
+
+def test_hedge_starts_the_next_provider_after_the_delay():
+    slow, backup = provider("slow", ["https://a.com/1"], delay=1.0), provider("backup", ["https://b.com/1"])
+
+    start = time.monotonic()
+    assert SearchBroker([slow, backup], hedge_delay=0.1).search("q") == ["https://b.com/1"]
+    assert time.monotonic() - start < 0.8
+
+
+def test_hedge_moves_on_at_once_when_a_provider_fails():
+    failing, backup = provider("failing", RuntimeError("503")), provider("backup", ["https://b.com/1"])
+
+    start = time.monotonic()
+    broker = SearchBroker([failing, backup], hedge_delay=5.0)
+    assert broker.search("q") == ["https://b.com/1"]
+    assert time.monotonic() - start < 1.0
+    # The failed provider cools down and is ranked last next time
+    assert broker._ranked() == [backup, failing]
+
+
+def test_race_returns_the_first_non_empty_result():
+    empty, slow, fast = provider("empty", []), provider("slow", ["https://a.com"], delay=0.5), \
+        provider("fast", ["https://b.com"], delay=0.05)
+
+    assert SearchBroker([empty, slow, fast], mode="race").search("q") == ["https://b.com"]
+
+
+def test_merge_interleaves_and_deduplicates():
+    first = provider("first", ["https://www.a.com/x/", "https://b.com/y?utm_source=feed"])
+    second = provider("second", ["https://c.com/z", "http://a.com/x#top", "https://b.com/y"])
+
+    urls = SearchBroker([first, second], mode="merge").search("q", num_results=5)
+
+    assert urls == ["https://www.a.com/x/", "https://c.com/z", "https://b.com/y?utm_source=feed"]
+
+
+def test_errors_name_the_providers():
+    broker = SearchBroker([provider("duckduckgo", RuntimeError("rate limited")),
+                           provider("google", SearchError("q", "quota exhausted", 429))], hedge_delay=0.0)
+
+    error = broker.search("q")
+
+    assert isinstance(error, SearchError)
+    message = error.to_dict()["error"]
+    assert message.startswith("Error in performing search (duckduckgo, google)")
+    assert "duckduckgo: rate limited" in message and "google: quota exhausted" in message
+
+
+def test_in_flight_is_balanced_under_concurrency():
+    shared = provider("shared", ["https://a.com"], delay=0.001)
+    broker = SearchBroker([shared], mode="race")
+    threads = [threading.Thread(target=lambda: [broker.search("q") for _ in range(20)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert shared.in_flight == 0
+    assert len(shared.calls) == 160
+
+
+def test_normalize_url():
+    assert normalize_url("https://www.Example.com/a/?utm_medium=x&id=1#frag") == "example.com/a?id=1"
+
+
+def test_rejects_unknown_modes():
+    with pytest.raises(ValueError):
+        SearchBroker([provider("p", [])], mode="fastest")
@@ -0,0 +1,68 @@
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk, Choice, ChoiceDelta, ChoiceDeltaFunctionCall
+
+from core.streaming import JsonCompletionTracker, collect_stream
+
+
+def chunk(content=None, name=None, arguments=None, finish_reason=None, choices=True):
+    function_call = ChoiceDeltaFunctionCall(name=name, arguments=arguments) \
+        if name is not None or arguments is not None else None
+    delta = ChoiceDelta(content=content, function_call=function_call)
+    return ChatCompletionChunk(id="chatcmpl-1", model="gpt-4", created=1700000000, object="chat.completion.chunk",
+                               choices=[Choice(index=0, delta=delta, finish_reason=finish_reason)] if choices else [])
+
+
+def test_tracker_completes_on_the_closing_brace():
+    tracker = JsonCompletionTracker()
+    pieces = ['{"city": "Ber', 'lin", "days": [1, ', '2]', '}', '\n']
+    assert [tracker.feed(piece) for piece in pieces] == [False, False, False, True, True]
+
+
+def test_tracker_ignores_braces_and_escaped_quotes_in_strings():
+    tracker = JsonCompletionTracker()
+    assert not tracker.feed('{"query": "a } b \\" } {"')
+    assert not tracker.feed(', "n": {"x": "]"}')
+    assert tracker.feed("}")
+
+
+def test_tracker_ignores_leading_whitespace():
+    tracker = JsonCompletionTracker()
+    assert not tracker.feed("  \n")
+    assert tracker.feed('{"a": 1}')
+
+
+def test_collect_stream_assembles_content():
+    chunks = [chunk(choices=False), chunk(content="Hello"), chunk(content=", world"), chunk(finish_reason="stop")]
+
+    completion = collect_stream(chunks)
+
+    assert completion.id == "chatcmpl-1" and completion.model == "gpt-4"
+    assert completion.choices[0].message.content == "Hello, world"
+    assert completion.choices[0].message.function_call is None
+    assert completion.choices[0].finish_reason == "stop"
+
+
+def test_collect_stream_dispatches_the_function_call_before_the_stream_ends():
+    events = []
+
+    def chunks():
+        yield chunk(name="get_weather", arguments="")
+        for piece in ['{"city"', ': "Berlin"', "}"]:
+            yield chunk(arguments=piece)
+        events.append("stream continued")
+        yield chunk(finish_reason="function_call")
+
+    completion = collect_stream(chunks(), on_function_call=lambda name, args: events.append((name, args)))
+
+    assert events == [("get_weather", '{"city": "Berlin"}'), "stream continued"]
+    function_call = completion.choices[0].message.function_call
+    assert function_call.name == "get_weather" and function_call.arguments == '{"city": "Berlin"}'
+    assert completion.choices[0].finish_reason == "function_call"
+
+
+def test_collect_stream_dispatches_once():
+    calls = []
+    chunks = [chunk(name="f", arguments='{"a": 1}'), chunk(arguments="}"), chunk(finish_reason="function_call")]
+
+    collect_stream(chunks, on_function_call=lambda name, args: calls.append(args))
+
+    assert calls == ['{"a": 1}']
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+
+from core.tool_cache import ToolCache, is_error_result
+from core.tool_executor import ToolError, ToolExecutor
+
+
+def counting(result):
+    calls = []
+
+    def tool(**kwargs):
+        calls.append(kwargs)
+        return result
+    return tool, calls
+
+
+def test_caches_results():
+    cache = ToolCache(ttl=60)
+    tool, calls = counting({"temp": 7})
+
+    assert cache.get_or_call("get_weather", {"city": "Berlin"}, tool) == {"temp": 7}
+    assert cache.get_or_call("get_weather", {"city": "Berlin"}, tool) == {"temp": 7}
+    assert len(calls) == 1
+
+
+def test_does_not_cache_error_results():
+    cache = ToolCache(ttl=60)
+    for result in [{"url": "https://example.com", "error": "Failed to fetch page content"},
+                   json.dumps({"error": "Error in performing Google Search: timeout", "query": "q"}),
+                   json.dumps([{"url": "a", "content": "..."}, {"url": "b", "error": "Skipped: out of time"}])]:
+        tool, calls = counting(result)
+        cache.get_or_call("tool", {"arg": 1}, tool)
+        cache.get_or_call("tool", {"arg": 1}, tool)
+        assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_is_error_result():
+    assert is_error_result({"error": "x"})
+    assert is_error_result('{"error": "x"}')
+    assert is_error_result([{"url": "a", "error": "x"}])
+    assert not is_error_result({"name": "Berlin"})
+    assert not is_error_result('[{"url": "a", "content": "an error was made"}]')
+    assert not is_error_result("plain text mentioning \"error\"")
+
+
+def test_coalesces_concurrent_calls():
+    cache = ToolCache(ttl=60)
+    calls = []
+
+    def slow(**kwargs):
+        calls.append(kwargs)
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_call("slow", {}, slow)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+
+
+def test_waiters_give_up_at_their_deadline():
+    cache = ToolCache(ttl=60)
+    release = threading.Event()
+    executor = ToolExecutor(default_timeout=0.2, grace=0.5)
+
+    def slow(**kwargs):
+        release.wait(5)
+        return "done"
+
+    owner = threading.Thread(target=cache.get_or_call, args=("slow", {}, slow))
+    owner.start()
+    try:
+        time.sleep(0.05)
+        start = time.monotonic()
+        result = executor.run("slow", lambda: cache.get_or_call("slow", {}, slow), {})
+        assert isinstance(result, ToolError) and result.timed_out
+        assert time.monotonic() - start < 0.6
+    finally:
+        release.set()
+        owner.join()
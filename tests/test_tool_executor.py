@@ -0,0 +1,96 @@
+import threading
+import time
+
+from core.tool_executor import ToolError, ToolExecutor, is_cancelled, time_left
+
+
+def hang(release: threading.Event):
+    def tool():
+        release.wait(10)
+        return "late"
+    return tool
+
+
+def test_returns_results_and_errors():
+    executor = ToolExecutor(default_timeout=1.0)
+
+    assert executor.run("add", lambda a, b: a + b, {"a": 1, "b": 2}) == 3
+    error = executor.run("fail", lambda: 1 / 0, {})
+    assert isinstance(error, ToolError)
+    assert "ZeroDivisionError" in error.message and not error.timed_out
+
+
+def test_times_out_hung_calls():
+    executor = ToolExecutor(default_timeout=0.2, grace=0.1)
+    release = threading.Event()
+    try:
+        start = time.monotonic()
+        result = executor.run("hang", hang(release), {})
+        assert isinstance(result, ToolError) and result.timed_out
+        assert time.monotonic() - start < 1.0
+        assert executor.stats()[0]["timeouts"] == 1
+    finally:
+        release.set()
+
+
+def test_tools_see_their_deadline():
+    executor = ToolExecutor(default_timeout=0.3, grace=0.5)
+
+    def cooperative():
+        while not is_cancelled():
+            time.sleep(0.01)
+        return "partial"
+
+    assert executor.run("cooperative", cooperative, {}) == "partial"
+    assert 0.1 < executor.run("left", lambda: time_left(10.0), {}) <= 0.3
+
+
+def test_stragglers_do_not_block_fresh_calls():
+    executor = ToolExecutor(default_timeout=0.2, grace=0.0)
+    release = threading.Event()
+    try:
+        for _ in range(4):
+            assert executor.run("hang", hang(release), {}).timed_out
+        # The deadline starts when the call starts running, so a fresh call is never charged for the stragglers
+        assert executor.run("answer", lambda: 42, {}) == 42
+    finally:
+        release.set()
+
+
+def test_deadline_starts_when_the_call_runs():
+    executor = ToolExecutor(default_timeout=0.5, grace=0.0)
+    release = threading.Event()
+    results = []
+    try:
+        threads = [threading.Thread(target=lambda: results.append(executor.run("hang", hang(release), {})))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.4)
+        # Two hung calls are still running; a call started now gets its full deadline
+        assert executor.run("slow", lambda: time.sleep(0.3) or "done", {}) == "done"
+        for thread in threads:
+            thread.join()
+        assert all(result.timed_out for result in results)
+    finally:
+        release.set()
+
+
+def test_caps_stragglers_per_tool():
+    executor = ToolExecutor(default_timeout=0.1, grace=0.0, max_stragglers=2)
+    release = threading.Event()
+    try:
+        for _ in range(2):
+            assert executor.run("hang", hang(release), {}).timed_out
+        refused = executor.run("hang", hang(release), {})
+        assert isinstance(refused, ToolError) and not refused.timed_out
+        assert "still running" in refused.message
+        assert executor.run("other", lambda: "ok", {}) == "ok"
+    finally:
+        release.set()
+
+    # Once the stragglers finish, the tool is called again
+    deadline = time.monotonic() + 2
+    while executor.stats()[0]["stragglers"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor.run("hang", lambda: "back", {}) == "back"
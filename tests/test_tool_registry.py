@@ -0,0 +1,70 @@
+import sys
+
+import pytest
+
+from core.tool_registry import LazyTool, ToolRegistry
+
+TOOL_MODULE = '''
+CALLS = []
+
+
+def lookup_ticket(ticket_id: str, include_comments: bool = False) -> dict:
+    """Look up a ticket in the tracker.
+
+    :param ticket_id: The ticket id.
+    :param include_comments: Whether to include the comments. (optional)
+    """
+    CALLS.append(ticket_id)
+    return {"id": ticket_id}
+'''
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    (tmp_path / "ticket_plugin.py").write_text(TOOL_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path / "ticket_plugin.py"
+    sys.modules.pop("ticket_plugin", None)
+
+
+def registry(tmp_path):
+    return ToolRegistry(str(tmp_path / "manifest.json")).declare("tickets", ["ticket_plugin:lookup_ticket"])
+
+
+def test_schema_comes_from_manifest_without_import(plugin, tmp_path):
+    first = registry(tmp_path).tools()
+    sys.modules.pop("ticket_plugin")
+
+    tools = registry(tmp_path).tools()
+
+    assert isinstance(tools[0], LazyTool)
+    assert tools[0].schema == first[0].schema
+    assert tools[0].schema["required"] == ["ticket_id"]
+    assert "ticket_plugin" not in sys.modules
+    assert not tools[0].loaded
+
+
+def test_module_is_imported_on_first_call(plugin, tmp_path):
+    registry(tmp_path).tools()
+    sys.modules.pop("ticket_plugin")
+    tool = registry(tmp_path).tools()[0]
+
+    assert tool(ticket_id="OPS-1") == {"id": "OPS-1"}
+    assert tool.loaded
+    assert sys.modules["ticket_plugin"].CALLS == ["OPS-1"]
+
+
+def test_changed_source_rebuilds_schema(plugin, tmp_path):
+    registry(tmp_path).tools()
+    plugin.write_text(TOOL_MODULE.replace("Look up a ticket", "Fetch an issue"))
+    sys.modules.pop("ticket_plugin")
+
+    tool = registry(tmp_path).tools()[0]
+
+    assert tool.schema["description"].startswith("Fetch an issue")
+
+
+def test_broken_integration_is_left_out(plugin, tmp_path):
+    tools = registry(tmp_path).declare("broken", ["missing_plugin:tool", "ticket_plugin:missing"]).tools()
+
+    assert [tool.__name__ for tool in tools] == ["lookup_ticket"]
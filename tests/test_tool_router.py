@@ -0,0 +1,63 @@
+from core.tool_router import ToolRouter, tokenize
+
+
+def schema(name, description, **params):
+    return {"name": name, "description": description,
+            "parameters": {"type": "object",
+                           "properties": {key: {"type": "string", "description": value} for key, value in params.items()}}}
+
+
+SCHEMAS = [
+    schema("get_weather", "Get the current weather of a city.", city="The city, e.g. Berlin"),
+    schema("news_search", "Search recent news articles.", query="The news topic"),
+    schema("webpage_scraper", "Scrape the text of web pages.", urls="The page URLs"),
+    schema("get_application_logs", "Condense the pod logs of an ArgoCD application to their errors.",
+           app_name="The ArgoCD application"),
+]
+KEYWORDS = {"get_weather": ["rain", "temperature", "forecast"], "news_search": ["latest", "today", "happened"],
+            "webpage_scraper": ["summarize", "article", "link", "url"]}
+
+
+def router(**kwargs):
+    return ToolRouter(keywords=KEYWORDS, **kwargs).build(SCHEMAS)
+
+
+def names(schemas):
+    return [schema["name"] for schema in schemas]
+
+
+def test_tokenize_stems_and_drops_stop_words():
+    assert tokenize("What is the Weather forecast for https://example.com/a?b=1 cities") == \
+           ["weather", "forecast", "url", "citi"]
+
+
+def test_selects_the_matching_tool():
+    assert names(router().select([{"role": "user", "content": "Will it rain in Berlin tomorrow?"}])) == ["get_weather"]
+
+
+def test_uses_the_latest_user_message():
+    messages = [{"role": "user", "content": "Will it rain in Berlin?"},
+                {"role": "assistant", "content": "Yes, light rain."},
+                {"role": "user", "content": "Why are the pods of the shop application logging errors?"}]
+    assert names(router().select(messages)) == ["get_application_logs"]
+
+
+def test_keeps_close_runners_up():
+    selected = names(router().select([{"role": "user", "content": "Summarize the latest news article at "
+                                                                  "https://example.com/story"}]))
+    assert set(selected) == {"news_search", "webpage_scraper"}
+
+
+def test_sends_every_tool_without_a_confident_match():
+    assert router().select([{"role": "user", "content": "Hello there!"}]) == SCHEMAS
+    assert router().select([]) == SCHEMAS
+
+
+def test_caps_the_number_of_tools():
+    selected = router(max_tools=1, relative_cutoff=0.0).select(
+        [{"role": "user", "content": "latest news and weather forecast"}])
+    assert len(selected) == 1
+
+
+def test_payload_tokens_shrink_with_fewer_tools():
+    assert 0 < ToolRouter.payload_tokens(SCHEMAS[:1]) < ToolRouter.payload_tokens(SCHEMAS)